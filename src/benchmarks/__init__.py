@@ -0,0 +1,3 @@
+"""
+Benchmarks of the preprocesser, see `python -m benchmarks.run --help`.
+"""
@@ -0,0 +1,125 @@
+"""
+Compares the steps with an ASCII fast path with the same steps always
+running their Unicode patterns, on mixes of tweets with a different
+share of ASCII texts.
+
+    python -m benchmarks.bench_ascii [--texts 20000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+from preprocesser.models import _base
+from preprocesser.models._base import _NON_ALPH_CHAR_TABLE, _sub_collect
+from preprocesser.models._patterns import (SUCCESSIONS_BEGIN,
+                                           SUCCESSIONS_END,
+                                           USER,
+                                           HASHTAG,
+                                           ELONGATED,
+                                           EMOJI)
+
+from .corpus import CorpusConfig, make_corpus
+
+MIXES = {
+    "en": CorpusConfig(languages=("en",)),
+    "en, no emojis": CorpusConfig(languages=("en",), emojis=0),
+    "en+es": CorpusConfig(),
+    "multilingual": CorpusConfig(languages=("en", "es", "fr", "th", "ar")),
+}
+
+
+def unicode_successions(text):
+    ht_mts = {"begin": SUCCESSIONS_BEGIN.search(text)}
+    if ht_mts["begin"]:
+        text = text[ht_mts["begin"].end():]
+        ht_mts["begin"] = ht_mts["begin"].group()
+    ht_mts["end"] = SUCCESSIONS_END.search(text)
+    if ht_mts["end"]:
+        text = text[:ht_mts["end"].start()]
+        ht_mts["end"] = ht_mts["end"].group()
+    return text, ht_mts
+
+
+def unicode_users(text):
+    text, users = _sub_collect(USER, text, "")
+    return text, {"users": users}
+
+
+def unicode_hashtags(text):
+    text, hts = _sub_collect(HASHTAG, text, lambda ht: ht[1:])
+    return text, {"#s": hts}
+
+
+def unicode_elongated(text):
+    text, elongateds = ELONGATED.subn(r"\1", text)
+    return text, {"elongateds": elongateds}
+
+
+def unicode_emojis(text):
+    text, emojis = _sub_collect(EMOJI, text, "EMOJI")
+    return text, {"emojis": emojis}
+
+
+def unicode_non_alph_char(text):
+    return " ".join(text.translate(_NON_ALPH_CHAR_TABLE).split())
+
+
+# The steps as they ran before, with the Unicode patterns only
+UNICODE_PATHS = {
+    "removeHtMentionsSuccessions": unicode_successions,
+    "replaceAtUser": unicode_users,
+    "removeHashtagInFrontOfWord": unicode_hashtags,
+    "replaceElongated": unicode_elongated,
+    "removeEmojis": unicode_emojis,
+    "removeNonAlphChar": unicode_non_alph_char,
+}
+
+DUAL_PATHS = {
+    "removeHtMentionsSuccessions": _base.removeHtMentionsSuccessions,
+    "replaceAtUser": _base.replaceAtUser,
+    "removeHashtagInFrontOfWord": _base.removeHashtagInFrontOfWord,
+    "replaceElongated": _base.replaceElongated,
+    "removeEmojis": _base.removeEmojis,
+    "removeNonAlphChar": _base.removeNonAlphChar,
+}
+
+
+def best(func, texts, repeat: int) -> float:
+    return min(timeit.repeat(lambda: [func(text) for text in texts],
+                             number=1, repeat=repeat))
+
+
+def bench(texts, repeat: int) -> None:
+    for name, dual in DUAL_PATHS.items():
+        assert ([dual(text) for text in texts] ==
+                [UNICODE_PATHS[name](text) for text in texts]), name
+
+    ascii_texts = [text for text in texts if text.isascii()]
+    other_texts = [text for text in texts if not text.isascii()]
+    print(f"  {len(ascii_texts) / len(texts):.0%} ASCII texts")
+    print(f"  {'step':>28} {'unicode':>9} {'dual':>9} {'speedup':>8}"
+          f"  {'ascii':>9} {'other':>9}")
+    for name, dual in DUAL_PATHS.items():
+        before = best(UNICODE_PATHS[name], texts, repeat)
+        after = best(dual, texts, repeat)
+        ascii_part = best(dual, ascii_texts, repeat)
+        other_part = best(dual, other_texts, repeat)
+        print(f"  {name:>28} {before * 1e3:7.2f}ms {after * 1e3:7.2f}ms "
+              f"{before / after:7.2f}x  {ascii_part * 1e3:7.2f}ms "
+              f"{other_part * 1e3:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, config in MIXES.items():
+        print(name)
+        # The steps run after toLower in the pipeline
+        bench([text.lower() for text in make_corpus(args.texts, config)],
+              args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the adjacent steps that could share a scan of the text, the
+repeated marks, elongated words and emojis, with a single precompiled
+alternation doing their work in one pass.
+
+The fused pass gives the same output and is slower, which is why
+PreProcesser has no fused mode: `re` only searches for the literal
+prefix of a pattern on its own, and the alternation calls back into
+Python for every match to dispatch its replacement.
+
+    python -m benchmarks.bench_fused [--texts 20000] [--repeat 5]
+"""
+import argparse
+import re
+import timeit
+
+from preprocesser.models import _base
+from preprocesser.models._patterns import EMOJIS, UNICODES
+
+from .corpus import CorpusConfig, make_corpus
+
+FUSED = re.compile("|".join([
+    r"(?P<exclams>!{2,})",
+    r"(?P<questions>\?{2,})",
+    r"(?P<stops>\.{2,})",
+    fr"(?P<elongateds>(?P<letter>[a-zA-Z{UNICODES}])(?P=letter){{2,}})",
+    "(?P<emojis>[" + EMOJIS + "]+)",
+]))
+
+REPLACEMENTS = {"exclams": "!", "questions": "?", "stops": "."}
+
+
+def separate(text):
+    text, exclams = _base.replaceMultiExclamationMark(text)
+    text, questions = _base.replaceMultiQuestionMark(text)
+    text, stops = _base.replaceMultiStopMark(text)
+    text, elongateds = _base.replaceElongated(text)
+    text, emojis = _base.removeEmojis(text)
+    return text, {**exclams, **questions, **stops, **elongateds, **emojis}
+
+
+def fused(text):
+    features = {"exclams": 0, "questions": 0, "stops": 0, "elongateds": 0,
+                "emojis": []}
+
+    def replace(match):
+        key = match.lastgroup
+        if key == "emojis":
+            features["emojis"].append(match.group())
+            return "EMOJI"
+        features[key] += 1
+        if key == "elongateds":
+            return match.group("letter")
+        return REPLACEMENTS[key]
+
+    return FUSED.sub(replace, text), features
+
+
+def best(func, texts, repeat: int) -> float:
+    return min(timeit.repeat(lambda: [func(text) for text in texts],
+                             number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The steps run after toLower in the pipeline
+    texts = [text.lower() for text in make_corpus(args.texts,
+                                                  CorpusConfig())]
+    assert [fused(text) for text in texts] == [separate(text)
+                                               for text in texts]
+    before = best(separate, texts, args.repeat)
+    after = best(fused, texts, args.repeat)
+    print(f"separate {before * 1e3:7.2f}ms  fused {after * 1e3:7.2f}ms  "
+          f"speedup {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares removeNonAlphChar with the character by character loop it
+replaced on multilingual texts.
+
+    python -m benchmarks.bench_non_alph_char [--texts 2000] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+import unicodedata
+
+from preprocesser.models._base import removeNonAlphChar
+
+LATIN = ["hola", "mañana", "increíble", "the", "great", "Straße", "naïve",
+         "😀", "✨", "!!!", "¿¡", "#tag", "@user", "$12", "12/03/2020", "..."]
+MULTILINGUAL = LATIN + [
+    "ฉันรัก", "ภาษาไทย", "مرحبا", "العربية", "नमस्ते", "हिन्दी", "বাংলা",
+    "Привет", "мир", "こんにちは", "日本語", "안녕하세요", "Ελληνικά",
+]
+
+
+def legacy_removeNonAlphChar(text: str) -> str:
+    cleaned_text = ""
+    for character in text:
+        cleaned_text += (character
+                         if unicodedata.category(character)[0]
+                         in "LZNM" else " ")
+    return " ".join(cleaned_text.split())
+
+
+def make_texts(words, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(5, 40)))
+            for _ in range(n)]
+
+
+def bench(texts, repeat: int) -> None:
+    assert ([removeNonAlphChar(text) for text in texts] ==
+            [legacy_removeNonAlphChar(text) for text in texts])
+
+    chars = sum(map(len, texts))
+    results = {}
+    for name, func in (("loop", legacy_removeNonAlphChar),
+                       ("table", removeNonAlphChar)):
+        best = min(timeit.repeat(lambda: [func(text) for text in texts],
+                                 number=1, repeat=repeat))
+        results[name] = best
+        print(f"  {name:>6}: {best * 1e3:8.2f} ms "
+              f"({chars / best / 1e6:6.2f} Mchars/s)")
+    print(f"  speedup: {results['loop'] / results['table']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, words in (("latin", LATIN), ("multilingual", MULTILINGUAL)):
+        print(name)
+        bench(make_texts(words, args.texts), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
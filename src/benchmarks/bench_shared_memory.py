@@ -0,0 +1,71 @@
+"""
+Compares the cost of moving a batch to the workers and back by
+pickling, as `pool.map` does, with the shared memory transfer of
+`ParallelExecutor(shared_memory=True)`, and both executors end to end.
+
+    python -m benchmarks.bench_shared_memory [--texts 20000] [--jobs 2]
+"""
+import argparse
+import pickle
+import timeit
+
+from preprocesser.features import ParallelExecutor
+from preprocesser.features._shared import (pack_texts, read_results,
+                                           read_texts, write_results)
+from preprocesser.models import EN_PreProcesser
+
+from .corpus import make_corpus
+
+
+def pickle_transfer(texts, results):
+    pickle.loads(pickle.dumps(texts, pickle.HIGHEST_PROTOCOL))
+    pickle.loads(pickle.dumps(results, pickle.HIGHEST_PROTOCOL))
+
+
+def shared_transfer(texts, batch):
+    shm = pack_texts(texts)
+    try:
+        read_texts(shm.name, 0, len(texts))
+    finally:
+        shm.close()
+        shm.unlink()
+    read_results(*write_results(batch))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--jobs", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    p = EN_PreProcesser()
+    texts = make_corpus(args.texts)
+    features = [p(text) for text in texts]
+    batch = p.transform_batch(texts)
+    pped = [p.clean(text) for text in texts]
+
+    print("transfer only")
+    for name, results, columns in (("features", features, batch),
+                                   ("text_only", pped, pped)):
+        pickled = min(timeit.repeat(lambda: pickle_transfer(texts, results),
+                                    number=1, repeat=args.repeat))
+        shared = min(timeit.repeat(lambda: shared_transfer(texts, columns),
+                                   number=1, repeat=args.repeat))
+        print(f"  {name:>9}: pickle {pickled * 1e3:8.2f} ms, "
+              f"shared {shared * 1e3:8.2f} ms")
+
+    print(f"end to end, {args.jobs} jobs")
+    for shared_memory in (False, True):
+        with ParallelExecutor(p, njobs=args.jobs,
+                              shared_memory=shared_memory) as executor:
+            for text_only in (False, True):
+                best = min(timeit.repeat(
+                    lambda: executor.map(texts, text_only=text_only),
+                    number=1, repeat=args.repeat))
+                print(f"  shared_memory={shared_memory!s:>5} "
+                      f"text_only={text_only!s:>5}: {best * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
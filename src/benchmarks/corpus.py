@@ -0,0 +1,115 @@
+import random
+import string
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+WORDS = {
+    "en": ["the", "people", "are", "waiting", "for", "news", "about", "city",
+           "water", "is", "not", "good", "today", "we", "love", "this",
+           "really", "great", "and", "with", "traffic", "again", "why"],
+    "es": ["la", "gente", "está", "esperando", "noticias", "sobre", "ciudad",
+           "el", "agua", "no", "es", "buena", "hoy", "mañana", "increíble",
+           "que", "por", "qué", "tráfico", "otra", "vez", "ñandú", "y"],
+    "fr": ["les", "gens", "attendent", "des", "nouvelles", "de", "la",
+           "ville", "eau", "n'est", "pas", "bonne", "aujourd'hui", "très",
+           "déçu", "encore", "pourquoi", "circulation", "et", "été"],
+    "th": ["ฉันรัก", "ภาษาไทย", "วันนี้", "น้ำ", "ไม่", "ดี", "เมือง",
+           "ข่าว", "รถติด", "อีกแล้ว", "ทำไม", "คน"],
+    "ar": ["مرحبا", "الناس", "ينتظرون", "الأخبار", "عن", "المدينة", "الماء",
+           "ليس", "جيدا", "اليوم", "لماذا", "مرة"],
+}
+
+EMOJIS = ["😀", "😂", "😡", "🙏", "🔥", "✨", "🚗", "💧", "🇪🇸"]
+MONTHS = ["Jan", "February", "Mar", "April", "Sep", "Dec"]
+
+
+@dataclass(frozen=True)
+class CorpusConfig:
+    """
+    Probability of every kind of token in a synthetic tweet. Every
+    density is the chance that one word is replaced by that kind of
+    token, what is left are plain words of the given languages.
+    """
+
+    languages: Sequence[str] = ("en", "es")
+    min_words: int = 5
+    max_words: int = 40
+    urls: float = 0.03
+    mentions: float = 0.05
+    hashtags: float = 0.05
+    emojis: float = 0.04
+    numbers: float = 0.04
+    elongations: float = 0.02
+    punctuation: float = 0.05
+
+
+def _url(rng: random.Random) -> str:
+    path = "".join(rng.choices(string.ascii_letters + string.digits, k=10))
+    return rng.choice(["https://t.co/", "http://bit.ly/"]) + path
+
+
+def _name(rng: random.Random, words: List[str]) -> str:
+    return rng.choice(words) + rng.choice(["", "_", "2"]) + rng.choice(words)
+
+
+def _number(rng: random.Random) -> str:
+    kind = rng.randrange(5)
+    day, year = rng.randint(1, 28), rng.randint(2010, 2024)
+    if kind == 0:
+        return f"{day}/{rng.randint(1, 12)}/{year}"
+    if kind == 1:
+        return f"{day} {rng.choice(MONTHS)} {year}"
+    if kind == 2:
+        return f"{rng.choice('$€£')}{rng.randint(1, 999)}"
+    if kind == 3:
+        return str(rng.randint(1990, 2030))
+    return str(rng.randint(0, 500))
+
+
+def _elongate(rng: random.Random, word: str) -> str:
+    i = rng.randrange(len(word))
+    return word[:i + 1] + word[i] * rng.randint(2, 6) + word[i + 1:]
+
+
+def make_tweet(rng: random.Random, config: CorpusConfig) -> str:
+    words = WORDS[rng.choice(config.languages)]
+    tokens = []
+    for _ in range(rng.randint(config.min_words, config.max_words)):
+        roll = rng.random()
+        for density, token in (
+                (config.urls, lambda: _url(rng)),
+                (config.mentions, lambda: "@" + _name(rng, words)),
+                (config.hashtags, lambda: "#" + _name(rng, words)),
+                (config.emojis,
+                 lambda: "".join(rng.choices(EMOJIS, k=rng.randint(1, 3)))),
+                (config.numbers, lambda: _number(rng)),
+                (config.elongations,
+                 lambda: _elongate(rng, rng.choice(words))),
+                (config.punctuation,
+                 lambda: rng.choice(["!!!", "??", "...", ",", "¡¿", "!"]))):
+            if roll < density:
+                tokens.append(token())
+                break
+            roll -= density
+        else:
+            tokens.append(rng.choice(words))
+    return " ".join(tokens)
+
+
+def make_corpus(size: int,
+                config: Optional[CorpusConfig] = None,
+                seed: int = 0) -> List[str]:
+    """
+    Generates `size` synthetic tweets. The same `config` and `seed`
+    always give the same corpus.
+
+    :size
+        - Number of tweets
+    :config
+        - Densities and languages of the tweets
+    :seed
+        - Seed of the random generator
+    """
+    config = config or CorpusConfig()
+    rng = random.Random(seed)
+    return [make_tweet(rng, config) for _ in range(size)]
@@ -0,0 +1,186 @@
+"""
+Times every `_base` helper, EN_PreProcesser/ES_PreProcesser end to end
+and the pipe functions on synthetic corpora.
+
+    python -m benchmarks.run --sizes 1000 10000 --jobs 1 2 4
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+
+With `--baseline` the run fails when a benchmark is slower than the
+baseline by more than `--tolerance` or when its output changed.
+Timings are scaled by a calibration loop, so a baseline saved on a
+different machine can still be compared.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import re
+import sys
+import timeit
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from preprocesser.models import _base, EN_PreProcesser, ES_PreProcesser
+
+from .corpus import CorpusConfig, make_corpus
+
+Benchmark = Tuple[str, Callable[[List[str]], Any]]
+
+HELPERS = [
+    ("removeUnicode", _base.removeUnicode, {}),
+    ("removeUrls", _base.removeUrls, {}),
+    ("removeHtMentionsSuccessions", _base.removeHtMentionsSuccessions, {}),
+    ("toLower", _base.toLower, {}),
+    ("replaceAtUser", _base.replaceAtUser, {}),
+    ("removeTags", _base.removeTags, {}),
+    ("removeHashtagInFrontOfWord", _base.removeHashtagInFrontOfWord, {}),
+    ("replaceMultiExclamationMark", _base.replaceMultiExclamationMark, {}),
+    ("replaceMultiQuestionMark", _base.replaceMultiQuestionMark, {}),
+    ("replaceMultiStopMark", _base.replaceMultiStopMark, {}),
+    ("replaceElongated", _base.replaceElongated, {}),
+    ("removeEmojis", _base.removeEmojis, {}),
+    ("removeNumbers", _base.removeNumbers, {}),
+    ("removeStopWords", _base.removeStopWords, {"lang": "en"}),
+    ("removePunctuation", _base.removePunctuation, {}),
+    ("removeNonAlphChar", _base.removeNonAlphChar, {}),
+    ("removeMultiWhiteSpace", _base.removeMultiWhiteSpace, {}),
+]
+
+
+def _apply(func: Callable, **kwargs) -> Callable[[List[str]], Any]:
+    return lambda texts: [func(text, **kwargs) for text in texts]
+
+
+def benchmarks(jobs: Sequence[int]) -> Iterator[Benchmark]:
+    """Every benchmark as a name and a function of the corpus"""
+    for name, helper, kwargs in HELPERS:
+        yield f"helpers.{name}", _apply(helper, **kwargs)
+
+    for name, p in (("EN_PreProcesser", EN_PreProcesser()),
+                    ("ES_PreProcesser", ES_PreProcesser()),
+                    ("EN_PreProcesser.text_only",
+                     EN_PreProcesser({"text_only": True}))):
+        yield f"preprocesser.{name}", _apply(p)
+
+    try:
+        from preprocesser.features import (sequential_preprocessing,
+                                           parallel_preprocessing,
+                                           vectorized_preprocessing)
+    except ImportError as e:
+        print(f"Skipping the pipe functions: {e}", file=sys.stderr)
+        return
+
+    p = EN_PreProcesser()
+    yield ("pipe.sequential_preprocessing",
+           lambda texts: list(sequential_preprocessing(p, texts)))
+    for engine in ("pandas", "pyarrow"):
+        yield (f"pipe.vectorized_preprocessing.engine={engine}",
+               lambda texts, engine=engine: vectorized_preprocessing(
+                   p, texts, engine=engine))
+        yield (f"pipe.vectorized_preprocessing.text_only.engine={engine}",
+               lambda texts, engine=engine: vectorized_preprocessing(
+                   p, texts, text_only=True, engine=engine))
+    for njobs in sorted(set(min(njobs, mp.cpu_count()) for njobs in jobs)):
+        yield (f"pipe.parallel_preprocessing.jobs={njobs}",
+               lambda texts, njobs=njobs: list(
+                   parallel_preprocessing(p, texts, njobs=njobs)))
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Time of a fixed pure Python workload on this machine"""
+    return min(timeit.repeat(lambda: sum(i * i for i in range(200_000)),
+                             number=1, repeat=repeat))
+
+
+def digest(results: Any) -> str:
+    return hashlib.sha1(repr(results).encode()).hexdigest()[:16]
+
+
+def run(sizes: Sequence[int],
+        jobs: Sequence[int],
+        config: CorpusConfig,
+        repeat: int = 5,
+        only: str = "") -> Dict[str, Any]:
+    """
+    Runs the benchmarks matching `only` on a corpus of every size and
+    returns the best time and the digest of the output of each one.
+    """
+    corpora = {size: make_corpus(size, config) for size in sizes}
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, func in benchmarks(jobs):
+        if only and not re.search(only, name):
+            continue
+        for size, texts in corpora.items():
+            key = f"{name}[{size}]"
+            output = func(texts)
+            seconds = min(timeit.repeat(lambda: func(texts),
+                                        number=1, repeat=repeat))
+            results[key] = {"seconds": seconds, "digest": digest(output)}
+            print(f"{key:<60} {seconds * 1e3:10.2f} ms "
+                  f"{seconds / size * 1e6:8.2f} us/text")
+    return {"calibration": calibrate(), "results": results}
+
+
+def compare(current: Dict[str, Any],
+            baseline: Dict[str, Any],
+            tolerance: float = 0.25,
+            only: str = "") -> List[str]:
+    """
+    Regressions of `current` against `baseline`: benchmarks slower than
+    the scaled baseline by more than `tolerance`, or whose output is
+    different. Benchmarks of only one of the runs are reported too,
+    except the ones of the baseline not matching `only`.
+    """
+    scale = current["calibration"] / baseline["calibration"]
+    regressions = []
+    for key in sorted(baseline["results"]):
+        if key not in current["results"] and re.search(only, key):
+            regressions.append(f"{key}: not run")
+    for key, result in current["results"].items():
+        expected = baseline["results"].get(key)
+        if expected is None:
+            regressions.append(f"{key}: not in baseline")
+            continue
+        if result["digest"] != expected["digest"]:
+            regressions.append(f"{key}: output changed")
+        ratio = result["seconds"] / (expected["seconds"] * scale)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{key}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--languages", nargs="+", default=["en", "es"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default="",
+                        help="regex of the benchmarks to run")
+    parser.add_argument("--save", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with this file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    current = run(args.sizes, args.jobs,
+                  CorpusConfig(languages=tuple(args.languages)),
+                  repeat=args.repeat, only=args.only)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance,
+                              args.only)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,16 @@ __version__ = "0.0.7"
 
 __name__ = "preprocesser"
 
+
+def __getattr__(name):
+    # `import preprocesser` is free, the subpackages are imported on
+    # first access, e.g. `preprocesser.models`
+    if name in __all__:
+        from importlib import import_module
+        return import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "data",
     "features",
@@ -0,0 +1,182 @@
+"""
+Preprocess texts from the command line.
+
+    cat tweets.txt | python -m preprocesser --lang en --jobs 4 > out.jsonl
+    preprocesser --lang es --text-only --punctuation tweets.jsonl -o out.txt
+
+Every input line is a text, or a JSON object with the text in
+`--text-field` for `.jsonl` files or with `--input-format jsonl`. The
+features of every text are written as a JSON line, or only the pped
+text with `--text-only`.
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+# Only the modules needed by the options are imported, pandas never is,
+# so the command starts fast in shell pipelines
+
+
+def _flags() -> Dict[str, bool]:
+    """Boolean flags of PreProcesser and their defaults"""
+    from preprocesser.models import PreProcesser
+
+    flags = {name: parameter.default for name, parameter
+             in inspect.signature(PreProcesser.__init__).parameters.items()
+             if isinstance(parameter.default, bool)}
+    for name in ("text_only", "profiling", "cache"):
+        flags.pop(name, None)
+    flags["remove_stopwords"] = True
+    return flags
+
+
+def _parser(flags: Dict[str, bool]) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="preprocesser", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="files to preprocess, - or nothing for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file to write the results, stdout by default")
+    parser.add_argument("--lang",
+                        help="language of the texts, for the stopwords")
+    parser.add_argument("--input-format", choices=["lines", "jsonl"],
+                        help="inferred from the extension by default")
+    parser.add_argument("--text-field", default="text",
+                        help="field of the text in jsonl inputs")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of processes, -1 for all the CPUs")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="number of texts written at once")
+    parser.add_argument("--text-only", action="store_true",
+                        help="write only the pped texts")
+    parser.add_argument("--keep-features",
+                        help="comma separated features to extract")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the time spent in every step to stderr")
+    parser.add_argument("--explain", action="store_true",
+                        help="print the plan of the steps and exit")
+
+    group = parser.add_argument_group("preprocesser flags")
+    for name, default in flags.items():
+        option = name.replace("_", "-")
+        group.add_argument(f"--{option}", dest=name, action="store_true",
+                           default=None,
+                           help=f"enable {name} (default: {default})")
+        group.add_argument(f"--no-{option}", dest=name,
+                           action="store_false", help=argparse.SUPPRESS)
+    return parser
+
+
+def _read_texts(path: str,
+                input_format: Optional[str],
+                text_field: str) -> Iterator[str]:
+    if input_format is None:
+        input_format = "jsonl" if path.endswith(".jsonl") else "lines"
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if input_format == "jsonl":
+                if line.strip():
+                    yield json.loads(line)[text_field]
+            else:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _batched(texts: Iterator[Any], batch_size: int) -> Iterator[List[Any]]:
+    while True:
+        batch = list(islice(texts, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _write(out: IO[str], results: List[Any], text_only: bool) -> None:
+    if text_only:
+        out.write("".join(f"{text}\n" for text in results))
+    else:
+        out.write("".join(json.dumps(features, ensure_ascii=False) + "\n"
+                          for features in results))
+    out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    flags = _flags()
+    parser = _parser(flags)
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        raise SystemExit("--batch-size must be a positive integer")
+
+    from preprocesser.models import PreProcesser, preprocesser_factory
+
+    config: Dict[str, Any] = {name: getattr(args, name) for name in flags
+                              if getattr(args, name) is not None}
+    config["profiling"] = args.stats
+    if args.keep_features:
+        config["keep_features"] = args.keep_features.split(",")
+    if args.lang is None:
+        config.pop("remove_stopwords", None)
+        p = PreProcesser(**config)
+    else:
+        try:
+            factory = preprocesser_factory(args.lang)
+        except ValueError as error:
+            parser.error(str(error))
+        p = factory(config)
+    if args.explain:
+        print(p.explain())
+        return 0
+
+    texts = (text for path in args.inputs
+             for text in _read_texts(path, args.input_format,
+                                     args.text_field))
+
+    executor = None
+    if args.jobs != 1:
+        from preprocesser.features._executor import ParallelExecutor
+        executor = ParallelExecutor(p, njobs=args.jobs)
+        results = executor.imap(texts, text_only=args.text_only)
+    else:
+        preprocess = p.clean if args.text_only else p
+        results = map(preprocess, texts)
+
+    out = (sys.stdout if args.output == "-"
+           else open(args.output, "w", encoding="utf-8"))
+    count = 0
+    t1 = time.perf_counter()
+    try:
+        for batch in _batched(results, args.batch_size):
+            _write(out, batch, args.text_only)
+            count += len(batch)
+    except BrokenPipeError:
+        # The reader stopped, e.g. `| head`. Python would complain again
+        # when flushing stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        if executor is not None:
+            executor.terminate()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t1
+
+    if args.stats:
+        stats = {"texts": count,
+                 "seconds": elapsed,
+                 "texts_per_second": count / elapsed if elapsed else 0.0,
+                 "steps": p.profile.to_dict()}
+        print(json.dumps(stats, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
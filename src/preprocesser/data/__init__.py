@@ -1,3 +1,32 @@
-from ._make_stopwords import make_stopwords
+from ._make_stopwords import make_stopwords, available_languages
+from ._stopwords_registry import StopwordRegistry, stopword_registry
+from importlib import import_module
 
-__all__ = ["make_stopwords"]
+# The dataset pipeline and the corpus reader are only needed by batch
+# jobs
+_LAZY = {"make_dataset": "._make_dataset",
+         "read_chunks": "._make_dataset",
+         "Corpus": "._corpus",
+         "read_range": "._corpus"}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
+
+
+__all__ = ["make_stopwords",
+           "available_languages",
+           "StopwordRegistry",
+           "stopword_registry",
+           "make_dataset",
+           "read_chunks",
+           "Corpus",
+           "read_range"]
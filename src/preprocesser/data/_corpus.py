@@ -0,0 +1,250 @@
+import json
+import mmap
+import os
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ._make_dataset import COMPRESSIONS, FORMATS
+
+INDEX_SUFFIX = ".idx.npy"
+
+# The size and modification time of the file an index was built from,
+# saved next to the index as `<index_path>.json`
+STAT_SUFFIX = ".json"
+
+# Bytes scanned at once when building the index
+BLOCK_SIZE = 64 * 1024 * 1024
+
+
+def _decode(data: bytes,
+            format: str,
+            text_field: str) -> List[str]:
+    """Texts of the newline terminated records in `data`"""
+    lines = data.decode("utf-8").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+    if format == "jsonl":
+        # Blank lines are records too, so their numbers match the index
+        return [json.loads(line)[text_field] if line.strip() else ""
+                for line in lines]
+    return lines
+
+
+def read_range(path: str,
+               start: int,
+               stop: int,
+               format: str = "lines",
+               text_field: str = "text") -> List[str]:
+    """
+    Reads the texts of the records between the byte offsets `start`
+    and `stop` of a corpus file, see `Corpus.byte_ranges`. Workers
+    only receive the path and the offsets and decode their own part.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        return _decode(f.read(stop - start), format, text_field)
+
+
+def build_index(path: str) -> np.ndarray:
+    """
+    Offsets of the first byte of every line of the file at `path`,
+    followed by the size of the file, so line `i` is between
+    `offsets[i]` and `offsets[i + 1]`. They are stored as uint32 when
+    the file is smaller than 4 GB.
+    """
+    size = os.path.getsize(path)
+    dtype = np.uint32 if size < 2 ** 32 else np.uint64
+    parts = [np.zeros(1, dtype=dtype)]
+    if size:
+        with open(path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start in range(0, size, BLOCK_SIZE):
+                # A view of the map, the block is not copied
+                block = np.frombuffer(mm, dtype=np.uint8, offset=start,
+                                      count=min(BLOCK_SIZE, size - start))
+                newlines = np.flatnonzero(block == ord("\n")) + start + 1
+                parts.append(newlines.astype(dtype))
+                # The map cannot be closed while a view is alive
+                del block
+    offsets = np.concatenate(parts)
+    if offsets[-1] != size:
+        # The last line has no newline
+        offsets = np.append(offsets, np.array(size, dtype=dtype))
+    return offsets
+
+
+class Corpus:
+    """
+    A newline delimited corpus file read through a memory map, that
+    may be much larger than the memory.
+
+    The offsets of the lines are indexed once and saved next to the
+    file as a NumPy array, `<path>.idx.npy`, which is memory mapped
+    too and rebuilt when the size or the modification time of the
+    file is not the one recorded with the index. Every line is a record,
+    a text, or a JSON object with the text in `text_field` for
+    `.jsonl` files or with `format="jsonl"`.
+
+    Records are read by number, e.g. `corpus[10]`, `corpus[10:20]` or
+    `corpus.take([3, 1, 2])`, and `byte_ranges` splits the corpus in
+    parts that the workers of a ParallelExecutor read on their own,
+    with `read_range`. ParallelExecutor and `parallel_preprocessing`
+    do it when they are given a Corpus.
+
+    Usage:
+        with Corpus("data/raw/tweets.txt") as corpus:
+            results = parallel_preprocessing(p, corpus, njobs=4)
+            sample = corpus.sample(1000, seed=0)
+    """
+
+    def __init__(self,
+                 path: str,
+                 format: Optional[str] = None,
+                 text_field: str = "text",
+                 index_path: Optional[str] = None,
+                 persist: bool = True):
+        """
+        :path
+            - Newline delimited file, not compressed
+        :format
+            - "lines" or "jsonl", inferred from the extension by default
+        :text_field
+            - Field of the text in jsonl files
+        :index_path
+            - File of the index, `<path>.idx.npy` by default. The stat
+            of the corpus file is saved in `<index_path>.json`.
+        :persist
+            - Save the index to reuse it. It is only kept in memory
+            when False or when it cannot be written.
+        """
+        ext = os.path.splitext(path)[1]
+        if ext in COMPRESSIONS:
+            raise ValueError(f"Compressed corpus '{path}' cannot be "
+                             "memory mapped, decompress it first")
+        if format is None:
+            format = ("jsonl" if FORMATS.get(ext.lower()) == "jsonl"
+                      else "lines")
+        if format not in ("lines", "jsonl"):
+            raise ValueError(f"Unknown format '{format}', expected "
+                             "'lines' or 'jsonl'")
+        self.path = path
+        self.format = format
+        self.text_field = text_field
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.persist = persist
+        self.offsets = self._load_index()
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        if self.size:
+            self._file = open(path, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+
+    @property
+    def size(self) -> int:
+        """Size of the file in bytes"""
+        return int(self.offsets[-1])
+
+    def _load_index(self) -> np.ndarray:
+        stat = os.stat(self.path)
+        source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        stat_path = self.index_path + STAT_SUFFIX
+        try:
+            with open(stat_path, encoding="utf-8") as f:
+                if json.load(f) == source:
+                    offsets = np.load(self.index_path, mmap_mode="r")
+                    if (offsets.ndim == 1 and len(offsets)
+                            and offsets[0] == 0
+                            and offsets[-1] == stat.st_size):
+                        return offsets
+        except (OSError, ValueError):
+            pass
+
+        offsets = build_index(self.path)
+        if self.persist:
+            try:
+                # The index is only trusted once its stat is written
+                if os.path.exists(stat_path):
+                    os.remove(stat_path)
+                with open(self.index_path + ".tmp", "wb") as f:
+                    np.save(f, offsets)
+                os.replace(self.index_path + ".tmp", self.index_path)
+                with open(stat_path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(source, f)
+                os.replace(stat_path + ".tmp", stat_path)
+            except OSError:
+                pass
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _read(self, start: int, stop: int) -> List[str]:
+        if start >= stop or self._mm is None:
+            return []
+        if self._mm.closed:
+            raise ValueError("Corpus is closed")
+        data = self._mm[int(self.offsets[start]):int(self.offsets[stop])]
+        return _decode(data, self.format, self.text_field)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return self.take(range(start, stop, step))
+            return self._read(start, stop)
+        i = int(item)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Corpus index out of range")
+        return self._read(i, i + 1)[0]
+
+    def take(self, indices: Sequence[int]) -> List[str]:
+        """Texts of the records `indices`, in the same order"""
+        return [self[i] for i in indices]
+
+    def sample(self, n: int, seed: Optional[int] = None) -> List[str]:
+        """Texts of `n` distinct records picked at random"""
+        rng = np.random.default_rng(seed)
+        return self.take(rng.choice(len(self), size=min(n, len(self)),
+                                    replace=False))
+
+    def byte_ranges(self, chunksize: int) -> List[Tuple[int, int, int]]:
+        """
+        Splits the corpus in parts of at most `chunksize` records and
+        returns the number of records and the byte offsets of every
+        part, `(records, start, stop)`, see `read_range`.
+        """
+        if chunksize < 1:
+            raise ValueError("chunksize must be a positive integer")
+        bounds = list(range(0, len(self), chunksize)) + [len(self)]
+        return [(stop - start, int(self.offsets[start]),
+                 int(self.offsets[stop]))
+                for start, stop in zip(bounds, bounds[1:])]
+
+    def __iter__(self) -> Iterator[str]:
+        # Decoded in blocks, the whole corpus is never held in memory
+        for start in range(0, len(self), 10000):
+            yield from self._read(start, min(start + 10000, len(self)))
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+
+    def __enter__(self) -> "Corpus":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __reduce__(self):
+        # The memory map is opened again from the saved index
+        return type(self), (self.path, self.format, self.text_field,
+                            self.index_path, self.persist)
+
+    def __repr__(self) -> str:
+        return f"Corpus({self.path!r}, {len(self)} records)"
@@ -0,0 +1,324 @@
+import glob
+import io
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {".csv": "csv",
+           ".tsv": "tsv",
+           ".jsonl": "jsonl",
+           ".ndjson": "jsonl",
+           ".json": "jsonl",
+           ".parquet": "parquet",
+           ".pq": "parquet"}
+
+COMPRESSIONS = (".gz", ".bz2", ".zip", ".xz", ".zst")
+
+CHECKPOINT = "_checkpoint.json"
+
+
+def infer_format(path: str) -> str:
+    """Format of a dataset file from its extension, e.g. `tweets.csv.gz`"""
+    root, ext = os.path.splitext(path)
+    if ext in COMPRESSIONS:
+        root, ext = os.path.splitext(root)
+    try:
+        return FORMATS[ext.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown format of '{path}', expected one of "
+                         f"{sorted(set(FORMATS.values()))}") from None
+
+
+def _open_text(path: str) -> TextIO:
+    """Opens a text file, decompressed by its extension like pandas"""
+    ext = os.path.splitext(path)[1]
+    if ext == ".gz":
+        import gzip
+        return gzip.open(path, "rt", encoding="utf-8")
+    if ext == ".bz2":
+        import bz2
+        return bz2.open(path, "rt", encoding="utf-8")
+    if ext == ".xz":
+        import lzma
+        return lzma.open(path, "rt", encoding="utf-8")
+    if ext == ".zip":
+        import zipfile
+        with zipfile.ZipFile(path) as archive:
+            name, = archive.namelist()
+            return io.TextIOWrapper(archive.open(name), encoding="utf-8")
+    if ext == ".zst":
+        import zstandard
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _rebatch(batches: Iterable[Any], batch_size: int, offset: int):
+    """Tables of `batch_size` rows of `batches`, without the first `offset`"""
+    import pyarrow as pa
+
+    pending: List[Any] = []
+    size = 0
+    for batch in batches:
+        if offset:
+            cut = min(offset, len(batch))
+            batch = batch.slice(cut)
+            offset -= cut
+        pending.append(batch)
+        size += len(batch)
+        while size >= batch_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, batch_size)
+            pending = table.slice(batch_size).to_batches()
+            size -= batch_size
+    if size:
+        yield pa.Table.from_batches(pending)
+
+
+def read_chunks(path: str,
+                batch_size: int,
+                columns: Optional[List[str]] = None,
+                format: Optional[str] = None,
+                skip: int = 0) -> Iterator[Any]:
+    """
+    Reads a CSV, JSONL or Parquet file in DataFrames of at most
+    `batch_size` rows, so the whole file is never held in memory.
+
+    Every chunk but the last is read from `batch_size` records of the
+    file. Blank lines of CSV files are rows with empty values, except
+    at the end of the file, so the rows always line up with the
+    records of the file. The records of the first `skip` chunks are
+    passed over without being parsed.
+    """
+    import numpy as np
+    import pandas as pd
+
+    format = format or infer_format(path)
+    records = skip * batch_size
+    if format in ("csv", "tsv"):
+        # Blank lines are counted by `skiprows`, so they are read as
+        # empty rows to keep the chunks on the same records
+        last = None
+        for df in pd.read_csv(path, chunksize=batch_size, usecols=columns,
+                              sep="\t" if format == "tsv" else ",",
+                              skiprows=range(1, records + 1),
+                              skip_blank_lines=False):
+            if last is not None:
+                yield last
+            last = df
+        if last is not None:
+            # Except the blank lines at the end of the file. Skipping
+            # past the end leaves a single empty chunk too.
+            filled = np.flatnonzero(last.notna().any(axis=1).to_numpy())
+            if len(filled):
+                yield last.iloc[:filled[-1] + 1]
+    elif format == "jsonl":
+        with _open_text(path) as f:
+            for _ in itertools.islice(f, records):
+                pass
+            for df in pd.read_json(f, lines=True, chunksize=batch_size):
+                yield df[columns] if columns is not None else df
+    elif format == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        first = 0
+        while (first < parquet.num_row_groups and records
+               >= parquet.metadata.row_group(first).num_rows):
+            records -= parquet.metadata.row_group(first).num_rows
+            first += 1
+        batches = parquet.iter_batches(
+            batch_size=batch_size, columns=columns,
+            row_groups=range(first, parquet.num_row_groups))
+        if records:
+            batches = _rebatch(batches, batch_size, records)
+        for batch in batches:
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown format '{format}'")
+
+
+def _read_checkpoint(output_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(output_path, CHECKPOINT)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_checkpoint(output_path: str, checkpoint: Dict[str, Any]) -> None:
+    path = os.path.join(output_path, CHECKPOINT)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _part_path(output_path: str, part: int) -> str:
+    return os.path.join(output_path, f"part-{part:05d}.parquet")
+
+
+def _remove_parts(output_path: str,
+                  checkpoint: Optional[Dict[str, Any]]) -> None:
+    """
+    Removes the parts recorded in `checkpoint`, and the one that was
+    being written. Any other part belongs to something else, so they
+    are left alone and nothing is removed.
+    """
+    parts = checkpoint["parts"] if checkpoint is not None else 0
+    recorded = {path for part in range(parts)
+                for path in (_part_path(output_path, part),
+                             _part_path(output_path, part) + ".tmp")}
+    recorded.add(_part_path(output_path, parts) + ".tmp")
+    if checkpoint is not None:
+        # Written before the checkpoint was updated
+        recorded.add(_part_path(output_path, parts))
+    found = set(glob.glob(os.path.join(output_path, "part-*.parquet*")))
+    if found - recorded:
+        raise ValueError(f"'{output_path}' has parts that no checkpoint "
+                         "records, remove them or use another directory")
+    for path in found:
+        os.remove(path)
+    if os.path.exists(os.path.join(output_path, CHECKPOINT)):
+        os.remove(os.path.join(output_path, CHECKPOINT))
+
+
+def make_dataset(p,
+                 input_path: str,
+                 output_path: str,
+                 text_column: str = "text",
+                 keep_columns: Optional[List[str]] = None,
+                 batch_size: int = 10000,
+                 njobs: int = 1,
+                 text_only: bool = False,
+                 format: Optional[str] = None,
+                 resume: bool = True,
+                 executor=None) -> Dict[str, Any]:
+    """
+    Preprocess a dataset file that may not fit in memory, e.g. from
+    `data/raw` to `data/processed`.
+
+    The input is read in chunks of `batch_size` rows and every chunk is
+    written as a Parquet file `part-XXXXX.parquet` with a single row
+    group inside the `output_path` directory, which can be read back as
+    one dataset with `pandas.read_parquet(output_path)`. The parts done
+    are recorded in a checkpoint, so when a run stops it resumes after
+    the last part written instead of starting over, skipping the
+    records of the parts done without parsing them, see `read_chunks`.
+
+    :p
+        - Preprocesser class
+    :input_path
+        - CSV, JSONL or Parquet file, optionally compressed
+    :output_path
+        - Directory of the Parquet parts
+    :text_column
+        - Column with the texts to preprocess
+    :keep_columns
+        - Columns of the input copied to the output, e.g. ids
+    :batch_size
+        - Number of rows of every part
+    :njobs
+        - Number of processes, see `parallel_preprocessing`
+    :text_only
+        - Write only the pped texts instead of the features
+    :format
+        - Format of the input, inferred from the extension by default
+    :resume
+        - Continue a previous run. Otherwise the parts of the previous
+        run are removed. Parts that no checkpoint of `output_path`
+        records are never removed, the run fails instead.
+    :executor
+        - A running ParallelExecutor to reuse its workers
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from preprocesser.features import ParallelExecutor
+    from preprocesser.models._cache import fingerprint
+    from preprocesser.models._columnar import ColumnarBuilder
+
+    keep_columns = list(keep_columns or [])
+    stat = os.stat(input_path)
+    run = {"input": os.path.abspath(input_path),
+           "input_size": stat.st_size,
+           "input_mtime": stat.st_mtime,
+           "text_column": text_column,
+           "keep_columns": keep_columns,
+           "batch_size": batch_size,
+           "config": fingerprint((p._config(), text_only)).hex()}
+
+    checkpoint = _read_checkpoint(output_path)
+    if resume and checkpoint is not None:
+        if {key: checkpoint.get(key) for key in run} != run:
+            raise ValueError(f"The checkpoint in '{output_path}' belongs to "
+                             "a different run, use resume=False to start "
+                             "over")
+    else:
+        _remove_parts(output_path, checkpoint)
+        checkpoint = None
+    os.makedirs(output_path, exist_ok=True)
+    checkpoint = checkpoint or {**run, "parts": 0, "rows": 0}
+    done = checkpoint["parts"]
+    if done:
+        logger.info("Resuming after {} parts ({} rows)".format(
+            done, checkpoint["rows"]))
+
+    own_executor = executor is None and njobs != 1
+    if own_executor:
+        executor = ParallelExecutor(p, njobs=njobs)
+
+    t1 = time.time()
+    try:
+        columns = list(dict.fromkeys([text_column] + keep_columns))
+        chunks = read_chunks(input_path, batch_size, columns=columns,
+                             format=format, skip=done)
+        for part, df in enumerate(chunks, done):
+            texts = df[text_column].fillna("").astype(str).tolist()
+            if executor is None:
+                if text_only:
+                    results = [p.clean(text) for text in texts]
+                else:
+                    table = p.transform_batch(texts).to_arrow()
+            else:
+                results = executor.map(texts, text_only=text_only)
+                if not text_only:
+                    builder = ColumnarBuilder(p._feature_keys,
+                                              p._empty_features)
+                    builder.extend(results)
+                    table = builder.build().to_arrow()
+            if text_only:
+                table = pa.table({"text": pa.array(results,
+                                                   pa.large_string())})
+
+            output = {name: pa.Array.from_pandas(df[name])
+                      for name in keep_columns}
+            for name in table.column_names:
+                if name in output:
+                    raise ValueError(f"Column '{name}' is also a feature")
+                output[name] = table.column(name)
+
+            path = _part_path(output_path, part)
+            pq.write_table(pa.table(output), path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+            checkpoint["parts"] = part + 1
+            checkpoint["rows"] += len(df)
+            _write_checkpoint(output_path, checkpoint)
+            logger.info("Part {} done, {} rows".format(part,
+                                                       checkpoint["rows"]))
+    except BaseException:
+        if own_executor:
+            executor.terminate()
+        raise
+    if own_executor:
+        executor.close()
+
+    logger.info("Time consumed making the dataset: " +
+                "{0:.2f}s".format(round(time.time() - t1, 2)))
+    return {"output": output_path,
+            "parts": checkpoint["parts"],
+            "rows": checkpoint["rows"],
+            "resumed_parts": done}
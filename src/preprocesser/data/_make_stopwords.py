@@ -1,10 +1,33 @@
-from typing import Set
+from typing import Set, Dict
 import json
+from functools import lru_cache
 from os.path import join
-import pkg_resources
 
 from preprocesser import __name__
 
+STOP_WORDS_URI = join('data', 'stop-words')
+
+
+def _read_data_file(name: str) -> str:
+    """Reads a file of the stopwords directory bundled in the package"""
+    from importlib.resources import files
+
+    return (files(__name__) / "data" / "stop-words" / name) \
+        .read_text(encoding="utf-8")
+
+
+@lru_cache(maxsize=None)
+def available_languages() -> Dict[str, str]:
+    """
+    function that loads the mapping between language
+    codes and stopwords files. It is read only once
+    per process.
+    """
+
+    all_langs = json.loads(_read_data_file("languages.json"))
+
+    return all_langs
+
 
 def make_stopwords(lang: str) -> Set[str]:
     """
@@ -12,18 +35,9 @@ def make_stopwords(lang: str) -> Set[str]:
     language in the form of a set.
     """
 
-    stop_words_uri = join('data', 'stop-words')
-    data_path = pkg_resources \
-        .resource_filename(__name__, f"{stop_words_uri}/languages.json")
-
-    with open(data_path) as f:
-        all_langs = json.load(f)
-
-    stopwords_file_path = pkg_resources \
-        .resource_filename(__name__, f'{stop_words_uri}/{all_langs[lang]}.txt')
+    all_langs = available_languages()
 
-    with open(stopwords_file_path) as f:
-        stopwords = f.readlines()
+    stopwords = _read_data_file(f"{all_langs[lang]}.txt").splitlines()
 
     stopwords = set([line.strip() for line in stopwords])
 
@@ -0,0 +1,91 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from collections import OrderedDict
+import threading
+
+from ._make_stopwords import available_languages, make_stopwords
+
+
+class StopwordRegistry:
+    """
+    Process-wide store of stopwords sets.
+
+    Every language is read from disk only once and kept in memory as
+    a frozenset, so preprocessors can share the same set without
+    copying it. When `max_languages` is set the least recently used
+    languages are evicted, except the ones pinned with `preload`.
+    """
+
+    def __init__(self, max_languages: Optional[int] = None):
+        self.max_languages = max_languages
+        self.hits = 0
+        self.misses = 0
+        self._sets: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, lang: str) -> FrozenSet[str]:
+        """Returns the stopwords of `lang`, loading them on the first use"""
+        with self._lock:
+            stopwords = self._sets.get(lang)
+            if stopwords is not None:
+                self.hits += 1
+                self._sets.move_to_end(lang)
+                return stopwords
+            return self._load(lang)
+
+    def _load(self, lang: str) -> FrozenSet[str]:
+        # Called with the lock held
+        self.misses += 1
+        stopwords = frozenset(make_stopwords(lang))
+        self._sets[lang] = stopwords
+        self._evict_overflow()
+        return stopwords
+
+    def preload(self,
+                langs: Optional[Iterable[str]] = None,
+                pin: bool = True) -> List[str]:
+        """
+        Warms up the registry with the given languages, all the
+        bundled ones by default. Pinned languages are never evicted
+        automatically.
+        """
+        langs = list(available_languages() if langs is None else langs)
+        for lang in langs:
+            with self._lock:
+                if pin:
+                    self._pinned.add(lang)
+                if lang not in self._sets:
+                    self._load(lang)
+        return langs
+
+    def evict(self, lang: Optional[str] = None) -> None:
+        """Drops `lang` from memory, or every language when it is None"""
+        with self._lock:
+            if lang is None:
+                self._sets.clear()
+                self._pinned.clear()
+            else:
+                self._sets.pop(lang, None)
+                self._pinned.discard(lang)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "languages": len(self._sets)}
+
+    def _evict_overflow(self) -> None:
+        if self.max_languages is None:
+            return
+        candidates = [lang for lang in self._sets
+                      if lang not in self._pinned]
+        while len(self._sets) > self.max_languages and len(candidates) > 1:
+            del self._sets[candidates.pop(0)]
+
+    def __contains__(self, lang: str) -> bool:
+        return lang in self._sets
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+
+stopword_registry = StopwordRegistry()
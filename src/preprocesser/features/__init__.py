@@ -1,5 +1,30 @@
-from ._pipe import sequential_preprocessing, parallel_preprocessing
+from importlib import import_module
+
+# The pipe functions need pandas, which is slow to import and not
+# needed by the executor, so every name is imported on first access
+_LAZY = {"sequential_preprocessing": "._pipe",
+         "parallel_preprocessing": "._pipe",
+         "stream_preprocessing": "._stream",
+         "vectorized_preprocessing": "._vectorized",
+         "ParallelExecutor": "._executor",
+         "AsyncPreProcesser": "._async"}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
 
 
 __all__ = ["sequential_preprocessing",
-           "parallel_preprocessing"]
+           "parallel_preprocessing",
+           "stream_preprocessing",
+           "vectorized_preprocessing",
+           "ParallelExecutor",
+           "AsyncPreProcesser"]
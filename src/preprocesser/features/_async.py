@@ -0,0 +1,322 @@
+import asyncio
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from preprocesser.models import PreProcesser
+from preprocesser.models._cache import MISSING
+
+from ._executor import _init_worker, _preprocess_chunk, n_processes
+
+EXECUTORS = ("thread", "process")
+
+# Stops the batching task
+_CLOSE = object()
+
+
+def _preprocess_batch(p: PreProcesser,
+                      texts: List[str],
+                      text_only: bool) -> List[Any]:
+    # The cache is looked up by the event loop before batching
+    preprocess = p._clean if text_only else p._extract
+    return [preprocess(text) for text in texts]
+
+
+class AsyncPreProcesser:
+    """
+    Asyncio facade of a PreProcesser, so the event loop of a consumer
+    or an HTTP server is never blocked preprocessing long texts.
+
+    Concurrent requests of single texts are gathered in micro-batches
+    of at most `max_batch_size` texts, waiting at most `max_latency`
+    seconds after the first one, and every batch runs in a pool of
+    `njobs` threads (`executor="thread"`) or processes
+    (`executor="process"`). Threads are cheap to start but share the
+    GIL, processes preprocess in parallel but the texts and results
+    are pickled. At most `max_in_flight` batches run at once and at
+    most `max_queued` texts wait to be batched, beyond that callers
+    wait, so a burst of requests can not exhaust the memory.
+
+    Cached results are returned without being batched when `p` has a
+    `cache`. A cache with a `path` is read and written in the default
+    executor of the loop, so the loop never waits for the disk. When
+    `p` was built with `profiling=True` the stats of the workers are
+    merged into `p.profile`.
+
+    Usage:
+        async with AsyncPreProcesser(EN_PreProcesser()) as ap:
+            features = await ap("Hola @user #tag")
+            texts = await ap.map(batch, text_only=True)
+    """
+
+    def __init__(self,
+                 p: PreProcesser,
+                 executor: str = "thread",
+                 njobs: int = 1,
+                 max_batch_size: int = 64,
+                 max_latency: float = 0.005,
+                 max_in_flight: Optional[int] = None,
+                 max_queued: Optional[int] = None):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one "
+                             f"of {list(EXECUTORS)}")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be a positive integer")
+        self.p = p
+        self.executor = executor
+        self.processes = (n_processes(njobs) if executor == "process"
+                          else max(njobs, 1))
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_in_flight = max_in_flight or 2 * self.processes
+        self.max_queued = max_queued or 4 * max_batch_size
+        self.requests = 0
+        self.batches = 0
+        self._pool: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+
+    async def __call__(self, text: str) -> Any:
+        return await self.preprocess(text)
+
+    async def preprocess(self,
+                         text: str,
+                         text_only: bool = False) -> Any:
+        """
+        Preprocesses a single text, batched with the concurrent
+        requests. With `text_only` only the pped text is returned.
+        """
+        text_only = bool(text_only or self.p.text_only)
+        keys = self._keys([text], text_only)
+        if keys is not None:
+            value, = await self._on_cache(self._get_cached, keys)
+            if value is not MISSING:
+                return value
+
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, text_only, future))
+        value = await future
+        if keys is not None:
+            await self._on_cache(self._put_cached, keys, [value])
+        return value
+
+    async def clean(self, text: str) -> str:
+        return await self.preprocess(text, text_only=True)
+
+    async def map(self,
+                  texts: Iterable[str],
+                  text_only: bool = False) -> List[Any]:
+        """
+        Preprocesses a batch of texts and returns the results in order.
+        The batch is split in chunks of `max_batch_size` texts that
+        are not merged with other requests.
+        """
+        text_only = bool(text_only or self.p.text_only)
+        texts = list(texts)
+        keys = self._keys(texts, text_only)
+        results = ([MISSING] * len(texts) if keys is None
+                   else await self._on_cache(self._get_cached, keys))
+        misses = [i for i, value in enumerate(results) if value is MISSING]
+
+        self._start()
+        chunks = [misses[i:i + self.max_batch_size]
+                  for i in range(0, len(misses), self.max_batch_size)]
+
+        async def run(chunk):
+            async with self._slots:
+                self._count(len(chunk))
+                return await self._run([texts[i] for i in chunk],
+                                       text_only)
+
+        for chunk, values in zip(chunks, await asyncio.gather(
+                *(run(chunk) for chunk in chunks))):
+            for i, value in zip(chunk, values):
+                results[i] = value
+        if keys is not None and misses:
+            await self._on_cache(self._put_cached,
+                                 [keys[i] for i in misses],
+                                 [results[i] for i in misses])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": (self.requests / self.batches
+                                    if self.batches else 0.0),
+                "queued": self._queue.qsize() if self._queue else 0,
+                "in_flight": len(self._tasks)}
+
+    async def aclose(self) -> None:
+        """Preprocesses the pending requests and stops the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._batcher is not None:
+            await self._queue.put((None, False, _CLOSE))
+            await self._batcher
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._pool.shutdown)
+            self._pool = None
+
+    async def __aenter__(self) -> "AsyncPreProcesser":
+        self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    def _keys(self,
+              texts: List[str],
+              text_only: bool) -> Optional[List[bytes]]:
+        """Keys of `texts` in the cache, None without a cache"""
+        cache = self.p.cache
+        if cache is None:
+            return None
+        fingerprint = (self.p._clean_fingerprint if text_only
+                       else self.p._fingerprint)
+        return [cache.key(text, fingerprint) for text in texts]
+
+    async def _on_cache(self, func: Callable[..., Any], *args) -> Any:
+        # A cache on disk is only used outside the event loop
+        if self.p.cache.path is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, func, *args)
+
+    def _get_cached(self, keys: List[bytes]) -> List[Any]:
+        return [self.p.cache.get(key) for key in keys]
+
+    def _put_cached(self, keys: List[bytes], values: List[Any]) -> None:
+        for key, value in zip(keys, values):
+            self.p.cache.put(key, value)
+
+    def _start(self) -> None:
+        if self._closed:
+            raise ValueError("AsyncPreProcesser is closed")
+        if self._batcher is not None:
+            return
+        if self.executor == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                             initializer=_init_worker,
+                                             initargs=(self.p,))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.processes)
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._batcher = asyncio.get_running_loop().create_task(
+            self._batch_requests())
+
+    def _count(self, requests: int) -> None:
+        # Only the first run of a batch is counted, not its retries
+        self.requests += requests
+        self.batches += 1
+
+    async def _run(self, texts: List[str], text_only: bool) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        if self.executor == "thread":
+            return await loop.run_in_executor(
+                self._pool, _preprocess_batch, self.p, texts, text_only)
+
+        _, results, stats = await loop.run_in_executor(
+            self._pool, _preprocess_chunk, texts, text_only)
+        if stats is not None:
+            self.p.profile.merge(stats)
+        return results
+
+    async def _batch_requests(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request = await self._queue.get()
+            if request[2] is _CLOSE:
+                return
+            # Waiting for a free slot before gathering the batch lets
+            # the batches grow under load
+            await self._slots.acquire()
+            batch = [request]
+            deadline = loop.time() + self.max_latency
+            closing = False
+            while len(batch) < self.max_batch_size:
+                request = await self._get(deadline - loop.time())
+                if request is None:
+                    break
+                if request[2] is _CLOSE:
+                    closing = True
+                    break
+                batch.append(request)
+
+            task = loop.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            if closing:
+                return
+
+    async def _get(self, timeout: float) -> Optional[Tuple[str, bool, Any]]:
+        """Next request in the queue, None if none comes in `timeout`"""
+        if timeout <= 0 or not self._queue.empty():
+            try:
+                return self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return None
+        # Not `wait_for`, which can lose a request that arrives just
+        # when the timeout cancels the `get`
+        getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait((getter,), timeout=timeout)
+        if not done:
+            getter.cancel()
+            try:
+                return await getter
+            except asyncio.CancelledError:
+                return None
+        return getter.result()
+
+    async def _run_batch(self, batch: List[Tuple[str, bool, Any]]) -> None:
+        try:
+            for text_only in (False, True):
+                requests = [request for request in batch
+                            if request[1] is text_only]
+                if not requests:
+                    continue
+                self._count(len(requests))
+                try:
+                    results = await self._run(
+                        [text for text, _, _ in requests], text_only)
+                except Exception as e:
+                    if len(requests) == 1:
+                        self._resolve(requests[0][2], exception=e)
+                        continue
+                    # The requests batched together are independent,
+                    # only the ones that fail alone get the exception
+                    for text, _, future in requests:
+                        try:
+                            result, = await self._run([text], text_only)
+                        except Exception as e:
+                            self._resolve(future, exception=e)
+                        else:
+                            self._resolve(future, result)
+                    continue
+                for (_, _, future), result in zip(requests, results):
+                    self._resolve(future, result)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future,
+                 result: Any = None,
+                 exception: Optional[BaseException] = None) -> None:
+        # The caller may have been cancelled meanwhile
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def __getstate__(self):
+        raise TypeError("AsyncPreProcesser cannot be pickled")
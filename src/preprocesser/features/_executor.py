@@ -0,0 +1,387 @@
+import sys
+import time
+import queue
+import threading
+import multiprocessing as mp
+from collections import deque
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+from preprocesser.models import PreProcesser
+from preprocesser.models._cache import MISSING
+
+# Preprocesser of the current worker, set once by the pool initializer
+_worker_preprocesser: Optional[PreProcesser] = None
+
+
+def _init_worker(p: PreProcesser) -> None:
+    global _worker_preprocesser
+    _worker_preprocesser = p
+    # The stats recorded so far belong to the parent process
+    if p.profile is not None:
+        p.profile.reset()
+    # The cache is looked up by the parent process before sending the
+    # texts, see `ParallelExecutor.imap`
+    p.cache = None
+
+
+def _preprocess_chunk(texts: List[str],
+                      text_only: bool = False
+                      ) -> Tuple[float, List[Any], Optional[Dict]]:
+    t1 = time.perf_counter()
+    p = (_worker_preprocesser.clean if text_only
+         else _worker_preprocesser)
+    results = [p(text) for text in texts]
+    elapsed = time.perf_counter() - t1
+    profile = _worker_preprocesser.profile
+    return elapsed, results, (profile.pop() if profile is not None
+                              else None)
+
+
+def _preprocess_range(path: str,
+                      start: int,
+                      stop: int,
+                      format: str,
+                      text_field: str,
+                      text_only: bool = False
+                      ) -> Tuple[float, List[Any], Optional[Dict]]:
+    from preprocesser.data._corpus import read_range
+
+    return _preprocess_chunk(read_range(path, start, stop, format,
+                                        text_field), text_only)
+
+
+def _is_corpus(texts: Any) -> bool:
+    # Only a loaded reader module can have built a Corpus, so numpy is
+    # not imported for the other inputs
+    module = sys.modules.get("preprocesser.data._corpus")
+    return module is not None and isinstance(texts, module.Corpus)
+
+
+def _preprocess_shared(name: str,
+                       start: int,
+                       stop: int,
+                       text_only: bool = False
+                       ) -> Tuple[float, Tuple[str, Any], Optional[Dict]]:
+    from ._shared import read_texts, write_results
+
+    t1 = time.perf_counter()
+    texts = read_texts(name, start, stop)
+    p = _worker_preprocesser
+    if text_only or p.text_only:
+        results = [p.clean(text) for text in texts]
+    else:
+        results = p.transform_batch(texts)
+    descriptor = write_results(results)
+    elapsed = time.perf_counter() - t1
+    return elapsed, descriptor, (p.profile.pop() if p.profile is not None
+                                 else None)
+
+
+def n_processes(njobs: int = -1) -> int:
+    """
+    Number of processes to use for `njobs`. -1 means all the
+    available CPUs and it never goes beyond them.
+    """
+    processes = mp.cpu_count() if njobs == -1 else njobs
+    return min(max(processes, 1), mp.cpu_count())
+
+
+class ParallelExecutor:
+    """
+    Long-lived pool of workers that preprocess texts in parallel.
+
+    The preprocesser is sent to every worker only once, when the pool
+    starts, and the texts are dispatched in chunks. Unless `chunksize`
+    is fixed, the size of the chunks adapts so that every chunk takes
+    about `target_chunk_time` seconds of work, which keeps the
+    overhead of the inter-process communication low without starving
+    the workers at the end of a batch. At most `max_pending` chunks
+    are in flight, so the input is only read as fast as the workers
+    consume it. When `p` was built with `profiling=True` the stats of
+    the workers are merged into `p.profile`. When it has a `cache`,
+    only the texts that are not cached are sent to the workers.
+
+    With `shared_memory=True`, `map` copies the texts once into a
+    shared memory segment and the workers read their ranges from it,
+    while the results come back in segments written by the workers,
+    as columns instead of one dictionary per text. Only the names of
+    the segments are pickled, which saves most of the serialization
+    of large batches.
+
+    Usage:
+        with ParallelExecutor(EN_PreProcesser(), njobs=4) as executor:
+            for batch in batches:
+                results = executor.map(batch)
+    """
+
+    def __init__(self,
+                 p: PreProcesser,
+                 njobs: int = -1,
+                 chunksize: Optional[int] = None,
+                 target_chunk_time: float = 0.05,
+                 max_chunksize: int = 4096,
+                 max_pending: Optional[int] = None,
+                 shared_memory: bool = False):
+        self.p = p
+        self.processes = n_processes(njobs)
+        self.chunksize = chunksize
+        self.target_chunk_time = target_chunk_time
+        self.max_chunksize = max_chunksize
+        self.max_pending = max_pending or 2 * self.processes
+        self._adaptive_chunksize = chunksize or 32
+        self.shared_memory = shared_memory
+        self._lock = threading.Lock()
+        if shared_memory:
+            # The workers must share the resource tracker of this
+            # process, otherwise every one of them would unlink the
+            # segments it attached to when it exits
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+        self._pool = mp.Pool(processes=self.processes,
+                             initializer=_init_worker,
+                             initargs=(p,))
+
+    def map(self,
+            texts: Iterable[str],
+            chunksize: Optional[int] = None,
+            text_only: bool = False) -> List[Any]:
+        """Preprocesses `texts` and returns the results in order"""
+        if not self.shared_memory or (_is_corpus(texts)
+                                      and self.p.cache is None):
+            return list(self.imap(texts, chunksize=chunksize,
+                                  text_only=text_only))
+        if self._pool is None:
+            raise ValueError("ParallelExecutor is closed")
+
+        def run(texts: Iterable[str]) -> List[Any]:
+            return self._map_shared(list(texts), chunksize, text_only)
+
+        if self.p.cache is not None:
+            return list(self._imap_cached(texts, chunksize, text_only, run))
+        return run(texts)
+
+    def imap(self,
+             texts: Iterable[str],
+             ordered: bool = True,
+             chunksize: Optional[int] = None,
+             text_only: bool = False) -> Iterator[Any]:
+        """
+        Preprocesses `texts` lazily, yielding every result as soon as
+        its chunk is done. With `ordered=False` the chunks are yielded
+        in the order they finish. With `text_only` only the pped texts
+        are returned, see `PreProcesser.clean`. When the preprocesser
+        has a cache the results are always yielded in order.
+
+        When `texts` is a Corpus, the workers read and decode the byte
+        ranges of their chunks from the file, so the texts are never
+        sent to them, unless the preprocesser has a cache.
+        """
+        if self._pool is None:
+            raise ValueError("ParallelExecutor is closed")
+
+        if self.p.cache is not None:
+            return self._imap_cached(texts, chunksize, text_only)
+        if _is_corpus(texts):
+            return self._imap_corpus(texts, ordered, chunksize, text_only)
+        return self._imap(texts, ordered, chunksize, text_only)
+
+    def _map_shared(self,
+                    texts: List[str],
+                    chunksize: Optional[int],
+                    text_only: bool) -> List[Any]:
+        from ._shared import discard_results, pack_texts, read_results
+
+        if not texts:
+            return []
+        chunksize = (chunksize or self.chunksize or
+                     self._static_chunksize(len(texts)))
+        ranges = deque((start, min(start + chunksize, len(texts)))
+                       for start in range(0, len(texts), chunksize))
+        results: List[Any] = []
+        pending: deque = deque()
+        shm = pack_texts(texts)
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < self.max_pending:
+                    start, stop = ranges.popleft()
+                    pending.append(self._pool.apply_async(
+                        _preprocess_shared,
+                        (shm.name, start, stop, text_only)))
+                _, (name, layout), stats = pending.popleft().get()
+                results.extend(read_results(name, layout))
+                if stats is not None:
+                    self.p.profile.merge(stats)
+        except BaseException:
+            # The segments written by the chunks still running
+            for async_result in pending:
+                try:
+                    discard_results(async_result.get()[1][0])
+                except Exception:
+                    pass
+            raise
+        finally:
+            shm.close()
+            shm.unlink()
+        return results
+
+    def _imap(self,
+              texts: Iterable[str],
+              ordered: bool,
+              chunksize: Optional[int],
+              text_only: bool) -> Iterator[Any]:
+
+        chunksize = chunksize or self.chunksize
+        if chunksize is None and isinstance(texts, Sequence):
+            chunksize = self._static_chunksize(len(texts))
+
+        tasks = ((_preprocess_chunk, (chunk, text_only))
+                 for chunk in self._chunks(texts, chunksize))
+        return self._dispatch(tasks, ordered, chunksize)
+
+    def _imap_corpus(self,
+                     corpus: Any,
+                     ordered: bool,
+                     chunksize: Optional[int],
+                     text_only: bool) -> Iterator[Any]:
+        chunksize = (chunksize or self.chunksize or
+                     self._static_chunksize(len(corpus)))
+        tasks = ((_preprocess_range, (corpus.path, start, stop,
+                                      corpus.format, corpus.text_field,
+                                      text_only))
+                 for _, start, stop in corpus.byte_ranges(chunksize))
+        return self._dispatch(tasks, ordered, chunksize)
+
+    def _dispatch(self,
+                  tasks: Iterator[Tuple[Callable, Tuple]],
+                  ordered: bool,
+                  chunksize: Optional[int]) -> Iterator[Any]:
+        pending: deque = deque()
+        done: queue.SimpleQueue = queue.SimpleQueue()
+
+        for func, args in tasks:
+            if ordered:
+                pending.append(self._pool.apply_async(func, args))
+            else:
+                pending.append(None)
+                self._pool.apply_async(func, args, callback=done.put,
+                                       error_callback=done.put)
+            if len(pending) >= self.max_pending:
+                yield from self._next_chunk(pending, done, chunksize)
+
+        while pending:
+            yield from self._next_chunk(pending, done, chunksize)
+
+    def _imap_cached(self,
+                     texts: Iterable[str],
+                     chunksize: Optional[int],
+                     text_only: bool,
+                     run: Optional[Callable[[Iterable[str]],
+                                            Iterable[Any]]] = None
+                     ) -> Iterator[Any]:
+        cache = self.p.cache
+        fingerprint = (self.p._clean_fingerprint if text_only or
+                       self.p.text_only else self.p._fingerprint)
+        if chunksize is None and isinstance(texts, Sequence):
+            chunksize = self._static_chunksize(len(texts))
+
+        # Cached results, or the keys of the texts sent to the workers,
+        # in the order of `texts`
+        slots: deque = deque()
+
+        def misses() -> Iterator[str]:
+            for text in texts:
+                key = cache.key(text, fingerprint)
+                value = cache.get(key)
+                slots.append((key, value))
+                if value is MISSING:
+                    yield text
+
+        if run is None:
+            results = self._imap(misses(), True, chunksize, text_only)
+        else:
+            results = run(misses())
+        for result in results:
+            while slots[0][1] is not MISSING:
+                yield slots.popleft()[1]
+            key, _ = slots.popleft()
+            cache.put(key, result)
+            yield result
+        while slots:
+            yield slots.popleft()[1]
+
+    def close(self) -> None:
+        """Waits for the pending work and stops the workers"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self) -> None:
+        """Stops the workers without waiting for the pending work"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _next_chunk(self,
+                    pending: deque,
+                    done: queue.SimpleQueue,
+                    chunksize: Optional[int]) -> List[Any]:
+        async_result = pending.popleft()
+        if async_result is not None:
+            elapsed, results, stats = async_result.get()
+        else:
+            outcome = done.get()
+            if isinstance(outcome, BaseException):
+                raise outcome
+            elapsed, results, stats = outcome
+
+        if stats is not None:
+            self.p.profile.merge(stats)
+
+        if chunksize is None:
+            self._adapt(elapsed, len(results))
+        return results
+
+    def _static_chunksize(self, n: int) -> int:
+        # Around four chunks per worker balances the load while keeping
+        # the number of messages small
+        chunksize, extra = divmod(n, self.processes * 4)
+        return min(max(chunksize + bool(extra), 1), self.max_chunksize)
+
+    def _adapt(self, elapsed: float, size: int) -> None:
+        if size == 0:
+            return
+        per_text = max(elapsed / size, 1e-7)
+        target = int(self.target_chunk_time / per_text)
+        with self._lock:
+            # Smooth the estimate so a single slow chunk does not
+            # collapse the chunk size
+            chunksize = (self._adaptive_chunksize + target) // 2
+            self._adaptive_chunksize = min(max(chunksize, 1),
+                                           self.max_chunksize)
+
+    def _chunks(self,
+                texts: Iterable[str],
+                chunksize: Optional[int]) -> Iterator[List[str]]:
+        chunk: List[str] = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= (chunksize or self._adaptive_chunksize):
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def __enter__(self) -> "ParallelExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def __getstate__(self):
+        raise TypeError("ParallelExecutor cannot be pickled")
@@ -1,17 +1,48 @@
 import time
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
-import multiprocessing as mp
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 from preprocesser.models import PreProcesser
+from preprocesser.models._cache import copy_result
+
+from ._executor import ParallelExecutor, _is_corpus
+from ._vectorized import vectorized_preprocessing
 
 logger = logging.getLogger(__name__)
 
 
+def _factorize(text_set: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Distinct texts in order of appearance, and the position of every
+    text of `text_set` among them
+    """
+    codes, uniques = pd.factorize(np.asarray(text_set, dtype=object),
+                                  use_na_sentinel=False)
+    return codes, uniques.tolist()
+
+
+def _expand(results: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+    The result of every text from the results of the distinct texts,
+    see `_factorize`. The first occurrence of a text gets its result
+    and every duplicate a copy of it, so they can be modified apart.
+    """
+    values = results[codes]
+    duplicates = np.ones(len(codes), dtype=bool)
+    duplicates[np.unique(codes, return_index=True)[1]] = False
+    for i in np.flatnonzero(duplicates):
+        values[i] = copy_result(values[i])
+    return values
+
+
 def sequential_preprocessing(p: PreProcesser,
                              text_set: List[str],
-                             verbose=False) -> List[Dict[str, Any]]:
+                             verbose=False,
+                             text_only=False,
+                             dedup=False,
+                             vectorized=False) -> List[Dict[str, Any]]:
     """
     Preprocess a list of texts in sequential
 
@@ -19,15 +50,40 @@ def sequential_preprocessing(p: PreProcesser,
         - Preprocesser class
     :text_text
         - Set of text that need to be mapped
+    :text_only
+        - Return only the pped texts instead of the features
+    :dedup
+        - Preprocess every distinct text only once. The duplicates
+        get a copy of its result.
+    :vectorized
+        - Run the simple steps over the whole column at once, see
+        `vectorized_preprocessing`
     """
 
     df = pd.DataFrame({'text': text_set})
+    preprocess = p.clean if text_only else p
     t1 = time.time()
-    df['text'] = df['text'].apply(p)
+    if vectorized:
+        texts = text_set
+        if dedup:
+            codes, uniques = _factorize(text_set)
+            texts = uniques
+        values = np.empty(len(texts), dtype=object)
+        values[:] = vectorized_preprocessing(p, texts, text_only=text_only)
+        df['text'] = _expand(values, codes) if dedup else values
+    elif dedup:
+        codes, uniques = _factorize(text_set)
+        values = np.empty(len(uniques), dtype=object)
+        values[:] = [preprocess(text) for text in uniques]
+        df['text'] = _expand(values, codes)
+    else:
+        df['text'] = df['text'].apply(preprocess)
     t2 = time.time()
 
     if verbose:
         logger.info("Total records of the dataset: {}".format(len(text_set)))
+        if dedup:
+            logger.info("Unique records: {}".format(len(uniques)))
         logger.info("Time consumed preprocessing in sequential: " +
                     "{0:.2f}s".format(round(t2-t1, 2)))
     return df['text'].values
@@ -36,7 +92,11 @@ def sequential_preprocessing(p: PreProcesser,
 def parallel_preprocessing(p: PreProcesser,
                            text_set: List[str],
                            njobs: int = -1,
-                           verbose=False) -> List[Dict[str, Any]]:
+                           verbose=False,
+                           executor: Optional[ParallelExecutor] = None,
+                           text_only=False,
+                           dedup=False,
+                           shared_memory=False) -> List[Dict[str, Any]]:
     """
     Preprocess a list of texts in parallel.
     The performance is evident when you deal with
@@ -45,23 +105,56 @@ def parallel_preprocessing(p: PreProcesser,
     :p
         - Preprocesser class
     :text_text
-        - Set of text that need to be mapped
+        - Set of text that need to be mapped, or a Corpus whose
+        records are read by the workers from the file itself, see
+        `preprocesser.data.Corpus`
     :njobs
         - Number of threds to be used. By default
         the value is -1, which mean it uses all the available threds.
+    :executor
+        - A running ParallelExecutor to reuse its workers. When it is
+        given `p` and `njobs` are ignored, otherwise a pool is started
+        for this call only.
+    :text_only
+        - Return only the pped texts instead of the features
+    :dedup
+        - Preprocess and send to the workers every distinct text only
+        once. The duplicates get a copy of its result. Not supported
+        for a Corpus, whose texts would all be loaded in memory.
+    :shared_memory
+        - Send the texts to the workers and their results back through
+        shared memory instead of pickling them, see ParallelExecutor.
+        When an `executor` is given its own setting is used.
     """
 
-    df = pd.DataFrame({'text': text_set})
-    processes = mp.cpu_count() if njobs == -1 else njobs
-    processes = mp.cpu_count() if processes > mp.cpu_count() else processes
+    if dedup and _is_corpus(text_set):
+        raise ValueError("dedup is not supported for a Corpus, it would "
+                         "load every text in memory")
+
     t1 = time.time()
-    with mp.Pool(processes=processes) as pool:
-        df['text'] = pool.map(p, text_set)
+    texts = text_set
+    if dedup:
+        codes, texts = _factorize(text_set)
+    if executor is None:
+        with ParallelExecutor(p, njobs=njobs,
+                              shared_memory=shared_memory) as executor:
+            results = executor.map(texts, text_only=text_only)
+    else:
+        results = executor.map(texts, text_only=text_only)
+    processes = executor.processes
+
+    values = np.empty(len(results), dtype=object)
+    values[:] = results
+    if dedup:
+        values = _expand(values, codes)
     t2 = time.time()
 
     if verbose:
         logger.info("Total records of the dataset - {}".format(len(text_set)))
+        if dedup:
+            logger.info("Unique records - {}".format(len(texts)))
         logger.info("Number of jobs: {}".format(processes))
         logger.info("Time consuming in parallel: " +
                     "{0:.2f}s".format(round(t2-t1, 2)))
-    return df['text'].values
+
+    return values
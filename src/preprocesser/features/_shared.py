@@ -0,0 +1,200 @@
+"""
+Transfer of texts and results between processes through shared memory.
+
+Only the name of a segment and the positions of the buffers inside it
+are pickled. A segment of texts is laid out as
+
+    [count][byte offsets: count + 1][char offsets: count + 1][UTF-8]
+
+with int64 offsets, so a worker decodes its whole range straight from
+the shared buffer at once and slices the texts out of it. The
+results are written by the worker in a segment of its own, as the
+buffers of a ColumnarBatch, or of a single StringColumn for the pped
+texts, and the parent process unlinks it once it has read them. The
+ObjectColumns of the registered steps are written pickled.
+"""
+import pickle
+from array import array
+from itertools import accumulate
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List, Optional, Tuple
+
+from preprocesser.models._columnar import (ColumnarBatch,
+                                           ObjectColumn,
+                                           RaggedColumn,
+                                           StringColumn)
+
+# Position and size in bytes of a buffer inside a segment
+Ref = Tuple[int, int]
+
+ENCODING = ("utf-8", "surrogatepass")
+
+INT64 = array("q").itemsize
+
+
+def pack_texts(texts: List[str]) -> SharedMemory:
+    """Copies `texts` into a new segment, the caller must unlink it"""
+    encoded = [text.encode(*ENCODING) for text in texts]
+    header = array("q", [len(texts), 0])
+    header.extend(accumulate(map(len, encoded)))
+    header.append(0)
+    header.extend(accumulate(map(len, texts)))
+    size = len(header) * INT64 + header[len(texts) + 1]
+
+    shm = SharedMemory(create=True, size=max(size, 1))
+    start = len(header) * INT64
+    shm.buf[:start] = header.tobytes()
+    shm.buf[start:size] = b"".join(encoded)
+    return shm
+
+
+def unpack_texts(buf: memoryview, start: int, stop: int) -> List[str]:
+    """Texts `start` to `stop` of a segment written by `pack_texts`"""
+    count = buf[:INT64].cast("q")[0]
+    header = buf[:(2 * count + 3) * INT64].cast("q")
+    try:
+        data_start = len(header) * INT64
+        text = str(buf[data_start + header[start + 1]:
+                       data_start + header[stop + 1]], *ENCODING)
+        # Only the offsets of the range, the header of a large batch
+        # is read by every chunk
+        chars = header[count + 2 + start:count + 3 + stop].tolist()
+    finally:
+        header.release()
+    first = chars[0]
+    return [text[chars[i] - first:chars[i + 1] - first]
+            for i in range(stop - start)]
+
+
+def read_texts(name: str, start: int, stop: int) -> List[str]:
+    """Texts `start` to `stop` of the segment `name`"""
+    shm = SharedMemory(name=name)
+    try:
+        return unpack_texts(shm.buf, start, stop)
+    finally:
+        shm.close()
+
+
+class _Writer:
+    """Collects the buffers of the results and their positions"""
+
+    def __init__(self):
+        self.buffers: List[bytes] = []
+        self.size = 0
+
+    def add(self, buffer: bytes) -> Ref:
+        ref = (self.size, len(buffer))
+        self.buffers.append(buffer)
+        self.size += len(buffer)
+        return ref
+
+    def strings(self, column: StringColumn) -> Tuple[Any, ...]:
+        return (self.add(column.data.encode(*ENCODING)),
+                self.add(column.offsets.tobytes()),
+                (self.add(column.valid.tobytes())
+                 if column.valid is not None else None))
+
+    def column(self, column: Any) -> Tuple[Any, ...]:
+        if isinstance(column, array):
+            return ("q", self.add(column.tobytes()))
+        if isinstance(column, RaggedColumn):
+            return ("r",
+                    self.add(column.offsets.tobytes()),
+                    self.strings(column.values),
+                    (self.add(column.counts.tobytes())
+                     if column.counts is not None else None))
+        if isinstance(column, ObjectColumn):
+            return ("o", self.add(pickle.dumps(column.values)))
+        return ("s", self.strings(column))
+
+    def write(self) -> str:
+        shm = SharedMemory(create=True, size=max(self.size, 1))
+        position = 0
+        for buffer in self.buffers:
+            shm.buf[position:position + len(buffer)] = buffer
+            position += len(buffer)
+        shm.close()
+        return shm.name
+
+
+def write_results(results: Any) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Writes the results of a worker, a ColumnarBatch or a list of pped
+    texts, in a new segment. Returns its name and the layout of the
+    buffers, which is all that is sent back to the parent.
+    """
+    writer = _Writer()
+    if isinstance(results, ColumnarBatch):
+        layout: Tuple[Any, ...] = (
+            "columns",
+            [(name, writer.column(column))
+             for name, column in results.columns.items()],
+            results.empty)
+    else:
+        layout = ("texts",
+                  writer.strings(StringColumn.from_strings(results)))
+    return writer.write(), layout
+
+
+class _Reader:
+
+    def __init__(self, buf: memoryview):
+        self.buf = buf
+
+    def int64(self, ref: Ref) -> array:
+        values = array("q")
+        values.frombytes(self.buf[ref[0]:ref[0] + ref[1]])
+        return values
+
+    def strings(self, refs: Tuple[Any, ...]) -> StringColumn:
+        data, offsets, valid = refs
+        valid_array: Optional[array] = None
+        if valid is not None:
+            valid_array = array("b")
+            valid_array.frombytes(self.buf[valid[0]:valid[0] + valid[1]])
+        return StringColumn(str(self.buf[data[0]:data[0] + data[1]],
+                                *ENCODING),
+                            self.int64(offsets), valid_array)
+
+    def column(self, layout: Tuple[Any, ...]) -> Any:
+        kind = layout[0]
+        if kind == "q":
+            return self.int64(layout[1])
+        if kind == "r":
+            _, offsets, values, counts = layout
+            return RaggedColumn(self.int64(offsets), self.strings(values),
+                                self.int64(counts) if counts is not None
+                                else None)
+        if kind == "o":
+            ref = layout[1]
+            return ObjectColumn(pickle.loads(self.buf[ref[0]:
+                                                      ref[0] + ref[1]]))
+        return self.strings(layout[1])
+
+
+def read_results(name: str, layout: Tuple[Any, ...]) -> List[Any]:
+    """
+    Reads the results written by `write_results` as returned by the
+    PreProcesser, and unlinks the segment
+    """
+    shm = SharedMemory(name=name)
+    try:
+        reader = _Reader(shm.buf)
+        if layout[0] == "texts":
+            return reader.strings(layout[1]).to_list()
+        columns = {name: reader.column(column)
+                   for name, column in layout[1]}
+        return ColumnarBatch(columns, layout[2]).to_records()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def discard_results(name: str) -> None:
+    """Unlinks a segment of results that will not be read"""
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
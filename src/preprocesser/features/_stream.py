@@ -0,0 +1,63 @@
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+from preprocesser.models import PreProcesser
+
+from ._executor import ParallelExecutor
+
+
+def _batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_preprocessing(p: PreProcesser,
+                         texts: Iterable[str],
+                         batch_size: int = 1000,
+                         njobs: int = 1,
+                         executor: Optional[ParallelExecutor] = None,
+                         text_only: bool = False
+                         ) -> Iterator[List[Any]]:
+    """
+    Preprocess an iterable of texts of any length, yielding the results
+    in lists of at most `batch_size` elements, in the same order as
+    the input.
+
+    The input is only read when the next batch is requested, and in
+    parallel only a bounded number of chunks are in flight, so the
+    memory does not grow with the length of the input.
+
+    :p
+        - Preprocesser class
+    :texts
+        - Any iterable or iterator of texts, e.g. an open file
+    :batch_size
+        - Maximum number of results yielded at once
+    :njobs
+        - Number of processes. 1 preprocess in the current process,
+        -1 uses all the available CPUs.
+    :executor
+        - A running ParallelExecutor to reuse its workers. When it is
+        given `p` and `njobs` are ignored.
+    :text_only
+        - Yield only the pped texts instead of the features
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer")
+
+    if executor is not None:
+        yield from _batched(executor.imap(iter(texts), text_only=text_only),
+                            batch_size)
+    elif njobs == 1:
+        preprocess = p.clean if text_only else p
+        for batch in _batched(texts, batch_size):
+            yield [preprocess(text) for text in batch]
+    else:
+        with ParallelExecutor(p, njobs=njobs) as executor:
+            yield from _batched(executor.imap(iter(texts),
+                                              text_only=text_only),
+                                batch_size)
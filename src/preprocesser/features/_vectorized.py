@@ -0,0 +1,280 @@
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from preprocesser.models import PreProcesser
+from preprocesser.models._patterns import (UNICODE_ESCAPE,
+                                           AMPERSAND,
+                                           EXCLAMATIONS,
+                                           QUESTIONS,
+                                           STOPS,
+                                           MULTI_WHITE_SPACE)
+from preprocesser.models._pipeline import CleanStep, Step
+
+ENGINES = ("pandas", "pyarrow")
+
+# The characters matched by `\s` and removed by `str.strip()`, the
+# last one is U+3000. RE2, used by pyarrow, only knows ASCII ones.
+WHITESPACE = "".join(chr(c) for c in range(0x3001) if chr(c).isspace())
+
+_RE2_WHITESPACE = "[" + "".join(f"\\x{{{ord(c):x}}}"
+                                for c in WHITESPACE) + "]"
+
+
+class _PandasColumn:
+    """
+    Texts in a Series of objects. Every kernel calls the methods of
+    `str` and the compiled patterns of `re` text by text, so the
+    results are always the same as the ones of the per-text steps. It
+    does the same work as the steps, so it is a fallback for the texts
+    pyarrow cannot hold, not a speed-up.
+    """
+
+    def __init__(self, texts: List[str]):
+        import pandas as pd
+
+        self.texts = pd.Series(texts, dtype=object)
+
+    def sub(self, pattern: Pattern, re2: str, repl: str) -> None:
+        self.texts = self.texts.str.replace(pattern, repl, regex=True)
+
+    def count(self, pattern: Pattern, re2: str) -> List[int]:
+        return self.texts.str.count(pattern).tolist()
+
+    def replace(self, old: str, new: str) -> None:
+        self.texts = self.texts.str.replace(old, new, regex=False)
+
+    def lower(self) -> None:
+        self.texts = self.texts.str.lower()
+
+    def strip(self) -> None:
+        self.texts = self.texts.str.strip()
+
+    def to_list(self) -> List[str]:
+        return self.texts.tolist()
+
+
+class _ArrowColumn:
+    """
+    Texts in a pyarrow string array, the kernels run in pyarrow.compute
+    with RE2 patterns equivalent to the Python ones.
+    """
+
+    def __init__(self, texts: Any):
+        import pyarrow as pa
+
+        if isinstance(texts, pa.ChunkedArray):
+            texts = texts.combine_chunks()
+        if not isinstance(texts, pa.Array):
+            texts = pa.array(texts, pa.large_string())
+        self.texts = texts
+
+    def sub(self, pattern: Pattern, re2: str, repl: str) -> None:
+        import pyarrow.compute as pc
+
+        self.texts = pc.replace_substring_regex(self.texts, pattern=re2,
+                                                replacement=repl)
+
+    def count(self, pattern: Pattern, re2: str) -> List[int]:
+        import pyarrow.compute as pc
+
+        return pc.count_substring_regex(self.texts, pattern=re2).to_pylist()
+
+    def replace(self, old: str, new: str) -> None:
+        import pyarrow.compute as pc
+
+        self.texts = pc.replace_substring(self.texts, pattern=old,
+                                          replacement=new)
+
+    def lower(self) -> None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        # pyarrow lowers single characters only, e.g. not "İ", so the
+        # texts that are not ASCII are lowered by Python
+        ascii = pc.string_is_ascii(self.texts)
+        lowered = pc.ascii_lower(self.texts)
+        others = pc.invert(ascii)
+        if pc.any(others).as_py():
+            texts = pc.filter(self.texts, others).to_pylist()
+            lowered = pc.replace_with_mask(
+                lowered, others,
+                pa.array([text.lower() for text in texts], lowered.type))
+        self.texts = lowered
+
+    def strip(self) -> None:
+        import pyarrow.compute as pc
+
+        self.texts = pc.utf8_trim(self.texts, characters=WHITESPACE)
+
+    def to_list(self) -> List[str]:
+        return self.texts.to_pylist()
+
+
+def _to_lower(column, collect: bool) -> Tuple[Any, ...]:
+    column.lower()
+    return ()
+
+
+def _remove_unicode(column, collect: bool) -> Tuple[Any, ...]:
+    column.sub(UNICODE_ESCAPE, r"(\\u[0-9A-Fa-f]+)", "")
+    for char in "\t\r\n":
+        column.replace(char, " ")
+    column.sub(AMPERSAND, "&amp;", "&")
+    column.strip()
+    return ()
+
+
+def _marks(pattern: Pattern, re2: str, repl: str):
+
+    def kernel(column, collect: bool) -> Tuple[Any, ...]:
+        counts = column.count(pattern, re2) if collect else None
+        column.sub(pattern, re2, repl)
+        return (counts,) if collect else ()
+    return kernel
+
+
+def _remove_multi_white_space(column, collect: bool) -> Tuple[Any, ...]:
+    column.sub(MULTI_WHITE_SPACE, _RE2_WHITESPACE + "{2,}", " ")
+    return ()
+
+
+# Steps that are plain rewrites of the text, applied to the whole
+# column at once. They return the values of the features of the step
+# as lists when `collect` is set.
+KERNELS: Dict[str, Callable[[Any, bool], Tuple[Any, ...]]] = {
+    "removeUnicode": _remove_unicode,
+    "toLower": _to_lower,
+    "replaceMultiExclamationMark": _marks(EXCLAMATIONS, "!!+", "!"),
+    "replaceMultiQuestionMark": _marks(QUESTIONS, r"\?\?+", "?"),
+    "replaceMultiStopMark": _marks(STOPS, r"\.\.+", "."),
+    "removeMultiWhiteSpace": _remove_multi_white_space,
+}
+
+
+def _default_engine() -> str:
+    import importlib.util
+
+    return ("pyarrow" if importlib.util.find_spec("pyarrow") is not None
+            else "pandas")
+
+
+def _column(engine: str, texts: Any, fallback: bool) -> Any:
+    if engine == "pandas":
+        return _PandasColumn(_to_list(texts))
+    try:
+        return _ArrowColumn(texts)
+    except UnicodeEncodeError:
+        # Texts with lone surrogates are not valid UTF-8
+        if not fallback:
+            raise
+        return _PandasColumn(_to_list(texts))
+
+
+def vectorized_preprocessing(p: PreProcesser,
+                             texts: Any,
+                             text_only: bool = False,
+                             engine: Optional[str] = None) -> Any:
+    """
+    Preprocess a whole column of texts at once. The steps that are
+    plain rewrites of the text (`KERNELS`) run as vectorised string
+    kernels over the column, the other ones text by text, with the
+    same results as `p`.
+
+    Most of the time goes to the steps without a kernel, so it is at
+    most 15% faster than `p` on the benchmark corpus and the gain
+    varies between machines, see the `pipe.vectorized_preprocessing`
+    benchmarks.
+
+    The result cache of `p` is not used. When `p` is profiling every
+    step runs text by text, so its stats are recorded.
+
+    :p
+        - Preprocesser class
+    :texts
+        - List, pandas Series or pyarrow string array of texts
+    :text_only
+        - Return only the pped texts, in a container of the same type
+        as `texts`, instead of the list of features
+    :engine
+        - "pyarrow" runs the kernels in pyarrow.compute, "pandas" with
+        the `.str` methods of a Series of objects. pyarrow by default
+        when it is installed. pandas is not faster than pyarrow, it is
+        a correctness fallback for the texts that are not valid UTF-8
+        and for when pyarrow is not installed.
+    """
+    fallback = engine is None
+    engine = engine or _default_engine()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of "
+                         f"{list(ENGINES)}")
+    text_only = text_only or p.text_only
+
+    raw = _to_list(texts)
+    column: Any = None
+    values: Optional[List[str]] = raw
+    features: Dict[str, List[Any]] = {}
+    for step in p._plan:
+        collect = not text_only and bool(step.keys)
+        kernel = (KERNELS.get(step.name)
+                  if isinstance(step, (Step, CleanStep)) else None)
+        if kernel is not None:
+            if column is None:
+                column = _column(engine, texts if values is raw else values,
+                                 fallback)
+                values = None
+            features.update(zip(step.keys, kernel(column, collect)))
+            continue
+
+        if values is None:
+            values = column.to_list()
+            column = None
+        if collect:
+            results = [step(text, p) for text in values]
+            values = [text for text, _ in results]
+            for i, key in enumerate(step.keys):
+                features[key] = [found[i] for _, found in results]
+        else:
+            values = [step.clean(text, p) for text in values]
+
+    if column is not None:
+        column.strip()
+        values = column.to_list()
+    else:
+        values = [text.strip() for text in values]
+
+    if text_only:
+        return _like(texts, values)
+
+    features["raw_text"] = raw
+    features["text"] = values
+    for key in p._empty_features:
+        features[key] = [None] * len(raw)
+    keys = p._feature_keys
+    records = [dict(zip(keys, row))
+               for row in zip(*(features[key] for key in keys))]
+    for key in p._empty_features:
+        for record in records:
+            record[key] = {}
+    return records
+
+
+def _to_list(texts: Any) -> List[str]:
+    if isinstance(texts, list):
+        return texts
+    if hasattr(texts, "to_pylist"):
+        return texts.to_pylist()
+    if hasattr(texts, "tolist"):
+        return texts.tolist()
+    return list(texts)
+
+
+def _like(texts: Any, values: List[str]) -> Any:
+    """`values` in a container of the same type as `texts`"""
+    if hasattr(texts, "to_pylist"):
+        import pyarrow as pa
+
+        return pa.array(values, texts.type)
+    if hasattr(texts, "str"):
+        import pandas as pd
+
+        return pd.Series(values, index=texts.index, name=texts.name)
+    return values
@@ -16,11 +16,49 @@ from ._base import (removeEmojis,
                     removeTags,
                     removeNonAlphChar)
 
+from ._patterns import (compile_pattern,
+                        register_pattern,
+                        get_pattern)
+
+from ._pipeline import (Step,
+                        regex_step,
+                        register_step,
+                        unregister_step,
+                        get_step)
+
+from ._planner import Plan
+
+from ._profiling import Profile, StepStats
+
 from ._classes import (PreProcesser,
+                       LangPreProcesser,
                        EN_PreProcesser,
                        ES_PreProcesser)
 
-from ._factory import preprocesser_factory
+from ._factory import (preprocesser_factory,
+                       get_preprocesser,
+                       preprocess_by_language)
+
+from importlib import import_module
+
+# Only needed by some features, imported on first access
+_LAZY = {"ColumnarBatch": "._columnar",
+         "StringColumn": "._columnar",
+         "RaggedColumn": "._columnar",
+         "ObjectColumn": "._columnar",
+         "ResultCache": "._cache"}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
 
 
 __all__ = ["removeEmojis",
@@ -41,8 +79,32 @@ __all__ = ["removeEmojis",
            "removeTags",
            "removeNonAlphChar",
 
+           "compile_pattern",
+           "register_pattern",
+           "get_pattern",
+
+           "Step",
+           "regex_step",
+           "register_step",
+           "unregister_step",
+           "get_step",
+           "Plan",
+
+           "ColumnarBatch",
+           "StringColumn",
+           "RaggedColumn",
+           "ObjectColumn",
+
+           "Profile",
+           "StepStats",
+
+           "ResultCache",
+
            "PreProcesser",
+           "LangPreProcesser",
            "EN_PreProcesser",
            "ES_PreProcesser",
 
-           "preprocesser_factory"]
+           "preprocesser_factory",
+           "get_preprocesser",
+           "preprocess_by_language"]
@@ -1,15 +1,106 @@
-import re
-import string
-from typing import Tuple, List, Dict, Counter, Optional
-from collections import Counter
+from typing import (Tuple, List, Dict, Counter, Optional, AbstractSet,
+                    Callable, Pattern, Union)
 import unicodedata
 
-from preprocesser.data import make_stopwords
+from preprocesser.data import stopword_registry
+
+from ._patterns import (UNICODE_ESCAPE,
+                        AMPERSAND,
+                        URL,
+                        SUCCESSIONS_BEGIN,
+                        SUCCESSIONS_END,
+                        USER,
+                        TAG,
+                        HASHTAG,
+                        EXCLAMATIONS,
+                        QUESTIONS,
+                        STOPS,
+                        ELONGATED,
+                        EMOJI,
+                        DATE,
+                        PRICE,
+                        YEAR,
+                        NUMBER,
+                        PUNCTUATION,
+                        MULTI_WHITE_SPACE,
+                        SUCCESSIONS_BEGIN_ASCII,
+                        SUCCESSIONS_END_ASCII,
+                        USER_ASCII,
+                        HASHTAG_ASCII,
+                        ELONGATED_ASCII,
+                        compile_pattern)
+
+URL_PLACEHOLDER = "URL"
+USER_PLACEHOLDER = "atUser"
+TAG_PLACEHOLDER = "TAG"
+EMOJI_PLACEHOLDER = "EMOJI"
+DATE_PLACEHOLDER = "DATEMENTION"
+PRICE_PLACEHOLDER = "PRICEMENTION"
+YEAR_PLACEHOLDER = "YYYY"
+NUMBER_PLACEHOLDER = "NUM"
+
+
+def _sub_collect(pattern: Pattern,
+                 text: str,
+                 replacement: Union[str, Callable[[str], str]]
+                 ) -> Tuple[str, List[str]]:
+    """Replaces every match of the pattern in a single pass over the text
 
-UNICODES = (
-    "\u0E00-\u0E7F\u0621-\u064A\u0660-\u0669\u0980-\u09FF"
-    "\u0D80-\u0DFF\uA8E0–\uA8FF\u0900–\u097F\u1CD0–\u1CFF"
-)
+    Args:
+        pattern: The compiled pattern to look for
+        text (str): The input text
+        replacement: The string that replaces each match, or a function
+            that receives the matched string and returns its replacement
+
+    Returns:
+        Tuple[str, List[str]]: the new text and the matched strings in
+        order of appearance
+    """
+    found = []
+
+    def collect(match):
+        matched = match.group()
+        found.append(matched)
+        return (replacement if isinstance(replacement, str)
+                else replacement(matched))
+
+    return pattern.sub(collect, text), found
+
+
+class _NonAlphCharTable(dict):
+    """
+    Translation table for `str.translate` that keeps letters, separators,
+    numbers and marks and maps any other character to a space. The
+    category of every codepoint is looked up only the first time it is
+    seen and then cached in the table, up to `limit`: the rarer
+    codepoints above it are looked up every time, so the table never
+    holds more than `limit` entries.
+    """
+
+    def __init__(self, limit: int = 0x20000):
+        super().__init__()
+        self.limit = limit
+
+    def __missing__(self, codepoint: int):
+        value = (codepoint
+                 if unicodedata.category(chr(codepoint))[0] in "LZNM"
+                 else " ")
+        if codepoint < self.limit:
+            self[codepoint] = value
+        return value
+
+
+# The Basic and Supplementary Multilingual Planes, emojis included
+_NON_ALPH_CHAR_TABLE = _NonAlphCharTable()
+for _codepoint in range(0x250):  # Latin scripts, known in advance
+    _NON_ALPH_CHAR_TABLE[_codepoint]
+del _codepoint
+
+# The same table for ASCII texts, to translate their bytes at once
+_ASCII_NON_ALPH_CHAR_TABLE = bytes(
+    codepoint if codepoint >= 128 or _NON_ALPH_CHAR_TABLE[codepoint] != " "
+    else ord(" ")
+    for codepoint in range(256))
 
 
 def removeNonAlphChar(text: str) -> str:
@@ -21,17 +112,17 @@ def removeNonAlphChar(text: str) -> str:
     Returns:
         str:
     """
-    cleaned_text = ""
-    for character in text:
-        cleaned_text += (character
-                         if unicodedata.category(character)[0]
-                         in "LZNM" else " ")
+    if text.isascii():
+        cleaned_text = text.encode("ascii").translate(
+            _ASCII_NON_ALPH_CHAR_TABLE).decode("ascii")
+    else:
+        cleaned_text = text.translate(_NON_ALPH_CHAR_TABLE)
     clean_spaces = " ".join(cleaned_text.split())
     return clean_spaces
 
 
 def removeTags(text: str,
-               placeholder="TAG",
+               placeholder=TAG_PLACEHOLDER,
                use_placeholder=True) -> Tuple[str, Dict[str, List[str]]]:
     """Removes every occurence of a tag or hashtag in the text
     Args:
@@ -41,13 +132,8 @@ def removeTags(text: str,
         Tuple[str, Dict[str, List[str]]]
     """
 
-    pattern = r'#\w+'
-
-    # Use re.findall to find all hashtags in the text
-    tags = re.findall(pattern, text)
-    for tag in tags:
-        text = (text.replace(tag, placeholder)
-                if use_placeholder else text.replace(tag, ""))
+    text, tags = _sub_collect(TAG, text,
+                              placeholder if use_placeholder else "")
     return text, {"tags": tags}
 
 
@@ -57,31 +143,23 @@ def removeUnicode(text: str) -> str:
     Args:
         text (str): The input text
     """
-    text = re.sub(r"(\\u[0-9A-Fa-f]+)", r"", text)
-    text = re.sub(
-        r"&amp;", "&", text.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+    text = UNICODE_ESCAPE.sub(r"", text)
+    text = AMPERSAND.sub(
+        "&", text.replace("\t", " ").replace("\r", " ").replace("\n", " ")
     ).strip()
     return text
 
 
 def removeUrls(text: str,
-               placeholder="URL",
+               placeholder=URL_PLACEHOLDER,
                use_placeholder=True) -> Tuple[str, Dict[str, List[str]]]:
     """change URL by special token
 
     Args:
         text (str): The input text
     """
-    urls = re.findall(
-        (
-            "http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]"
-            "|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
-        ),
-        text,
-    )
-    for url in urls:
-        text = (text.replace(url, placeholder)
-                if use_placeholder else text.replace(url, ""))
+    text, urls = _sub_collect(URL, text,
+                              placeholder if use_placeholder else "")
 #    while re.search(r"(URL)(.*)\1", text):
 #        text = re.sub(r"(URL)(.*)\1", r"\1\2", text).strip()
     return text, {"urls": urls}
@@ -94,8 +172,13 @@ def removeHtMentionsSuccessions(text: str) -> Tuple[str, Dict[str, Optional[str]
         text (str): The input text
     """
     ht_mts = {}
+    if text.isascii():
+        begin_pattern, end_pattern = (SUCCESSIONS_BEGIN_ASCII,
+                                      SUCCESSIONS_END_ASCII)
+    else:
+        begin_pattern, end_pattern = SUCCESSIONS_BEGIN, SUCCESSIONS_END
 
-    ht_mts["begin"] = re.search(r"^(URL\s*)*([@#][\w+" + UNICODES + r"]+\s){1,}", text)
+    ht_mts["begin"] = begin_pattern.search(text)
 
     if ht_mts["begin"]:
         begin = ht_mts.get("begin")
@@ -105,7 +188,7 @@ def removeHtMentionsSuccessions(text: str) -> Tuple[str, Dict[str, Optional[str]
             text = text[begin.end() :]
         ht_mts["begin"] = begin.group()
 
-    ht_mts["end"] = re.search(r"(\s[@#][\w+" + UNICODES + r"]+){1,}(URL\s*)*$", text)
+    ht_mts["end"] = end_pattern.search(text)
 
     if ht_mts["end"]:
         if "URL" in text[ht_mts.get("end").start() : ht_mts.get("end").end()]:
@@ -141,17 +224,15 @@ def toLower(text: str) -> str:
 
 
 def replaceAtUser(text: str,
-                  placeholder="atUser",
+                  placeholder=USER_PLACEHOLDER,
                   use_placeholder=False) -> Tuple[str, Dict[str, List[str]]]:
     """Replaces "@user" with "atUser"
 
     Args:
         text (str): The input text
     """
-    users = re.findall(r"@[\w+" + UNICODES + "]+", text)
-    for user in users:
-        text = (text.replace(user, placeholder)
-                if use_placeholder else text.replace(user, ""))
+    text, users = _sub_collect(USER_ASCII if text.isascii() else USER, text,
+                               placeholder if use_placeholder else "")
     return text, {"users": users}
 
 
@@ -161,9 +242,8 @@ def removeHashtagInFrontOfWord(text: str) -> Tuple[str, Dict[str, List[str]]]:
     Args:
         text (str): The input text
     """
-    hts = re.findall(r"#[\w+" + UNICODES + "]+", text)
-    for ht in hts:
-        text = text.replace(ht, ht[1:])
+    text, hts = _sub_collect(HASHTAG_ASCII if text.isascii() else HASHTAG,
+                             text, lambda ht: ht[1:])
     return text, {"#s": hts}
 
 
@@ -173,9 +253,8 @@ def replaceMultiExclamationMark(text: str) -> Tuple[str, Dict[str, int]]:
     Args:
         text (str): The input text
     """
-    exclams = re.findall(r"(\!)\1+", text)
-    text = re.sub(r"(\!)\1+", r"!", text)
-    return text, {"exclams": len(exclams)}
+    text, exclams = EXCLAMATIONS.subn(r"!", text)
+    return text, {"exclams": exclams}
 
 
 def replaceMultiQuestionMark(text: str) -> Tuple[str, Dict[str, int]]:
@@ -184,9 +263,8 @@ def replaceMultiQuestionMark(text: str) -> Tuple[str, Dict[str, int]]:
     Args:
         text (str): The input text
     """
-    questions = re.findall(r"(\?)\1+", text)
-    text = re.sub(r"(\?)\1+", r"?", text)
-    return text, {"questions": len(questions)}
+    text, questions = QUESTIONS.subn(r"?", text)
+    return text, {"questions": questions}
 
 
 def replaceMultiStopMark(text: str) -> Tuple[str, Dict[str, int]]:
@@ -195,9 +273,8 @@ def replaceMultiStopMark(text: str) -> Tuple[str, Dict[str, int]]:
     Args:
         text (str): The input text
     """
-    stops = re.findall(r"(\.)\1+", text)
-    text = re.sub(r"(\.)\1+", r".", text)
-    return text, {"stops": len(stops)}
+    text, stops = STOPS.subn(r".", text)
+    return text, {"stops": stops}
 
 
 def replaceElongated(text: str) -> Tuple[str, Dict[str, int]]:
@@ -208,17 +285,13 @@ def replaceElongated(text: str) -> Tuple[str, Dict[str, int]]:
     Args:
         text (str): The input text
     """
-    quantifiers = '{2,}'
-    pattern = fr"([a-zA-Z{UNICODES}])\1{quantifiers}"
+    pattern = ELONGATED_ASCII if text.isascii() else ELONGATED
+    text, elongateds = pattern.subn(r"\1", text)
 
-    elongateds = re.findall(pattern, text)
-    for _ in elongateds:
-        text = re.sub(pattern, r"\1", text)
+    return text, {"elongateds": elongateds}
 
-    return text, {"elongateds": len(elongateds)}
 
-
-def removeEmojis(text: str, placeholder="EMOJI",
+def removeEmojis(text: str, placeholder=EMOJI_PLACEHOLDER,
                  use_placeholder=True) -> Tuple[str, Dict[str, List[str]]]:
     """
     Replaces emojis in the input text with a placeholder
@@ -231,29 +304,12 @@ def removeEmojis(text: str, placeholder="EMOJI",
             - str: The modified text with the placeholder EMOJI instead of the emojis.
             - dict: A dictionary with the key "emojis" mapping to a list of emojis retrieved from the text.
     """
+    if text.isascii():
+        # Every emoji is out of ASCII
+        return text, {"emojis": []}
 
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F700-\U0001F77F"  # alchemical symbols
-        "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
-        "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-        "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-        "\U0001FA00-\U0001FA6F"  # Chess Symbols
-        "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-        "\U00002702-\U000027B0"  # Dingbats
-        "]+"
-    )
-
-    emojis = emoji_pattern.findall(text)
-    for emoji in emojis:
-        text = (text.replace(emoji, placeholder)
-                if use_placeholder else text.replace(emoji, ""))
-    #for emoji in emojis:
-    #    text = text.replace(emoji, " EMOJI ")
+    text, emojis = _sub_collect(EMOJI, text,
+                                placeholder if use_placeholder else "")
     return text, {"emojis": emojis}
 
 
@@ -275,27 +331,17 @@ def removeNumbers(text: str,
               corresponding patterns found in the text.
     """
 
-    pattern = r'\d{1,4}[-/ ]\d{1,4}[-/ ]\d{2,4}|(?:\d{1,2}[-/ ])?(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[-/ ]\d{1,4}'
-
-    dates = re.findall(pattern, text, re.IGNORECASE)
+    text, dates = _sub_collect(DATE, text,
+                               DATE_PLACEHOLDER if use_placeholder else "")
 
-    for date in dates:
-        text = text.replace(date, "DATEMENTION" if use_placeholder else "")
-    prices = re.findall(
-        r"""(?:[$€¥£₩]\s*(?:\d+[\. ,])?\d+(?:[, \.]\d+)?
-        |(?:\d+[\. ,])?\d+(?:[, \.]\d+)?\s*[$€¥£₩])""",
-        text,
-    )
-    for price in prices:
-        text = text.replace(price, "PRICEMENTION" if use_placeholder else "")
-    years = re.findall(r"[\d]{4}", text)
+    text, prices = _sub_collect(PRICE, text,
+                                PRICE_PLACEHOLDER if use_placeholder else "")
 
-    for year in years:
-        text = text.replace(year, "YYYY" if use_placeholder else "")
+    text, years = _sub_collect(YEAR, text,
+                               YEAR_PLACEHOLDER if use_placeholder else "")
 
-    numbers = re.findall(r"\b\d+\b", text)
-    for number in numbers:
-        text = text.replace(number, "NUM" if use_placeholder else "")
+    text, numbers = _sub_collect(NUMBER, text,
+                                 NUMBER_PLACEHOLDER if use_placeholder else "")
 
     return text, {
         "dates": dates,
@@ -305,13 +351,18 @@ def removeNumbers(text: str,
         }
 
 
-def removeStopWords(text: str, lang: str) -> Tuple[str, Dict[str, Counter]]:
+def removeStopWords(text: str,
+                    lang: str,
+                    stopwords: Optional[AbstractSet[str]] = None
+                    ) -> Tuple[str, Dict[str, Counter]]:
     """
     Removes stopwords from the input text based on the specified language
 
     Args:
         text (str): The input text
         lang (str): The language code used to pick the stopwords list
+        stopwords (set, optional): A preloaded stopwords set, by default
+            it is taken from the process-wide stopword registry
 
     Input:
        text: "the sun shines"
@@ -327,19 +378,22 @@ def removeStopWords(text: str, lang: str) -> Tuple[str, Dict[str, Counter]]:
             containing the retrieved stopwords and their counts.
     """
 
-    stopwords = make_stopwords(lang)
+    if stopwords is None:
+        stopwords = stopword_registry.get(lang)
 
-    filtered_tokens = [token for token in text.split()
-                       if not token.lower() in stopwords]
-
-    found_stopwords = [token for token in text.split()
-                       if token.lower() in stopwords]
-
-    counts = Counter(found_stopwords)
+    # A single pass splits the text and lowers every token only once,
+    # the counts keep the order of the first occurrences like Counter
+    filtered_tokens = []
+    counts: Dict[str, int] = {}
+    for token in text.split():
+        if token.lower() in stopwords:
+            counts[token] = counts.get(token, 0) + 1
+        else:
+            filtered_tokens.append(token)
 
     cleaned_text = ' '.join(filtered_tokens)
 
-    return cleaned_text, {'stopwords': dict(counts)}
+    return cleaned_text, {'stopwords': counts}
 
 
 def removePunctuation(text: str) -> Tuple[str, Dict[str, List[str]]]:
@@ -360,11 +414,7 @@ def removePunctuation(text: str) -> Tuple[str, Dict[str, List[str]]]:
             - dict: A dictionary with the key "punctuation" mapping to a list
             of the punctuation signs extracted from the text.
     """
-    pattern = f'[{string.punctuation}¡¿]+'
-
-    punctuation = re.findall(pattern, text)
-    for _ in punctuation:
-        text = re.sub(pattern, r" ", text)
+    text, punctuation = _sub_collect(PUNCTUATION, text, " ")
 
     return text, {"punctuation": punctuation}
 
@@ -384,4 +434,58 @@ def removeMultiWhiteSpace(text: str) -> str:
     Returns:
         str
     """
-    return re.sub(r"\s\s+", " ", text)
+    return MULTI_WHITE_SPACE.sub(" ", text)
+
+
+# Cheap tests run before a step: when the trigger of a helper returns
+# False the text cannot match any of its patterns, so the helper would
+# return the text unchanged and no feature. Helpers without a trigger
+# always run.
+
+_DIGIT = compile_pattern(r"\d")
+
+
+def _contains(*substrings: str) -> Callable[[str], bool]:
+    def trigger(text: str) -> bool:
+        for substring in substrings:
+            if substring in text:
+                return True
+        return False
+    return trigger
+
+
+def _has_unicode_noise(text: str) -> bool:
+    # `strip` only changes texts starting or ending with a white space
+    return ("\\u" in text or "&amp;" in text or "\t" in text
+            or "\r" in text or "\n" in text
+            or (text != "" and (text[0].isspace() or text[-1].isspace())))
+
+
+def _has_digit(text: str) -> bool:
+    # Dates, prices, years and numbers all contain a `\d`
+    return _DIGIT.search(text) is not None
+
+
+def _has_multi_white_space(text: str) -> bool:
+    # Every white space but " " is a non printable character
+    return "  " in text or not text.isprintable()
+
+
+def _not_ascii(text: str) -> bool:
+    return not text.isascii()
+
+
+TRIGGERS: Dict[str, Callable[[str], bool]] = {
+    "removeUnicode": _has_unicode_noise,
+    "removeUrls": _contains("://"),
+    "removeHtMentionsSuccessions": _contains("@", "#"),
+    "replaceAtUser": _contains("@"),
+    "removeTags": _contains("#"),
+    "removeHashtagInFrontOfWord": _contains("#"),
+    "replaceMultiExclamationMark": _contains("!!"),
+    "replaceMultiQuestionMark": _contains("??"),
+    "replaceMultiStopMark": _contains(".."),
+    "removeEmojis": _not_ascii,
+    "removeNumbers": _has_digit,
+    "removeMultiWhiteSpace": _has_multi_white_space,
+}
@@ -0,0 +1,267 @@
+import hashlib
+import pickle
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Marks a key that is not in the cache, None can be a cached value
+MISSING = object()
+
+
+def fingerprint(config: Any) -> bytes:
+    """Stable digest of a configuration, the same across processes"""
+    return hashlib.blake2b(repr(config).encode(), digest_size=16).digest()
+
+
+def copy_result(value: Any) -> Any:
+    """A copy of a result that shares none of its lists and dicts"""
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+    return value
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate memory used by a result of the preprocesser"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(key) + _sizeof(item)
+                    for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    return size
+
+
+class _LRUPolicy:
+
+    def __init__(self):
+        self._order: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    def add(self, key: Hashable) -> None:
+        self._order[key] = None
+
+    def touch(self, key: Hashable) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        del self._order[key]
+
+    def victim(self) -> Hashable:
+        return next(iter(self._order))
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class _LFUPolicy:
+    """Least frequently used, the least recently used among ties"""
+
+    def __init__(self):
+        self._frequency: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        self._min_frequency = 0
+
+    def add(self, key: Hashable) -> None:
+        self._frequency[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def touch(self, key: Hashable) -> None:
+        frequency = self._frequency[key]
+        self._discard(key, frequency)
+        self._frequency[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def remove(self, key: Hashable) -> None:
+        self._discard(key, self._frequency.pop(key))
+
+    def victim(self) -> Hashable:
+        return next(iter(self._buckets[self._min_frequency]))
+
+    def clear(self) -> None:
+        self._frequency.clear()
+        self._buckets.clear()
+        self._min_frequency = 0
+
+    def _discard(self, key: Hashable, frequency: int) -> None:
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = (min(self._buckets)
+                                       if self._buckets else 0)
+
+
+POLICIES = {"lru": _LRUPolicy, "lfu": _LFUPolicy}
+
+
+class ResultCache:
+    """
+    Bounded cache of the results of a PreProcesser, so repeated texts
+    like retweets are preprocessed only once.
+
+    Results are keyed by a hash of the raw text and a fingerprint of
+    the configuration of the preprocesser, so a cache can be shared by
+    several preprocessers. The memory used by the results is kept under
+    `max_bytes`, evicting the least recently (`policy="lru"`) or the
+    least frequently (`policy="lfu"`) used ones. With `path` the
+    results are also stored in a SQLite database, so a rerun over the
+    same dataset reuses the results of the previous one.
+
+    The cache keeps its own copy of every result and returns a new one
+    on every hit, so the results can be modified by the callers.
+
+    Usage:
+        p = EN_PreProcesser({"cache": ResultCache(path="results.db")})
+    """
+
+    def __init__(self,
+                 max_bytes: int = 64 * 2 ** 20,
+                 policy: str = "lru",
+                 path: Optional[str] = None,
+                 commit_every: int = 1000):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown cache policy '{policy}', "
+                             f"expected one of {sorted(POLICIES)}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.path = path
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: Dict[bytes, Any] = {}
+        self._sizes: Dict[bytes, int] = {}
+        self._policy = POLICIES[policy]()
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(key BLOB PRIMARY KEY, value BLOB)")
+
+    @staticmethod
+    def key(text: str, fingerprint: bytes) -> bytes:
+        """Key of `text` for the preprocesser with `fingerprint`"""
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"),
+                               digest_size=16, key=fingerprint).digest()
+
+    def get(self, key: bytes, default: Any = MISSING) -> Any:
+        """Returns the result stored under `key`, `default` if missing"""
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is not MISSING:
+                self.hits += 1
+                self._policy.touch(key)
+                return copy_result(value)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ?",
+                    (key,)).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    value = pickle.loads(row[0])
+                    self._store(key, value)
+                    return copy_result(value)
+
+            self.misses += 1
+            return default
+
+    def put(self, key: bytes, value: Any) -> None:
+        """Stores the result `value` under `key`"""
+        with self._lock:
+            if key in self._entries:
+                return
+            self._store(key, copy_result(value))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?)",
+                    (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+                self._pending_writes += 1
+                if self._pending_writes >= self.commit_every:
+                    self._commit()
+
+    def lookup(self,
+               text: str,
+               fingerprint: bytes,
+               compute: Callable[[str], Any]) -> Any:
+        """Returns the cached result of `text`, computing it if missing"""
+        key = self.key(text, fingerprint)
+        value = self.get(key)
+        if value is MISSING:
+            value = compute(text)
+            self.put(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes}
+
+    def clear(self) -> None:
+        """Drops the results kept in memory, the disk is untouched"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._policy.clear()
+            self.bytes = 0
+
+    def flush(self) -> None:
+        """Writes the pending results to disk"""
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
+
+    def _store(self, key: bytes, value: Any) -> None:
+        size = _sizeof(value) + _sizeof(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._policy.add(key)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            victim = self._policy.victim()
+            self._policy.remove(victim)
+            del self._entries[victim]
+            self.bytes -= self._sizes.pop(victim)
+            self.evictions += 1
+
+    def _commit(self) -> None:
+        if self._db is not None and self._pending_writes:
+            self._db.commit()
+            self._pending_writes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __reduce__(self):
+        # Copies, e.g. the ones sent to worker processes, start empty
+        # and only in memory
+        return ResultCache, (self.max_bytes, self.policy)
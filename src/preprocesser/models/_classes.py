@@ -1,22 +1,31 @@
-from typing import Optional, Any, Dict
-
-from . import (removeEmojis,
-               removeHashtagInFrontOfWord,
-               removeHtMentionsSuccessions,
-               removeNumbers,
-               removeStopWords,
-               removeUnicode,
-               removeUrls,
-               replaceMultiStopMark,
-               replaceAtUser,
-               replaceElongated,
-               replaceMultiExclamationMark,
-               replaceMultiQuestionMark,
-               removePunctuation,
-               removeMultiWhiteSpace,
-               toLower,
-               removeTags,
-               removeNonAlphChar)
+from typing import (TYPE_CHECKING, Optional, Any, Dict, FrozenSet, Iterable,
+                    Tuple, Union)
+
+from preprocesser import __version__
+from preprocesser.data import available_languages, stopword_registry
+
+from ._pipeline import STEPS, custom_steps, feature_keys
+from ._planner import compile_plan, step_inputs
+from ._profiling import Profile
+
+if TYPE_CHECKING:
+    from ._columnar import ColumnarBatch
+
+
+def _replanned_by() -> FrozenSet[str]:
+    """The attributes of a PreProcesser its plan depends on"""
+    names = {"keep_features", "profile", "cache"}
+    for step in STEPS:
+        names.add(step.flag)
+        names.update(step.inputs)
+    return frozenset(names)
+
+
+def _comparable(value: Any) -> Any:
+    # Sets of stopwords are fingerprinted in a stable order
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return value
 
 
 class PreProcesser:
@@ -38,7 +47,12 @@ class PreProcesser:
                  remove_multi_white_space=True,
                  punctuation=False,
                  use_placeholder=False,
-                 remove_non_alph_char=False
+                 remove_non_alph_char=False,
+                 text_only=False,
+                 keep_features=None,
+                 profiling=False,
+                 cache=None,
+                 **steps
                  ):
 
         self.remove_multiple_white_space = remove_multi_white_space
@@ -58,8 +72,66 @@ class PreProcesser:
         self.punctuation = punctuation
         self.use_placeholder = use_placeholder
         self.remove_non_alph_char = remove_non_alph_char
+        self.text_only = text_only
+        self.keep_features = keep_features
+
+        # The flags of the steps added with `register_step`
+        flags = {step.flag for step in custom_steps()}
+        for flag, value in steps.items():
+            if flag not in flags:
+                raise TypeError(f"{type(self).__name__}() got an "
+                                f"unexpected keyword argument '{flag}'")
+            setattr(self, flag, value)
+
+        # The steps are only instrumented when profiling, so there is
+        # no overhead otherwise
+        self.profile = Profile() if profiling else None
+
+        if cache is True:
+            from ._cache import ResultCache
+            cache = ResultCache()
+        self.cache = cache if cache is not False else None
+
+        self._compile()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # A flag set once the preprocesser is built changes its plan
+        if "plan" in self.__dict__ and name in _replanned_by():
+            self._compile()
+
+    def _compile(self) -> None:
+        """Selects the steps to run and fingerprints the configuration"""
+        self.plan = compile_plan(self, keep_features=self.keep_features)
+        self._plan = list(self.plan.steps)
+        self._feature_keys, self._empty_features = feature_keys(
+            self._plan, self.keep_features)
+        if self.profile is not None:
+            self._plan = self.profile.instrument(self._plan)
+        if self.cache is not None:
+            from ._cache import fingerprint
+            config = self._config()
+            self._fingerprint = fingerprint((config, "features"))
+            self._clean_fingerprint = fingerprint((config, "text"))
+
+    def _config(self) -> Tuple[Any, ...]:
+        """Everything the output of the preprocesser depends on"""
+        inputs = sorted({name for step in self.plan.steps
+                         for name in step_inputs(step)})
+        return (__version__,
+                [step.name for step in self._plan],
+                sorted(self.keep_features or []),
+                [(name, _comparable(getattr(self, name, None)))
+                 for name in inputs])
+
+    def explain(self) -> str:
+        """
+        Describes the steps that run, in order, with their estimated
+        cost, and the steps the planner dropped, see `Plan`
+        """
+        return self.plan.explain()
 
-    def __call__(self, text) -> Dict[str, Any]:
+    def __call__(self, text) -> Union[Dict[str, Any], str]:
         """
         Objective: consolidations of all pre-processing
 
@@ -67,141 +139,125 @@ class PreProcesser:
                 - text, str: the text to pre_process
         Outputs:
                 - features, dict: the dictionary with raw text,
-                pped text and all features extracted
+                pped text and all features extracted. Only the
+                features in `keep_features` when it is given, and
+                only the pped text when `text_only` is set.
+
+        The steps enabled by the flags are selected when the
+        preprocesser is built, and again when a flag is set, see
+        `explain`. With `profiling=True` the
+        stats of every step are recorded in `self.profile`. With a
+        `cache` the results of the texts already seen are reused, see
+        `ResultCache`.
         """
-        features = {"raw_text": text}
-
-        if self.remove_unicode:
-            text = removeUnicode(text)
-
-        if self.tolower:
-            text = toLower(text)
-
-        text, urls = (removeUrls(text, use_placeholder=self.use_placeholder)
-                      if self.remove_urls else (text, {}))
+        if self.text_only:
+            return self.clean(text)
+        if self.cache is not None:
+            return self.cache.lookup(text, self._fingerprint, self._extract)
+        return self._extract(text)
 
-        text, ht_mts = (removeHtMentionsSuccessions(text)
-                        if self.remove_mentions else (text, {}))
+    def _extract(self, text: str) -> Dict[str, Any]:
+        features = dict.fromkeys(self._feature_keys)
+        features["raw_text"] = text
 
-        text, users = (replaceAtUser(text,
-                                     use_placeholder=self.use_placeholder)
-                       if self.replace_at_user else (text, {}))
+        for step in self._plan:
+            text, values = step(text, self)
+            features.update(zip(step.keys, values))
 
-        text, tags = (removeTags(text, use_placeholder=self.use_placeholder)
-                      if self.remove_tags else (text, {}))
+        for key in self._empty_features:
+            features[key] = {}
 
-        text, hts = (removeHashtagInFrontOfWord(text)
-                     if self.remove_tags_in_front_of_words else (text, {}))
-
-        text, exclams = (replaceMultiExclamationMark(text)
-                         if self.remove_multiple_exclamations else (text, 0))
+        features["text"] = text.strip()
 
-        text, questions = (replaceMultiQuestionMark(text)
-                           if self.remove_multiple_questions else (text, 0))
+        return features
 
-        text, stops = (replaceMultiStopMark(text)
-                       if self.remove_multiple_periods else (text, 0))
+    def preprocess(self, text: str) -> Union[Dict[str, Any], str]:
+        return self.__call__(text)
 
-        text, elongated = (replaceElongated(text)
-                           if self.remove_elongated else (text, 0))
+    def clean(self, text: str) -> str:
+        """
+        Returns only the pped text. No feature is collected, so it is
+        faster than `__call__` when the features are not needed.
+        """
+        if self.cache is not None:
+            return self.cache.lookup(text, self._clean_fingerprint,
+                                     self._clean)
+        return self._clean(text)
 
-        text, emojis = (removeEmojis(text,
-                                       use_placeholder=self.use_placeholder)
-                        if self.remove_emojis else (text, {}))
+    def _clean(self, text: str) -> str:
+        for step in self._plan:
+            text = step.clean(text, self)
+        return text.strip()
 
-        text, numbers = (removeNumbers(text,
-                                       use_placeholder=self.use_placeholder)
-                         if self.remove_numbers else (text, {}))
+    def transform_batch(self, texts: Iterable[str]) -> "ColumnarBatch":
+        """
+        Preprocess a batch of texts into columns instead of one
+        dictionary per text. The values returned by every step are
+        stored directly in their column.
 
-        text, punctuation = (removePunctuation(text)
-                             if self.punctuation else (text, {}))
+        Inputs:
+                - texts, iterable of str: the texts to pre_process
+        Outputs:
+                - batch, ColumnarBatch: one column per feature, see
+                `ColumnarBatch.to_pandas` and `ColumnarBatch.to_arrow`
+        """
+        from ._columnar import ColumnarBuilder
 
-        if self.remove_multiple_white_space:
-            text = removeMultiWhiteSpace(text)
+        builder = ColumnarBuilder(self._feature_keys, self._empty_features)
+        plan = [(step, builder.sinks(step.keys)) for step in self._plan]
+        add_raw_text, add_text = builder.sinks(("raw_text", "text"))
 
-        if self.remove_non_alph_char:
-            text = removeNonAlphChar(text)
+        if self.cache is not None:
+            # Cached results are whole dictionaries of features
+            builder.extend(self.cache.lookup(text, self._fingerprint,
+                                             self._extract)
+                           for text in texts)
+            return builder.build()
 
-        features = {
-            **features,
-            **urls,
-            **{"successions": ht_mts},
-            **users,
-            **tags,
-            **hts,
-            **emojis,
-            **exclams,
-            **questions,
-            **stops,
-            **elongated,
-            **{"numbers": numbers},
-            **punctuation
-        }
-        features["text"] = text.strip()
+        for text in texts:
+            add_raw_text(text)
+            for step, sinks in plan:
+                text, values = step(text, self)
+                for sink, value in zip(sinks, values):
+                    sink(value)
+            add_text(text.strip())
 
-        return features
+        return builder.build()
 
-    def preprocess(self, text: str) -> Dict[str, Any]:
-        return self.__call__(text)
 
+class LangPreProcesser(PreProcesser):
+    """
+    Preprocessor of any language with a bundled list of stopwords, see
+    `preprocesser.data.available_languages`.
+    """
 
-class EN_PreProcesser(PreProcesser):
-    """English preprocessor"""
+    def __init__(self, lang: str, args: Optional[Dict[str, Any]] = None):
 
-    def __init__(self, args: Optional[Dict[str, Any]] = None):
+        if lang not in available_languages():
+            raise ValueError(f"Unsupported language '{lang}'")
 
         args_ = {
             "remove_stopwords": True,
             **(args or {})
         }
 
-        self.remove_stopwords = args_["remove_stopwords"]
+        self.remove_stopwords = args_.pop("remove_stopwords")
 
-        if "remove_stopwords" in args_:
-            del args_["remove_stopwords"]
+        self.lang = lang
+        self.stopwords = stopword_registry.get(self.lang)
 
         super().__init__(**args_)
 
-    def __call__(self, text) -> Dict[str, Any]:
-        base_preprocesser = super().__call__(text)
-        text = base_preprocesser["text"]
-
-        text, stopwords = (removeStopWords(text, "en")
-                           if self.remove_stopwords else (text, {}))
-        features = {
-            **base_preprocesser,
-            **stopwords
-        }
-        features["text"] = text
-        return features
-
 
-class ES_PreProcesser(PreProcesser):
-    """Espanish preprocessor"""
+class EN_PreProcesser(LangPreProcesser):
+    """English preprocessor"""
 
     def __init__(self, args: Optional[Dict[str, Any]] = None):
+        super().__init__("en", args)
 
-        args_ = {
-            "remove_stopwords": True,
-            **(args or {})
-        }
 
-        self.remove_stopwords = args_["remove_stopwords"]
-
-        if "remove_stopwords" in args_:
-            del args_["remove_stopwords"]
-
-        super().__init__(**args_)
-
-    def __call__(self, text) -> Dict[str, Any]:
-        base_preprocesser = super().__call__(text)
-        text = base_preprocesser["text"]
+class ES_PreProcesser(LangPreProcesser):
+    """Espanish preprocessor"""
 
-        text, stopwords = (removeStopWords(text, "es")
-                           if self.remove_stopwords else (text, {}))
-        features = {
-            **base_preprocesser,
-            **stopwords
-        }
-        features["text"] = text
-        return features
+    def __init__(self, args: Optional[Dict[str, Any]] = None):
+        super().__init__("es", args)
@@ -0,0 +1,367 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class StringColumn:
+    """
+    Column of strings stored as one contiguous string and the offsets
+    of every value in it. `valid` marks the values that are not None,
+    it is only present when the column has missing values.
+    """
+
+    __slots__ = ("data", "offsets", "valid")
+
+    def __init__(self,
+                 data: str,
+                 offsets: array,
+                 valid: Optional[array] = None):
+        self.data = data
+        self.offsets = offsets
+        self.valid = valid
+
+    @classmethod
+    def from_strings(cls, strings: List[Optional[str]]) -> "StringColumn":
+        offsets = array("q", [0])
+        valid = array("b")
+        position = 0
+        for string in strings:
+            position += len(string) if string is not None else 0
+            offsets.append(position)
+            valid.append(string is not None)
+        data = "".join(string for string in strings if string is not None)
+        return cls(data, offsets, valid if 0 in valid else None)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.valid is not None and not self.valid[i]:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        return (self[i] for i in range(len(self)))
+
+    def to_list(self) -> List[Optional[str]]:
+        data, offsets = self.data, self.offsets
+        strings = [data[start:end] for start, end
+                   in zip(offsets, offsets[1:])]
+        if self.valid is not None:
+            for i, valid in enumerate(self.valid):
+                if not valid:
+                    strings[i] = None
+        return strings
+
+
+class RaggedColumn:
+    """
+    Column of variable-length lists of strings, e.g. the urls of every
+    text. The items of row `i` are `values[offsets[i]:offsets[i + 1]]`.
+    `counts`, aligned with `values`, holds the number of occurrences of
+    every item for the features that count them, like stopwords.
+    """
+
+    __slots__ = ("offsets", "values", "counts")
+
+    def __init__(self,
+                 offsets: array,
+                 values: StringColumn,
+                 counts: Optional[array] = None):
+        self.offsets = offsets
+        self.values = values
+        self.counts = counts
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> List[str]:
+        values = self.values
+        return [values[j] for j in range(self.offsets[i],
+                                         self.offsets[i + 1])]
+
+    def __iter__(self) -> Iterator[List[str]]:
+        return (self[i] for i in range(len(self)))
+
+    def value(self, i: int) -> Any:
+        """Row `i` as returned by PreProcesser, a dict for counted items"""
+        items = self[i]
+        if self.counts is None:
+            return items
+        return dict(zip(items, self.counts[self.offsets[i]:
+                                           self.offsets[i + 1]]))
+
+    def to_list(self) -> List[Any]:
+        values, offsets = self.values.to_list(), self.offsets
+        if self.counts is None:
+            return [values[start:end] for start, end
+                    in zip(offsets, offsets[1:])]
+        counts = self.counts
+        return [dict(zip(values[start:end], counts[start:end]))
+                for start, end in zip(offsets, offsets[1:])]
+
+
+class ObjectColumn:
+    """
+    Column of the values of a feature with no columnar layout, like
+    the ones of the steps added with `register_step`, kept as they
+    are returned by the step.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, i: int) -> Any:
+        return self.values[i]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values)
+
+    def to_list(self) -> List[Any]:
+        return list(self.values)
+
+
+class _RaggedBuilder:
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.values: List[str] = []
+
+    def append(self, items: List[str]) -> None:
+        self.values.extend(items)
+        self.offsets.append(len(self.values))
+
+    def build(self) -> RaggedColumn:
+        return RaggedColumn(self.offsets,
+                            StringColumn.from_strings(self.values))
+
+
+class _CounterBuilder(_RaggedBuilder):
+
+    def __init__(self):
+        super().__init__()
+        self.counts = array("q")
+
+    def append(self, counter: Dict[str, int]) -> None:
+        super().append(list(counter))
+        self.counts.extend(counter.values())
+
+    def build(self) -> RaggedColumn:
+        column = super().build()
+        column.counts = self.counts
+        return column
+
+
+def _int64_array() -> array:
+    return array("q")
+
+
+# How every feature returned by the steps is stored in columns, the
+# other features are ObjectColumns
+RAGGED = ("urls", "users", "tags", "#s", "emojis", "punctuation")
+COUNTS = ("exclams", "questions", "stops", "elongateds")
+NESTED = {"successions": ("begin", "end"),
+          "numbers": ("dates", "years", "prices", "other")}
+
+
+class ColumnarBatch:
+    """
+    Column-oriented results of `PreProcesser.transform_batch`.
+
+    Every feature returned by `PreProcesser.__call__` is a column:
+    texts are StringColumns, counts are int64 arrays and lists of
+    extracted items are RaggedColumns. Nested features are flattened,
+    e.g. `numbers.dates` or `successions.begin`. The features of the
+    registered steps are ObjectColumns.
+    """
+
+    def __init__(self,
+                 columns: Dict[str, Any],
+                 empty: Tuple[str, ...] = ()):
+        self.columns = columns
+        self.empty = empty
+
+    def __len__(self) -> int:
+        return len(self.columns["text"])
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Features of the i-th text as returned by PreProcesser"""
+        features: Dict[str, Any] = {}
+        for name, column in self.columns.items():
+            key, _, field = name.partition(".")
+            value = (column.value(i) if isinstance(column, RaggedColumn)
+                     else column[i])
+            if field:
+                features.setdefault(key, {})[field] = value
+            else:
+                features[key] = value
+        for key in self.empty:
+            features[key] = {}
+        return features
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Features of every text as returned by PreProcesser, built
+        column by column, much faster than calling `row` for each
+        """
+        keys: List[str] = []
+        values: List[Any] = []
+        nested: Dict[str, Tuple[List[str], List[List[Any]]]] = {}
+        for name, column in self.columns.items():
+            key, _, field = name.partition(".")
+            column = (column.tolist() if isinstance(column, array)
+                      else column.to_list())
+            if not field:
+                keys.append(key)
+                values.append(column)
+                continue
+            if key not in nested:
+                nested[key] = ([], [])
+                keys.append(key)
+                values.append(nested[key])
+            nested[key][0].append(field)
+            nested[key][1].append(column)
+
+        for i, value in enumerate(values):
+            if isinstance(value, tuple):
+                fields, columns = value
+                values[i] = [dict(zip(fields, row))
+                             for row in zip(*columns)]
+
+        records = [dict(zip(keys, row)) for row in zip(*values)]
+        for key in self.empty:
+            for features in records:
+                features[key] = {}
+        return records
+
+    def to_pandas(self):
+        """
+        DataFrame with one column per feature. Counts are converted
+        without copying, lists of items become lists.
+        """
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                data[name] = np.frombuffer(column, dtype=np.int64)
+            else:
+                data[name] = column.to_list()
+        return pd.DataFrame(data)
+
+    def to_arrow(self):
+        """
+        pyarrow Table with one column per feature. Lists of items are
+        built from the offsets of the RaggedColumns.
+        """
+        import pyarrow as pa
+
+        data = {}
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                data[name] = pa.Array.from_buffers(
+                    pa.int64(), len(column), [None, pa.py_buffer(column)])
+            elif isinstance(column, RaggedColumn):
+                offsets = pa.Array.from_buffers(
+                    pa.int64(), len(column.offsets),
+                    [None, pa.py_buffer(column.offsets)])
+                values = pa.array(column.values.to_list(), pa.string())
+                if column.counts is None:
+                    data[name] = pa.LargeListArray.from_arrays(offsets,
+                                                               values)
+                else:
+                    counts = pa.Array.from_buffers(
+                        pa.int64(), len(column.counts),
+                        [None, pa.py_buffer(column.counts)])
+                    data[name] = pa.MapArray.from_arrays(
+                        offsets.cast(pa.int32()), values, counts)
+            elif isinstance(column, ObjectColumn):
+                data[name] = pa.array(column.values)
+            else:
+                data[name] = pa.array(column.to_list(), pa.large_string())
+        return pa.table(data)
+
+
+class ColumnarBuilder:
+    """Accumulates the values of the steps directly into columns"""
+
+    def __init__(self, feature_keys: Iterable[str], empty: Tuple[str, ...]):
+        self.empty = empty
+        self._strings: Dict[str, List[Optional[str]]] = {}
+        self._builders: Dict[str, Any] = {}
+        self._sinks = {}
+        for key in feature_keys:
+            if key in empty:
+                continue
+            if key in ("raw_text", "text"):
+                self._sinks[key] = self._strings.setdefault(key, []).append
+            elif key in RAGGED:
+                self._sinks[key] = self._builder(key, _RaggedBuilder).append
+            elif key == "stopwords":
+                self._sinks[key] = self._builder(key, _CounterBuilder).append
+            elif key in COUNTS:
+                self._sinks[key] = self._builder(key, _int64_array).append
+            elif key in NESTED:
+                self._sinks[key] = self._nested_sink(key)
+            else:
+                self._sinks[key] = self._builder(key, list).append
+
+    def sinks(self, keys: Tuple[str, ...]) -> Tuple[Any, ...]:
+        """The functions that store the values of a step with `keys`"""
+        return tuple(self._sinks[key] for key in keys)
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Stores the features of texts already preprocessed"""
+        sinks = list(self._sinks.items())
+        for features in records:
+            for key, sink in sinks:
+                sink(features[key])
+
+    def build(self) -> ColumnarBatch:
+        columns = {}
+        for key in self._sinks:
+            if key in self._strings:
+                columns[key] = StringColumn.from_strings(self._strings[key])
+            elif key in NESTED:
+                for field in NESTED[key]:
+                    name = f"{key}.{field}"
+                    builder = self._builders[name]
+                    columns[name] = (builder.build()
+                                     if key == "numbers"
+                                     else StringColumn.from_strings(builder))
+            else:
+                builder = self._builders[key]
+                if isinstance(builder, list):
+                    columns[key] = ObjectColumn(builder)
+                else:
+                    columns[key] = (builder if isinstance(builder, array)
+                                    else builder.build())
+        return ColumnarBatch(columns, self.empty)
+
+    def _builder(self, name: str, factory) -> Any:
+        return self._builders.setdefault(name, factory())
+
+    def _nested_sink(self, key: str):
+        if key == "numbers":
+            appends = [(field, self._builder(f"{key}.{field}",
+                                             _RaggedBuilder).append)
+                       for field in NESTED[key]]
+        else:
+            appends = [(field, self._builder(f"{key}.{field}", list).append)
+                       for field in NESTED[key]]
+
+        def sink(value: Dict[str, Any]) -> None:
+            for field, append in appends:
+                append(value[field])
+        return sink
@@ -1,22 +1,98 @@
-from typing import Optional
+import threading
+from functools import partial
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from preprocesser.data import available_languages
 
 from . import (EN_PreProcesser,
                ES_PreProcesser,
+               LangPreProcesser,
                PreProcesser)
 
-SUPPORTED_LANGUAGES = ["en", "es"]
+_preprocessers: Dict[Tuple[Optional[str], Hashable], PreProcesser] = {}
+_lock = threading.Lock()
 
 
 def preprocesser_factory(lang: Optional[str]):
+    """
+    Returns the preprocesser of `lang`, to be called with the args
+    dict. For the languages without a dedicated class it is
+    LangPreProcesser bound to the language. An unsupported language
+    raises a ValueError.
+    """
 
     if lang is None:
         return PreProcesser
 
-    assert lang in SUPPORTED_LANGUAGES
+    if lang not in available_languages():
+        raise ValueError(f"Unsupported language '{lang}', expected one "
+                         f"of {sorted(available_languages())}")
 
     if lang == "en":
         return EN_PreProcesser
     elif lang == "es":
         return ES_PreProcesser
 
-    return PreProcesser
+    return partial(LangPreProcesser, lang)
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item))
+                            for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def get_preprocesser(lang: Optional[str],
+                     args: Optional[Dict[str, Any]] = None) -> PreProcesser:
+    """
+    Returns a shared preprocesser of `lang` built with `args`. It is
+    built only the first time, so every call with the same language
+    and args reuses its stopwords and its plan of steps. With
+    `lang=None` it is a PreProcesser without stopwords.
+    """
+    key = (lang, _freeze(args or {}))
+    p = _preprocessers.get(key)
+    if p is None:
+        if lang is None:
+            p = PreProcesser(**(args or {}))
+        else:
+            p = preprocesser_factory(lang)(args)
+        with _lock:
+            p = _preprocessers.setdefault(key, p)
+    return p
+
+
+def preprocess_by_language(texts: Iterable[str],
+                           langs: Iterable[Optional[str]],
+                           args: Optional[Dict[str, Any]] = None
+                           ) -> List[Any]:
+    """
+    Preprocess a batch of texts in different languages.
+
+    The texts are grouped by language and every group is preprocessed
+    by the shared preprocesser of its language, see `get_preprocesser`.
+    The results are returned in the order of `texts`.
+
+    :texts
+        - Texts to preprocess
+    :langs
+        - Language of every text, None for no stopwords
+    :args
+        - Args of the preprocessers, the same for every language
+    """
+    texts = list(texts)
+    groups: Dict[Optional[str], List[int]] = {}
+    for i, lang in enumerate(langs):
+        groups.setdefault(lang, []).append(i)
+    if sum(map(len, groups.values())) != len(texts):
+        raise ValueError("texts and langs must have the same length")
+
+    results: List[Any] = [None] * len(texts)
+    for lang, indices in groups.items():
+        p = get_preprocesser(lang, args)
+        for i in indices:
+            results[i] = p(texts[i])
+    return results
@@ -0,0 +1,119 @@
+import re
+import string
+import threading
+from typing import Dict, Pattern, Tuple
+
+UNICODES = (
+    "\u0E00-\u0E7F\u0621-\u064A\u0660-\u0669\u0980-\u09FF"
+    "\u0D80-\u0DFF\uA8E0–\uA8FF\u0900–\u097F\u1CD0–\u1CFF"
+)
+
+EMOJIS = (
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F700-\U0001F77F"  # alchemical symbols
+    "\U0001F780-\U0001F7FF"  # Geometric Shapes Extended
+    "\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
+    "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+    "\U0001FA00-\U0001FA6F"  # Chess Symbols
+    "\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+    "\U00002702-\U000027B0"  # Dingbats
+)
+
+MONTHS = (
+    "January|February|March|April|May|June|July|August|September|October"
+    "|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec"
+)
+
+_patterns: Dict[str, Pattern] = {}
+_compiled: Dict[Tuple[str, int], Pattern] = {}
+_lock = threading.Lock()
+
+
+def compile_pattern(pattern: str, flags: int = 0) -> Pattern:
+    """
+    Compiles a pattern only once per process.
+
+    Unlike the internal cache of `re`, compiled patterns are never
+    dropped, so many languages and custom patterns can be used at the
+    same time without recompiling them.
+    """
+    key = (pattern, flags)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        with _lock:
+            compiled = _compiled.setdefault(key, re.compile(pattern, flags))
+    return compiled
+
+
+def register_pattern(name: str, pattern: str, flags: int = 0) -> Pattern:
+    """
+    Compiles `pattern` and stores it under `name` so it can be
+    retrieved anywhere with `get_pattern`. Registering the same name
+    again with a different pattern raises a ValueError.
+    """
+    compiled = compile_pattern(pattern, flags)
+    with _lock:
+        registered = _patterns.setdefault(name, compiled)
+    if registered is not compiled:
+        raise ValueError(f"Pattern '{name}' is already registered as "
+                         f"{registered.pattern!r}")
+    return compiled
+
+
+def get_pattern(name: str) -> Pattern:
+    """Returns the compiled pattern registered under `name`"""
+    try:
+        return _patterns[name]
+    except KeyError:
+        raise KeyError(f"Unknown pattern '{name}'") from None
+
+
+UNICODE_ESCAPE = register_pattern("unicode_escape", r"(\\u[0-9A-Fa-f]+)")
+AMPERSAND = register_pattern("ampersand", r"&amp;")
+URL = register_pattern(
+    "url",
+    "http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]"
+    "|(?:%[0-9a-fA-F][0-9a-fA-F]))+")
+SUCCESSIONS_BEGIN = register_pattern(
+    "successions_begin", r"^(URL\s*)*([@#][\w+" + UNICODES + r"]+\s){1,}")
+SUCCESSIONS_END = register_pattern(
+    "successions_end", r"(\s[@#][\w+" + UNICODES + r"]+){1,}(URL\s*)*$")
+USER = register_pattern("user", r"@[\w+" + UNICODES + "]+")
+TAG = register_pattern("tag", r"#\w+")
+HASHTAG = register_pattern("hashtag", r"#[\w+" + UNICODES + "]+")
+EXCLAMATIONS = register_pattern("exclamations", r"(\!)\1+")
+QUESTIONS = register_pattern("questions", r"(\?)\1+")
+STOPS = register_pattern("stops", r"(\.)\1+")
+ELONGATED = register_pattern("elongated", fr"([a-zA-Z{UNICODES}])\1{{2,}}")
+EMOJI = register_pattern("emoji", "[" + EMOJIS + "]+")
+DATE = register_pattern(
+    "date",
+    r"\d{1,4}[-/ ]\d{1,4}[-/ ]\d{2,4}|(?:\d{1,2}[-/ ])?(?:" + MONTHS +
+    r")[a-z]*[-/ ]\d{1,4}",
+    re.IGNORECASE)
+PRICE = register_pattern(
+    "price",
+    r"""(?:[$€¥£₩]\s*(?:\d+[\. ,])?\d+(?:[, \.]\d+)?
+        |(?:\d+[\. ,])?\d+(?:[, \.]\d+)?\s*[$€¥£₩])""")
+YEAR = register_pattern("year", r"[\d]{4}")
+NUMBER = register_pattern("number", r"\b\d+\b")
+PUNCTUATION = register_pattern("punctuation", f'[{string.punctuation}¡¿]+')
+MULTI_WHITE_SPACE = register_pattern("multi_white_space", r"\s\s+")
+
+# Leaner variants of the patterns above for the texts where
+# `str.isascii()` is true, they find the same matches in those texts.
+# The `UNICODES` ranges are dropped, and the classes of the first
+# character are spelled out so `re` can jump to the candidate
+# positions instead of trying the pattern at every one of them.
+ASCII_SPACE = r"[ \t\n\r\x0b\x0c\x1c-\x1f]"  # what `\s` matches in ASCII
+SUCCESSIONS_BEGIN_ASCII = register_pattern(
+    "successions_begin_ascii", r"^(URL\s*)*([@#][\w+]+\s){1,}")
+SUCCESSIONS_END_ASCII = register_pattern(
+    "successions_end_ascii",
+    ASCII_SPACE + r"[@#][\w+]+(\s[@#][\w+]+)*(URL\s*)*$")
+USER_ASCII = register_pattern("user_ascii", r"@[a-zA-Z0-9_+]+")
+HASHTAG_ASCII = register_pattern("hashtag_ascii", r"#[a-zA-Z0-9_+]+")
+ELONGATED_ASCII = register_pattern("elongated_ascii", r"([a-zA-Z])\1\1+")
@@ -0,0 +1,560 @@
+import threading
+from typing import (Any, Callable, Iterable, List, Optional, Pattern, Tuple,
+                    Union)
+
+from ._base import (TRIGGERS,
+                    _sub_collect,
+                    URL_PLACEHOLDER,
+                    USER_PLACEHOLDER,
+                    TAG_PLACEHOLDER,
+                    EMOJI_PLACEHOLDER,
+                    DATE_PLACEHOLDER,
+                    PRICE_PLACEHOLDER,
+                    YEAR_PLACEHOLDER,
+                    NUMBER_PLACEHOLDER,
+                    removeEmojis,
+                    removeHashtagInFrontOfWord,
+                    removeHtMentionsSuccessions,
+                    removeNumbers,
+                    removeStopWords,
+                    removeUnicode,
+                    removeUrls,
+                    replaceMultiStopMark,
+                    replaceAtUser,
+                    replaceElongated,
+                    replaceMultiExclamationMark,
+                    replaceMultiQuestionMark,
+                    removePunctuation,
+                    removeMultiWhiteSpace,
+                    toLower,
+                    removeTags,
+                    removeNonAlphChar)
+from ._patterns import (URL,
+                        USER,
+                        TAG,
+                        HASHTAG,
+                        EXCLAMATIONS,
+                        QUESTIONS,
+                        STOPS,
+                        ELONGATED,
+                        EMOJI,
+                        DATE,
+                        PRICE,
+                        YEAR,
+                        NUMBER,
+                        PUNCTUATION,
+                        USER_ASCII,
+                        HASHTAG_ASCII,
+                        ELONGATED_ASCII,
+                        compile_pattern)
+
+# Order of the features in the dictionary returned by PreProcesser
+FEATURE_KEYS = ("urls", "successions", "users", "tags", "#s", "emojis",
+                "exclams", "questions", "stops", "elongateds", "numbers",
+                "punctuation", "text", "stopwords")
+
+# Features that are always returned, empty when their step is disabled
+DEFAULT_FEATURES = ("successions", "numbers")
+
+# Estimated cost of the steps that do not declare one, see Step
+DEFAULT_COST = 20.0
+
+
+class Step:
+    """
+    A single stage of the PreProcesser pipeline.
+
+    `func` receives the text and the preprocesser and returns the new
+    text together with a tuple holding one value per feature in `keys`,
+    the outputs of the step. `clean`, when given, returns the same text
+    without collecting the features. `trigger`, when given, is a cheap
+    test of whether `func` can change the text at all: when it returns
+    False the step is skipped and the text is returned with empty
+    features.
+
+    What the planner knows about the step:
+        - inputs: the attributes of the preprocesser it reads besides
+        its `flag`, e.g. `use_placeholder`
+        - cost: estimated nanoseconds per character, only the ratios
+        between the steps matter
+        - absorbed_by: the steps that give the same result whether
+        this one ran right before them or not. The step is dropped
+        when one of them follows it and it has no features.
+    """
+
+    __slots__ = ("name", "flag", "keys", "func", "_clean", "trigger",
+                 "inputs", "cost", "absorbed_by", "_empty")
+
+    def __init__(self,
+                 name: str,
+                 flag: str,
+                 keys: Tuple[str, ...],
+                 func: Callable[[str, Any], Tuple[str, Tuple[Any, ...]]],
+                 clean: Optional[Callable[[str, Any], str]] = None,
+                 trigger: Optional[Callable[[str], bool]] = None,
+                 inputs: Tuple[str, ...] = (),
+                 cost: float = DEFAULT_COST,
+                 absorbed_by: Tuple[str, ...] = ()):
+        self.name = name
+        self.flag = flag
+        self.keys = keys
+        self.func = func
+        self._clean = clean
+        self.trigger = trigger
+        self.inputs = inputs
+        self.cost = cost
+        self.absorbed_by = absorbed_by
+        self._empty: Optional[Tuple[Any, ...]] = None
+
+    def __call__(self, text: str, p) -> Tuple[str, Tuple[Any, ...]]:
+        if self.trigger is not None and not self.trigger(text):
+            return text, self.empty(p)
+        return self.func(text, p)
+
+    def clean(self, text: str, p) -> str:
+        if self.trigger is not None and not self.trigger(text):
+            return text
+        if self._clean is None:
+            return self.func(text, p)[0]
+        return self._clean(text, p)
+
+    def apply(self, text: str, p,
+              matched: bool) -> Tuple[str, Tuple[Any, ...]]:
+        """`self(text, p)` when the result of the trigger is known"""
+        if not matched:
+            return text, self.empty(p)
+        return self.func(text, p)
+
+    def apply_clean(self, text: str, p, matched: bool) -> str:
+        """`self.clean(text, p)` when the result of the trigger is known"""
+        if not matched:
+            return text
+        if self._clean is None:
+            return self.func(text, p)[0]
+        return self._clean(text, p)
+
+    def empty(self, p) -> Tuple[Any, ...]:
+        """The features of the step for a text it does not change"""
+        if self._empty is None:
+            self._empty = self.func("", p)[1]
+        return tuple(_fresh(value) for value in self._empty)
+
+    def __reduce__(self):
+        # Steps are shared, preprocessers are pickled with their names
+        return get_step, (self.name,)
+
+    def __repr__(self) -> str:
+        return f"Step({self.name!r})"
+
+
+def _fresh(value: Any) -> Any:
+    """A new copy of an empty feature, lists and dicts are mutable"""
+    if isinstance(value, list):
+        return []
+    if isinstance(value, dict):
+        return {key: _fresh(item) for key, item in value.items()}
+    return value
+
+
+class CleanStep:
+    """Runs a step without collecting its features"""
+
+    __slots__ = ("step",)
+
+    keys = ()
+
+    def __init__(self, step):
+        self.step = step
+
+    @property
+    def name(self) -> str:
+        return self.step.name
+
+    @property
+    def trigger(self) -> Optional[Callable[[str], bool]]:
+        return self.step.trigger
+
+    def __call__(self, text: str, p) -> Tuple[str, Tuple[Any, ...]]:
+        return self.step.clean(text, p), ()
+
+    def clean(self, text: str, p) -> str:
+        return self.step.clean(text, p)
+
+    def apply(self, text: str, p,
+              matched: bool) -> Tuple[str, Tuple[Any, ...]]:
+        return self.step.apply_clean(text, p, matched), ()
+
+    def apply_clean(self, text: str, p, matched: bool) -> str:
+        return self.step.apply_clean(text, p, matched)
+
+    def __reduce__(self):
+        return CleanStep, (self.step,)
+
+    def __repr__(self) -> str:
+        return f"CleanStep({self.step!r})"
+
+
+def _remove_unicode(text, p):
+    return removeUnicode(text), ()
+
+
+def _to_lower(text, p):
+    return toLower(text), ()
+
+
+def _remove_urls(text, p):
+    text, urls = removeUrls(text, use_placeholder=p.use_placeholder)
+    return text, (urls["urls"],)
+
+
+def _remove_successions(text, p):
+    text, ht_mts = removeHtMentionsSuccessions(text)
+    return text, (ht_mts,)
+
+
+def _replace_at_user(text, p):
+    text, users = replaceAtUser(text, use_placeholder=p.use_placeholder)
+    return text, (users["users"],)
+
+
+def _remove_tags(text, p):
+    text, tags = removeTags(text, use_placeholder=p.use_placeholder)
+    return text, (tags["tags"],)
+
+
+def _remove_hashtags(text, p):
+    text, hts = removeHashtagInFrontOfWord(text)
+    return text, (hts["#s"],)
+
+
+def _replace_exclamations(text, p):
+    text, exclams = replaceMultiExclamationMark(text)
+    return text, (exclams["exclams"],)
+
+
+def _replace_questions(text, p):
+    text, questions = replaceMultiQuestionMark(text)
+    return text, (questions["questions"],)
+
+
+def _replace_stops(text, p):
+    text, stops = replaceMultiStopMark(text)
+    return text, (stops["stops"],)
+
+
+def _replace_elongated(text, p):
+    text, elongateds = replaceElongated(text)
+    return text, (elongateds["elongateds"],)
+
+
+def _remove_emojis(text, p):
+    text, emojis = removeEmojis(text, use_placeholder=p.use_placeholder)
+    return text, (emojis["emojis"],)
+
+
+def _remove_numbers(text, p):
+    text, numbers = removeNumbers(text, use_placeholder=p.use_placeholder)
+    return text, (numbers,)
+
+
+def _remove_punctuation(text, p):
+    text, punctuation = removePunctuation(text)
+    return text, (punctuation["punctuation"],)
+
+
+def _remove_multi_white_space(text, p):
+    return removeMultiWhiteSpace(text), ()
+
+
+def _remove_non_alph_char(text, p):
+    return removeNonAlphChar(text), ()
+
+
+def _remove_stopwords(text, p):
+    text, stopwords = removeStopWords(text, p.lang, p.stopwords)
+    return text, (stopwords["stopwords"],)
+
+
+# Variants of the steps that only return the text. They replace the
+# matches without calling back into Python for every one of them.
+
+def _placeholder(p, placeholder: str) -> str:
+    return placeholder if p.use_placeholder else ""
+
+
+def _strip_hash(match) -> str:
+    return match.group()[1:]
+
+
+def _clean_urls(text, p):
+    return URL.sub(_placeholder(p, URL_PLACEHOLDER), text)
+
+
+def _clean_users(text, p):
+    if text.isascii():
+        return USER_ASCII.sub(_placeholder(p, USER_PLACEHOLDER), text)
+    return USER.sub(_placeholder(p, USER_PLACEHOLDER), text)
+
+
+def _clean_tags(text, p):
+    return TAG.sub(_placeholder(p, TAG_PLACEHOLDER), text)
+
+
+def _clean_hashtags(text, p):
+    if text.isascii():
+        return HASHTAG_ASCII.sub(_strip_hash, text)
+    return HASHTAG.sub(_strip_hash, text)
+
+
+def _clean_exclamations(text, p):
+    return EXCLAMATIONS.sub("!", text)
+
+
+def _clean_questions(text, p):
+    return QUESTIONS.sub("?", text)
+
+
+def _clean_stops(text, p):
+    return STOPS.sub(".", text)
+
+
+def _clean_elongated(text, p):
+    if text.isascii():
+        return ELONGATED_ASCII.sub(r"\1", text)
+    return ELONGATED.sub(r"\1", text)
+
+
+def _clean_emojis(text, p):
+    return EMOJI.sub(_placeholder(p, EMOJI_PLACEHOLDER), text)
+
+
+def _clean_numbers(text, p):
+    text = DATE.sub(_placeholder(p, DATE_PLACEHOLDER), text)
+    text = PRICE.sub(_placeholder(p, PRICE_PLACEHOLDER), text)
+    text = YEAR.sub(_placeholder(p, YEAR_PLACEHOLDER), text)
+    return NUMBER.sub(_placeholder(p, NUMBER_PLACEHOLDER), text)
+
+
+def _clean_punctuation(text, p):
+    return PUNCTUATION.sub(" ", text)
+
+
+def _clean_stopwords(text, p):
+    stopwords = p.stopwords
+    return " ".join([token for token in text.split()
+                     if token.lower() not in stopwords])
+
+
+STEPS = [
+    Step("removeUnicode", "remove_unicode", (), _remove_unicode,
+         trigger=TRIGGERS["removeUnicode"], cost=6),
+    Step("toLower", "tolower", (), _to_lower, cost=5),
+    Step("removeUrls", "remove_urls",
+         ("urls",), _remove_urls, _clean_urls,
+         trigger=TRIGGERS["removeUrls"],
+         inputs=("use_placeholder",), cost=11),
+    Step("removeHtMentionsSuccessions", "remove_mentions",
+         ("successions",), _remove_successions,
+         trigger=TRIGGERS["removeHtMentionsSuccessions"], cost=39),
+    Step("replaceAtUser", "replace_at_user",
+         ("users",), _replace_at_user, _clean_users,
+         trigger=TRIGGERS["replaceAtUser"],
+         inputs=("use_placeholder",), cost=12),
+    Step("removeTags", "remove_tags",
+         ("tags",), _remove_tags, _clean_tags,
+         trigger=TRIGGERS["removeTags"],
+         inputs=("use_placeholder",), cost=11),
+    Step("removeHashtagInFrontOfWord", "remove_tags_in_front_of_words",
+         ("#s",), _remove_hashtags, _clean_hashtags,
+         trigger=TRIGGERS["removeHashtagInFrontOfWord"], cost=13),
+    Step("replaceMultiExclamationMark", "remove_multiple_exclamations",
+         ("exclams",), _replace_exclamations, _clean_exclamations,
+         trigger=TRIGGERS["replaceMultiExclamationMark"], cost=6),
+    Step("replaceMultiQuestionMark", "remove_multiple_questions",
+         ("questions",), _replace_questions, _clean_questions,
+         trigger=TRIGGERS["replaceMultiQuestionMark"], cost=6),
+    Step("replaceMultiStopMark", "remove_multiple_periods",
+         ("stops",), _replace_stops, _clean_stops,
+         trigger=TRIGGERS["replaceMultiStopMark"], cost=6),
+    Step("replaceElongated", "remove_elongated",
+         ("elongateds",), _replace_elongated, _clean_elongated, cost=34),
+    Step("removeEmojis", "remove_emojis",
+         ("emojis",), _remove_emojis, _clean_emojis,
+         trigger=TRIGGERS["removeEmojis"],
+         inputs=("use_placeholder",), cost=25),
+    Step("removeNumbers", "remove_numbers",
+         ("numbers",), _remove_numbers, _clean_numbers,
+         trigger=TRIGGERS["removeNumbers"],
+         inputs=("use_placeholder",), cost=330),
+    Step("removePunctuation", "punctuation",
+         ("punctuation",), _remove_punctuation, _clean_punctuation,
+         cost=32),
+    # Both steps after it split the text on any run of white spaces
+    Step("removeMultiWhiteSpace", "remove_multiple_white_space",
+         (), _remove_multi_white_space,
+         trigger=TRIGGERS["removeMultiWhiteSpace"], cost=7,
+         absorbed_by=("removeNonAlphChar", "removeStopWords")),
+    Step("removeNonAlphChar", "remove_non_alph_char",
+         (), _remove_non_alph_char, cost=40),
+    # Only the language preprocessers have stopwords. Tokens are split
+    # on white spaces so it gives the same result on the stripped text.
+    Step("removeStopWords", "remove_stopwords",
+         ("stopwords",), _remove_stopwords, _clean_stopwords,
+         inputs=("lang", "stopwords"), cost=39),
+]
+
+_STEPS_BY_NAME = {step.name: step for step in STEPS}
+
+# Features of the registered steps, returned before the pped text
+_CUSTOM_FEATURES: List[str] = []
+
+_lock = threading.Lock()
+
+# Changes every time a step is registered, the planner caches the
+# plans of each version of the registry
+_version = 0
+
+
+def registry_version() -> int:
+    return _version
+
+
+def get_step(name: str) -> Step:
+    """Returns the step registered under `name`"""
+    try:
+        return _STEPS_BY_NAME[name]
+    except KeyError:
+        raise KeyError(f"Unknown step '{name}'") from None
+
+
+def register_step(step: Step,
+                  after: Optional[str] = None,
+                  before: Optional[str] = None) -> Step:
+    """
+    Adds `step` to the pipeline of the preprocessers built afterwards,
+    right after the step `after`, right before the step `before`, or
+    at the end. It only runs in the preprocessers built with its flag,
+    e.g. `PreProcesser(remove_laughs=True)`, and its features are
+    returned right before the pped text.
+
+    Registering the same step again does nothing, another step with
+    the same name, flag or features raises a ValueError. Preprocessers
+    are pickled with the names of their steps, so processes that are
+    not forked have to register them too, e.g. at import time.
+    """
+    global _version
+
+    if after is not None and before is not None:
+        raise ValueError("Give either `after` or `before`, not both")
+    with _lock:
+        if _STEPS_BY_NAME.get(step.name) is step:
+            return step
+        for other in STEPS:
+            if other.name == step.name or other.flag == step.flag:
+                raise ValueError(f"Step '{step.name}' conflicts with the "
+                                 f"registered step '{other.name}'")
+        taken = set(feature_order()).union(("raw_text",),
+                                           DEFAULT_FEATURES)
+        taken.intersection_update(step.keys)
+        if taken:
+            raise ValueError(f"Features {sorted(taken)} are already "
+                             f"returned by another step")
+        if after is not None:
+            position = STEPS.index(get_step(after)) + 1
+        elif before is not None:
+            position = STEPS.index(get_step(before))
+        else:
+            position = len(STEPS)
+        STEPS.insert(position, step)
+        _STEPS_BY_NAME[step.name] = step
+        _CUSTOM_FEATURES.extend(step.keys)
+        _version += 1
+    return step
+
+
+def unregister_step(name: str) -> None:
+    """Removes a step added with `register_step`"""
+    global _version
+
+    with _lock:
+        step = get_step(name)
+        if step.name in _BUILTIN_STEPS:
+            raise ValueError(f"Step '{name}' is built in")
+        STEPS.remove(step)
+        del _STEPS_BY_NAME[name]
+        for key in step.keys:
+            _CUSTOM_FEATURES.remove(key)
+        _version += 1
+
+
+def custom_steps() -> List[Step]:
+    """The steps added with `register_step`, in order"""
+    return [step for step in STEPS if step.name not in _BUILTIN_STEPS]
+
+
+def feature_order() -> Tuple[str, ...]:
+    """Order of the features in the dictionary returned by PreProcesser"""
+    position = FEATURE_KEYS.index("text")
+    return (FEATURE_KEYS[:position] + tuple(_CUSTOM_FEATURES) +
+            FEATURE_KEYS[position:])
+
+
+_BUILTIN_STEPS = frozenset(_STEPS_BY_NAME)
+
+
+def regex_step(name: str,
+               flag: str,
+               pattern: Union[str, Pattern],
+               replacement: str = "",
+               key: Optional[str] = None,
+               collect: str = "list",
+               **kwargs) -> Step:
+    """
+    A step replacing every match of `pattern` with the string
+    `replacement`. With a `key`, its feature is the list of matches,
+    or their number when `collect` is "count". The other keyword
+    arguments are the ones of Step, e.g. `cost` or `trigger`.
+
+    Usage:
+        register_step(regex_step("removeLaughs", "remove_laughs",
+                                 "(?:ja){2,}", key="laughs",
+                                 collect="count"))
+        PreProcesser(remove_laughs=True)("jajaja hola")
+    """
+    if collect not in ("list", "count"):
+        raise ValueError(f"Unknown collect '{collect}', expected 'list' "
+                         f"or 'count'")
+    compiled = (compile_pattern(pattern) if isinstance(pattern, str)
+                else pattern)
+    template = replacement.replace("\\", "\\\\")
+
+    def func(text, p):
+        if key is None:
+            return compiled.sub(template, text), ()
+        if collect == "count":
+            text, count = compiled.subn(template, text)
+            return text, (count,)
+        text, found = _sub_collect(compiled, text, replacement)
+        return text, (found,)
+
+    def clean(text, p):
+        return compiled.sub(template, text)
+
+    return Step(name, flag, () if key is None else (key,), func, clean,
+                **kwargs)
+
+
+def feature_keys(plan, keep_features: Optional[Iterable[str]] = None
+                 ) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Returns the features produced by `plan` in the order they are
+    returned, and the default features whose step is not in the plan.
+    """
+    keys = {"text"}.union(key for step in plan for key in step.keys)
+    defaults = (DEFAULT_FEATURES if keep_features is None
+                else set(DEFAULT_FEATURES).intersection(keep_features))
+    empty = tuple(key for key in DEFAULT_FEATURES
+                  if key in defaults and key not in keys)
+    ordered = tuple(key for key in feature_order()
+                    if key in keys or key in empty)
+    return ("raw_text",) + ordered, empty
@@ -0,0 +1,165 @@
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+STAT_NAMES = ("calls", "seconds", "chars_in", "chars_out", "matches",
+              "skips")
+
+
+class StepStats:
+    """Cumulative stats of a single step of the pipeline"""
+
+    __slots__ = STAT_NAMES
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.chars_in = 0
+        self.chars_out = 0
+        self.matches = 0
+        self.skips = 0
+
+    def merge(self, other: Union["StepStats", Dict[str, Any]]) -> None:
+        if isinstance(other, StepStats):
+            other = other.to_dict()
+        for name in STAT_NAMES:
+            setattr(self, name, getattr(self, name) + other[name])
+
+    @property
+    def skip_rate(self) -> float:
+        """Share of the calls skipped by the trigger of the step"""
+        return self.skips / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = {name: getattr(self, name) for name in STAT_NAMES}
+        stats["skip_rate"] = self.skip_rate
+        return stats
+
+    def __repr__(self) -> str:
+        return f"StepStats({self.to_dict()})"
+
+
+class Profile:
+    """
+    Per-step stats of a PreProcesser built with `profiling=True`: the
+    number of calls, the cumulative time in seconds, the characters
+    going in and out of every step, the number of matches it found and
+    the calls it skipped because its trigger told it could not match.
+
+    Usage:
+        p = EN_PreProcesser({"profiling": True})
+        parallel_preprocessing(p, texts)
+        p.profile.to_json()
+        p.profile.export(lambda step, stats: statsd.gauge(...))
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, StepStats] = {}
+
+    def step(self, name: str) -> StepStats:
+        """Stats of the step `name`, created the first time"""
+        return self.steps.setdefault(name, StepStats())
+
+    def instrument(self, plan: Iterable[Any]) -> List["ProfiledStep"]:
+        """Wraps every step of a plan so it records its stats here"""
+        return [ProfiledStep(step, self) for step in plan]
+
+    def merge(self, other: Union["Profile", Dict[str, Dict[str, Any]]]
+              ) -> None:
+        """Adds the stats of `other`, e.g. the stats of a worker"""
+        steps = other.steps if isinstance(other, Profile) else other
+        for name, stats in steps.items():
+            self.step(name).merge(stats)
+
+    def reset(self) -> None:
+        # The stats are zeroed in place, the instrumented steps keep
+        # a reference to them
+        for stats in self.steps.values():
+            stats.reset()
+
+    def pop(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the stats recorded so far and resets them"""
+        stats = self.to_dict()
+        self.reset()
+        return stats
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.to_dict() for name, stats in self.steps.items()}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def export(self, callback: Callable[[str, Dict[str, Any]], Any]) -> None:
+        """Calls `callback(step_name, stats)` for every step"""
+        for name, stats in self.to_dict().items():
+            callback(name, stats)
+
+    def __repr__(self) -> str:
+        return f"Profile({self.to_dict()})"
+
+
+def count_matches(value: Any) -> int:
+    """
+    Number of matches in the value of a feature, whether it is a list
+    of matches, a count, or a dict of them like `numbers`
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return 1
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):
+        return sum(count_matches(item) for item in value.values())
+    return len(value)
+
+
+class ProfiledStep:
+    """Runs a step of the plan recording its stats"""
+
+    __slots__ = ("step", "name", "keys", "stats")
+
+    def __init__(self, step, profile: Profile):
+        self.step = step
+        self.name = step.name
+        self.keys = step.keys
+        self.stats = profile.step(step.name)
+
+    def _matched(self, text: str) -> bool:
+        # The trigger runs once, and its time is the one of the step
+        trigger = self.step.trigger
+        if trigger is None or trigger(text):
+            return True
+        self.stats.skips += 1
+        return False
+
+    def __call__(self, text: str, p) -> Tuple[str, Tuple[Any, ...]]:
+        t1 = time.perf_counter()
+        new_text, values = self.step.apply(text, p, self._matched(text))
+        elapsed = time.perf_counter() - t1
+
+        stats = self.stats
+        stats.calls += 1
+        stats.seconds += elapsed
+        stats.chars_in += len(text)
+        stats.chars_out += len(new_text)
+        stats.matches += sum(count_matches(value) for value in values)
+        return new_text, values
+
+    def clean(self, text: str, p) -> str:
+        t1 = time.perf_counter()
+        new_text = self.step.apply_clean(text, p, self._matched(text))
+        elapsed = time.perf_counter() - t1
+
+        stats = self.stats
+        stats.calls += 1
+        stats.seconds += elapsed
+        stats.chars_in += len(text)
+        stats.chars_out += len(new_text)
+        return new_text
+
+    def __repr__(self) -> str:
+        return f"ProfiledStep({self.step!r})"
@@ -24,7 +24,8 @@ VERSION = preprocesser.__version__
 with open("./requirements.txt") as f:
     REQUIREMENTS = f.read().splitlines()
 
-PACKAGES = find_packages(exclude=["tests"])
+PACKAGES = find_packages(exclude=["tests", "tests.*",
+                                   "benchmarks", "benchmarks.*"])
 
 CLASSIFIERS = [
     'Development Status :: 3 - Alpha',              # Chose either "3 - Alpha", "4 - Beta" or "5 - Production/Stable" as the current state of your package
@@ -46,5 +47,8 @@ setup(
     install_requires=REQUIREMENTS,
     packages=PACKAGES,
     classifiers=CLASSIFIERS,
-    package_data={DISTNAME: ['data/stop-words/*']}
+    package_data={DISTNAME: ['data/stop-words/*']},
+    entry_points={
+        'console_scripts': ['preprocesser = preprocesser.__main__:main']
+    }
 )
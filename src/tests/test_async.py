@@ -0,0 +1,179 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from preprocesser.features import AsyncPreProcesser
+from preprocesser.models import EN_PreProcesser, PreProcesser, ResultCache
+
+TEXTS = ['Hola @user #tag sooo good!!! the 12',
+         'The cat is on the table 😀',
+         'Check https://t.co/abc!!! and 12/03/2020',
+         ''] * 5
+
+
+class TestAsyncPreProcesser(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.p = EN_PreProcesser()
+
+    async def test_preprocess(self):
+        async with AsyncPreProcesser(self.p) as ap:
+            for text in TEXTS[:4]:
+                self.assertEqual(await ap(text), self.p(text))
+                self.assertEqual(await ap.clean(text), self.p.clean(text))
+
+    async def test_concurrent_requests_are_batched(self):
+        async with AsyncPreProcesser(self.p, max_batch_size=8,
+                                     max_latency=0.05) as ap:
+            results = await asyncio.gather(*(ap(text) for text in TEXTS))
+            stats = ap.stats()
+        self.assertEqual(results, [self.p(text) for text in TEXTS])
+        self.assertEqual(stats['requests'], len(TEXTS))
+        self.assertLess(stats['batches'], len(TEXTS))
+        self.assertGreater(stats['mean_batch_size'], 1)
+
+    async def test_mixed_text_only_requests(self):
+        async with AsyncPreProcesser(self.p, max_latency=0.05) as ap:
+            results = await asyncio.gather(
+                *(ap.preprocess(text, text_only=i % 2 == 1)
+                  for i, text in enumerate(TEXTS)))
+        self.assertEqual(results,
+                         [self.p.clean(text) if i % 2 else self.p(text)
+                          for i, text in enumerate(TEXTS)])
+
+    async def test_map(self):
+        async with AsyncPreProcesser(self.p, max_batch_size=3) as ap:
+            self.assertEqual(await ap.map(TEXTS),
+                             [self.p(text) for text in TEXTS])
+            self.assertEqual(await ap.map(TEXTS, text_only=True),
+                             [self.p.clean(text) for text in TEXTS])
+            self.assertEqual(await ap.map([]), [])
+
+    async def test_text_only_preprocesser(self):
+        p = PreProcesser(text_only=True)
+        async with AsyncPreProcesser(p) as ap:
+            self.assertEqual(await ap(TEXTS[0]), p(TEXTS[0]))
+
+    async def test_bounded_in_flight(self):
+        p = PreProcesser()
+        running = []
+        peak = []
+        extract = p._extract
+
+        def slow_extract(text):
+            running.append(text)
+            peak.append(len(running))
+            try:
+                return extract(text)
+            finally:
+                running.remove(text)
+
+        p._extract = slow_extract
+        async with AsyncPreProcesser(p, njobs=4, max_batch_size=1,
+                                     max_in_flight=2, max_queued=2) as ap:
+            results = await asyncio.gather(*(ap(text) for text in TEXTS))
+            self.assertLessEqual(ap.stats()['queued'], 2)
+        self.assertEqual(results, [PreProcesser()(text) for text in TEXTS])
+        self.assertLessEqual(max(peak), 2)
+
+    async def test_event_loop_stays_responsive(self):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.ensure_future(ticker())
+        async with AsyncPreProcesser(self.p) as ap:
+            await ap.map(['Hola @user sooo good!!! ' * 2000] * 4)
+        task.cancel()
+        self.assertGreater(ticks, 1)
+
+    async def test_errors_are_raised_to_the_callers(self):
+        async with AsyncPreProcesser(self.p, max_latency=0.05) as ap:
+            results = await asyncio.gather(ap('hola'), ap(None),
+                                           ap.clean('adios'),
+                                           return_exceptions=True)
+            # 'hola' and None were batched together, then retried one
+            # by one, so only the bad request fails. The retries are
+            # not counted as requests.
+            self.assertEqual(ap.stats()['requests'], 3)
+            self.assertEqual(ap.stats()['batches'], 2)
+            self.assertEqual(results[0], self.p('hola'))
+            self.assertIsInstance(results[1], Exception)
+            self.assertEqual(results[2], self.p.clean('adios'))
+            self.assertEqual(await ap('hola'), self.p('hola'))
+
+    async def test_cache(self):
+        p = EN_PreProcesser({'cache': ResultCache()})
+        async with AsyncPreProcesser(p) as ap:
+            first = await ap.map(TEXTS)
+            batches = ap.stats()['batches']
+            self.assertEqual(await ap.map(TEXTS), first)
+            self.assertEqual(await ap(TEXTS[0]), first[0])
+            # Every text was cached by the first batch
+            self.assertEqual(ap.stats()['batches'], batches)
+        self.assertEqual(first, [self.p(text) for text in TEXTS])
+        first[0]['users'] = None
+        self.assertEqual(p(TEXTS[0]), self.p(TEXTS[0]))
+
+    async def test_disk_cache_is_used_outside_the_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(path=os.path.join(tmp, 'results.db'))
+            p = EN_PreProcesser({'cache': cache})
+            threads = set()
+            get, put = cache.get, cache.put
+
+            def record(func):
+                def wrapper(*args):
+                    threads.add(threading.get_ident())
+                    return func(*args)
+                return wrapper
+
+            with mock.patch.object(cache, 'get', record(get)), \
+                    mock.patch.object(cache, 'put', record(put)):
+                async with AsyncPreProcesser(p) as ap:
+                    self.assertEqual(await ap(TEXTS[0]), self.p(TEXTS[0]))
+                    self.assertEqual(await ap.map(TEXTS),
+                                     [self.p(text) for text in TEXTS])
+                    self.assertEqual(await ap(TEXTS[0]), self.p(TEXTS[0]))
+            cache.close()
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_profiling(self):
+        p = EN_PreProcesser({'profiling': True})
+        async with AsyncPreProcesser(p) as ap:
+            await ap.map(TEXTS)
+        self.assertEqual(p.profile.steps['toLower'].calls, len(TEXTS))
+
+    async def test_process_executor(self):
+        p = EN_PreProcesser({'profiling': True})
+        async with AsyncPreProcesser(p, executor='process', njobs=1) as ap:
+            results = await asyncio.gather(*(ap(text) for text in TEXTS))
+            self.assertEqual(await ap.map(TEXTS, text_only=True),
+                             [self.p.clean(text) for text in TEXTS])
+        self.assertEqual(results, [self.p(text) for text in TEXTS])
+        self.assertEqual(p.profile.steps['toLower'].calls, 2 * len(TEXTS))
+
+    async def test_closed(self):
+        ap = AsyncPreProcesser(self.p)
+        self.assertEqual(await ap('hola'), self.p('hola'))
+        await ap.aclose()
+        await ap.aclose()
+        with self.assertRaises(ValueError):
+            await ap('hola')
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            AsyncPreProcesser(self.p, executor='fiber')
+        with self.assertRaises(ValueError):
+            AsyncPreProcesser(self.p, max_batch_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from benchmarks.corpus import CorpusConfig, make_corpus
+from benchmarks.run import compare
+
+
+class TestCorpus(unittest.TestCase):
+
+    def test_reproducible(self):
+        self.assertEqual(make_corpus(50, seed=3), make_corpus(50, seed=3))
+        self.assertNotEqual(make_corpus(50, seed=3), make_corpus(50, seed=4))
+
+    def test_densities(self):
+        config = CorpusConfig(urls=0, mentions=1, hashtags=0, emojis=0,
+                              numbers=0, elongations=0, punctuation=0)
+        for text in make_corpus(20, config):
+            self.assertTrue(all(token.startswith('@')
+                                for token in text.split()))
+
+    def test_languages(self):
+        config = CorpusConfig(languages=('th',), mentions=0, hashtags=0)
+        self.assertTrue(any('ไทย' in text
+                            for text in make_corpus(100, config)))
+
+
+class TestCompare(unittest.TestCase):
+
+    BASELINE = {'calibration': 1.0,
+                'results': {'a[10]': {'seconds': 1.0, 'digest': 'x'},
+                            'b[10]': {'seconds': 1.0, 'digest': 'y'}}}
+
+    def test_no_regressions(self):
+        current = {'calibration': 2.0,
+                   'results': {'a[10]': {'seconds': 2.2, 'digest': 'x'},
+                               'b[10]': {'seconds': 1.0, 'digest': 'y'}}}
+        self.assertEqual(compare(current, self.BASELINE), [])
+
+    def test_missing_benchmarks(self):
+        current = {'calibration': 1.0,
+                   'results': {'a[10]': {'seconds': 1.0, 'digest': 'x'},
+                               'c[10]': {'seconds': 9.0, 'digest': 'z'}}}
+        self.assertEqual(compare(current, self.BASELINE),
+                         ['b[10]: not run', 'c[10]: not in baseline'])
+        # The benchmarks left out with --only are not missing
+        del current['results']['c[10]']
+        self.assertEqual(compare(current, self.BASELINE, only='a'), [])
+
+    def test_regressions(self):
+        current = {'calibration': 1.0,
+                   'results': {'a[10]': {'seconds': 1.5, 'digest': 'x'},
+                               'b[10]': {'seconds': 1.0, 'digest': 'w'}}}
+        self.assertEqual(compare(current, self.BASELINE),
+                         ['a[10]: 1.50x slower than baseline',
+                          'b[10]: output changed'])
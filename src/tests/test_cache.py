@@ -0,0 +1,114 @@
+import os
+import pickle
+import tempfile
+import unittest
+from preprocesser.models import EN_PreProcesser, PreProcesser, ResultCache
+from preprocesser.models._cache import MISSING
+
+TEXTS = ['RT @user: great news!!! https://t.co/abc',
+         'the cat is on the table 😀',
+         'RT @user: great news!!! https://t.co/abc',
+         '']
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_same_output(self):
+        for config in ({}, {'text_only': True}, {'keep_features': ['urls']},
+                       {'profiling': True}):
+            p = EN_PreProcesser(config)
+            cached = EN_PreProcesser({**config, 'cache': True})
+            for text in TEXTS * 2:
+                with self.subTest(config=config, text=text):
+                    self.assertEqual(cached(text), p(text))
+                    self.assertEqual(cached.clean(text), p.clean(text))
+
+    def test_stats(self):
+        p = PreProcesser(cache=True)
+        for text in TEXTS:
+            p(text)
+        stats = p.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 3))
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(stats['hit_rate'], 0.25)
+
+    def test_results_are_copies(self):
+        p = PreProcesser(cache=True)
+        expected = PreProcesser()(TEXTS[0])
+        # The result of a miss and of a hit
+        for _ in range(2):
+            features = p(TEXTS[0])
+            features['text'] = 'changed'
+            features['urls'].append('https://t.co/xyz')
+            features['successions']['begin'] = 'changed'
+            features['numbers']['dates'].append('12/03')
+        self.assertEqual(p(TEXTS[0]), expected)
+
+    def test_config_fingerprint(self):
+        cache = ResultCache()
+        placeholders = PreProcesser(cache=cache, use_placeholder=True)
+        p = PreProcesser(cache=cache)
+        expected = p(TEXTS[0])
+        self.assertNotEqual(placeholders(TEXTS[0]), expected)
+        self.assertEqual(cache.stats()['hits'], 0)
+        self.assertEqual(PreProcesser(cache=cache)(TEXTS[0]), expected)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_memory_budget(self):
+        cache = ResultCache(max_bytes=20000)
+        p = PreProcesser(cache=cache)
+        for i in range(200):
+            p(f'text number {i}')
+        self.assertLessEqual(cache.bytes, 20000)
+        self.assertGreater(cache.stats()['evictions'], 0)
+
+    def test_lru(self):
+        cache = ResultCache(max_bytes=3 * 150)
+        for key in (b'a', b'b', b'c'):
+            cache.put(key, 'x' * 50)
+        cache.get(b'a')
+        cache.put(b'd', 'x' * 50)
+        self.assertIsNot(cache.get(b'a'), MISSING)
+        self.assertIs(cache.get(b'b'), MISSING)
+
+    def test_lfu(self):
+        cache = ResultCache(max_bytes=3 * 150, policy='lfu')
+        for key in (b'a', b'b', b'c'):
+            cache.put(key, 'x' * 50)
+        cache.get(b'a')
+        cache.get(b'b')
+        cache.put(b'd', 'x' * 50)
+        self.assertIs(cache.get(b'c'), MISSING)
+        self.assertIsNot(cache.get(b'a'), MISSING)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            ResultCache(policy='random')
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'results.db')
+            with ResultCache(path=path) as cache:
+                expected = [EN_PreProcesser({'cache': cache})(text)
+                            for text in TEXTS]
+
+            with ResultCache(path=path) as cache:
+                p = EN_PreProcesser({'cache': cache})
+                self.assertEqual([p(text) for text in TEXTS], expected)
+                self.assertEqual(cache.stats()['disk_hits'], 3)
+                self.assertEqual(cache.stats()['misses'], 0)
+
+    def test_pickle(self):
+        p = PreProcesser(cache=True)
+        p(TEXTS[0])
+        copy = pickle.loads(pickle.dumps(p))
+        self.assertEqual(len(copy.cache), 0)
+        self.assertEqual(copy(TEXTS[0]), p(TEXTS[0]))
+
+    def test_transform_batch(self):
+        p = EN_PreProcesser()
+        cached = EN_PreProcesser({'cache': True})
+        for _ in range(2):
+            batch = cached.transform_batch(TEXTS)
+            self.assertEqual([batch.row(i) for i in range(len(TEXTS))],
+                             [p(text) for text in TEXTS])
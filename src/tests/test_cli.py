@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from preprocesser.__main__ import main
+from preprocesser.models import EN_PreProcesser, PreProcesser
+
+TEXTS = ['Hola @user #tag sooo good!!! the 12', 'The cat is on the table 😀']
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lines = os.path.join(self.tmp.name, 'tweets.txt')
+        with open(self.lines, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(TEXTS) + '\n')
+        self.jsonl = os.path.join(self.tmp.name, 'tweets.jsonl')
+        with open(self.jsonl, 'w', encoding='utf-8') as f:
+            for i, text in enumerate(TEXTS):
+                f.write(json.dumps({'id': i, 'body': text}) + '\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *argv):
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            self.assertEqual(main(list(argv)), 0)
+        return out.getvalue(), err.getvalue()
+
+    def test_features(self):
+        out, _ = self._run('--lang', 'en', self.lines)
+        results = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(results,
+                         [json.loads(json.dumps(EN_PreProcesser()(text)))
+                          for text in TEXTS])
+
+    def test_text_only_and_flags(self):
+        out, _ = self._run('--text-only', '--punctuation', '--no-tolower',
+                           '--batch-size', '1', self.lines)
+        p = PreProcesser(punctuation=True, tolower=False)
+        self.assertEqual(out.splitlines(), [p.clean(text) for text in TEXTS])
+
+    def test_jsonl_input_and_output_file(self):
+        output = os.path.join(self.tmp.name, 'out.txt')
+        self._run('--text-field', 'body', '--text-only', '--lang', 'en',
+                  self.jsonl, '-o', output)
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(),
+                             [EN_PreProcesser().clean(text)
+                              for text in TEXTS])
+
+    def test_stats(self):
+        _, err = self._run('--stats', '--text-only', self.lines)
+        stats = json.loads(err)
+        self.assertEqual(stats['texts'], 2)
+        self.assertEqual(stats['steps']['toLower']['calls'], 2)
+
+    def test_explain(self):
+        out, _ = self._run('--explain', '--lang', 'en', '--punctuation')
+        self.assertEqual(out.strip(),
+                         EN_PreProcesser({'punctuation': True}).explain())
+
+    def test_unsupported_language(self):
+        err = io.StringIO()
+        with redirect_stderr(err), self.assertRaises(SystemExit) as raised:
+            main(['--lang', 'xx', self.lines])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("Unsupported language 'xx'", err.getvalue())
+
+    def test_does_not_import_pandas(self):
+        code = ('import sys; from preprocesser.__main__ import main; '
+                'main(["--jobs", "2", "--text-only", sys.argv[1]]); '
+                'sys.stderr.write(str("pandas" in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code, self.lines],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(
+                                    os.path.abspath(__file__))))
+        self.assertEqual(len(result.stdout.splitlines()), 2)
+        self.assertEqual(result.stderr, 'False')
@@ -0,0 +1,73 @@
+import unittest
+from array import array
+from preprocesser.models import (PreProcesser,
+                                 EN_PreProcesser,
+                                 ObjectColumn,
+                                 RaggedColumn,
+                                 StringColumn,
+                                 regex_step,
+                                 register_step,
+                                 unregister_step)
+
+TEXTS = [
+    '',
+    'Hola Como\n\nva mi pana @user\n\nQue tal',
+    '@nlozano @odelgado #whitebear some random text with #whitebear',
+    'Check https://t.co/abc!!! Sooooo goooood?? 😀😀 #x+y ✨',
+    'We paid $ 12 on 12/03/2020... and 2023 was great!!',
+    'the sun shines and the moon too',
+]
+
+
+class TestTransformBatch(unittest.TestCase):
+
+    def assertBatchEqual(self, p):
+        batch = p.transform_batch(TEXTS)
+        self.assertEqual(len(batch), len(TEXTS))
+        for i, text in enumerate(TEXTS):
+            self.assertEqual(batch.row(i), p(text))
+
+    def test_rows_match_call(self):
+        self.assertBatchEqual(PreProcesser())
+        self.assertBatchEqual(PreProcesser(use_placeholder=True,
+                                           punctuation=True))
+        self.assertBatchEqual(PreProcesser(remove_mentions=False))
+        self.assertBatchEqual(EN_PreProcesser())
+
+    def test_columns(self):
+        batch = EN_PreProcesser().transform_batch(TEXTS)
+        self.assertIsInstance(batch['text'], StringColumn)
+        self.assertIsInstance(batch['exclams'], array)
+        self.assertEqual(list(batch['exclams']), [0, 0, 0, 0, 1, 0])
+        self.assertIsInstance(batch['users'], RaggedColumn)
+        self.assertEqual(batch['users'][1], ['@user'])
+        self.assertEqual(batch['numbers.years'][4], ['2023'])
+        self.assertEqual(batch['successions.begin'][0], None)
+        self.assertEqual(batch['stopwords'].value(5),
+                         {'the': 2, 'and': 1, 'too': 1})
+
+    def test_registered_steps(self):
+        steps = [regex_step('removeHashes', 'remove_hashes', r'#\d+',
+                            key='hashes'),
+                 regex_step('removeSharps', 'remove_sharps', '#',
+                            key='sharps', collect='count')]
+        for step in steps:
+            register_step(step, before='removeUnicode')
+        try:
+            p = PreProcesser(remove_hashes=True, remove_sharps=True)
+            self.assertBatchEqual(p)
+            batch = p.transform_batch(['hi #12', 'hi #x #y'])
+            self.assertIsInstance(batch['hashes'], ObjectColumn)
+            self.assertEqual(batch['hashes'].to_list(), [['#12'], []])
+            self.assertEqual(batch['sharps'].to_list(), [0, 2])
+            self.assertEqual(batch.to_arrow()['hashes'].to_pylist(),
+                             [['#12'], []])
+            self.assertEqual(batch.to_pandas()['sharps'].tolist(), [0, 2])
+        finally:
+            for step in steps:
+                unregister_step(step.name)
+
+    def test_string_column(self):
+        column = StringColumn.from_strings(['ab', None, '', 'cde'])
+        self.assertEqual(column.data, 'abcde')
+        self.assertEqual(column.to_list(), ['ab', None, '', 'cde'])
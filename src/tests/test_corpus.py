@@ -0,0 +1,135 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+from preprocesser.data import Corpus, read_range
+from preprocesser.data import _corpus
+from preprocesser.features import ParallelExecutor, parallel_preprocessing
+from preprocesser.models import EN_PreProcesser
+
+TEXTS = (['Hola @user #tag sooo good!!! {}'.format(i) for i in range(50)] +
+         ['', 'ฉันรัก mañana 😀', 'windows\r', '  '])
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'tweets.txt')
+        with open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write('\n'.join(TEXTS[:-2]) + '\nwindows\r\n  ')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_random_access(self):
+        texts = TEXTS[:-2] + ['windows', '  ']
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), len(texts))
+            self.assertEqual(list(corpus), texts)
+            self.assertEqual(corpus[51], texts[51])
+            self.assertEqual(corpus[-1], '  ')
+            self.assertEqual(corpus[10:20], texts[10:20])
+            self.assertEqual(corpus[::7], texts[::7])
+            self.assertEqual(corpus.take([3, 1, 52]),
+                             [texts[3], texts[1], texts[52]])
+            self.assertEqual(len(set(corpus.sample(10, seed=0))), 10)
+            self.assertEqual(corpus.sample(10, seed=0),
+                             corpus.sample(10, seed=0))
+            with self.assertRaises(IndexError):
+                corpus[len(texts)]
+
+    def test_index_is_persisted(self):
+        Corpus(self.path).close()
+        self.assertTrue(os.path.exists(self.path + '.idx.npy'))
+        with mock.patch.object(_corpus, 'build_index') as build_index:
+            corpus = Corpus(self.path)
+        build_index.assert_not_called()
+        self.assertEqual(len(corpus), len(TEXTS))
+        corpus.close()
+
+    def test_index_is_rebuilt(self):
+        Corpus(self.path).close()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\nnew')
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), len(TEXTS) + 1)
+            self.assertEqual(corpus[-1], 'new')
+
+    def test_index_of_a_rewritten_file_is_rebuilt(self):
+        Corpus(self.path).close()
+        index_mtime = os.stat(self.path + '.idx.npy').st_mtime_ns
+        with open(self.path, 'r+b') as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data.replace(b'\n', b' ', 1)
+                    .replace(b'good', b'go\nd', 1))
+        # The same size and an older modification time than the index
+        os.utime(self.path, ns=(index_mtime - 10 ** 9,) * 2)
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), len(TEXTS))
+            self.assertEqual(corpus[0], 'Hola @user #tag sooo go')
+            self.assertEqual(corpus[1], 'd!!! 0 ' + TEXTS[1])
+
+    def test_index_blocks(self):
+        expected = _corpus.build_index(self.path)
+        with mock.patch.object(_corpus, 'BLOCK_SIZE', 7):
+            self.assertEqual(_corpus.build_index(self.path).tolist(),
+                             expected.tolist())
+
+    def test_byte_ranges(self):
+        with Corpus(self.path) as corpus:
+            ranges = corpus.byte_ranges(16)
+            self.assertEqual([records for records, _, _ in ranges],
+                             [16, 16, 16, 6])
+            texts = [text for _, start, stop in ranges
+                     for text in read_range(self.path, start, stop)]
+            self.assertEqual(texts, list(corpus))
+
+    def test_jsonl(self):
+        path = os.path.join(self.tmp.name, 'tweets.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i, text in enumerate(TEXTS[:5]):
+                f.write(json.dumps({'id': i, 'body': text}) + '\n')
+        with Corpus(path, text_field='body', persist=False) as corpus:
+            self.assertEqual(corpus.format, 'jsonl')
+            self.assertEqual(list(corpus), TEXTS[:5])
+        self.assertFalse(os.path.exists(path + '.idx.npy'))
+
+    def test_empty_and_compressed(self):
+        path = os.path.join(self.tmp.name, 'empty.txt')
+        open(path, 'w').close()
+        with Corpus(path) as corpus:
+            self.assertEqual(len(corpus), 0)
+            self.assertEqual(list(corpus), [])
+        with self.assertRaises(ValueError):
+            Corpus(self.path + '.gz')
+
+    def test_pickle(self):
+        with Corpus(self.path) as corpus:
+            copy = pickle.loads(pickle.dumps(corpus))
+            self.assertEqual(list(copy), list(corpus))
+            copy.close()
+
+    def test_parallel_preprocessing(self):
+        p = EN_PreProcesser()
+        with Corpus(self.path) as corpus:
+            expected = [p(text) for text in corpus]
+            results = parallel_preprocessing(p, corpus, njobs=2)
+            self.assertEqual(list(results), expected)
+            with self.assertRaises(ValueError):
+                parallel_preprocessing(p, corpus, njobs=2, dedup=True)
+            with ParallelExecutor(p, njobs=2, chunksize=8,
+                                  shared_memory=True) as executor:
+                self.assertEqual(executor.map(corpus, text_only=True),
+                                 [p.clean(text) for text in corpus])
+                unordered = executor.imap(corpus, ordered=False)
+                self.assertCountEqual(
+                    [json.dumps(r, sort_keys=True) for r in unordered],
+                    [json.dumps(r, sort_keys=True) for r in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import csv
+import gzip
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from preprocesser.data import make_dataset, read_chunks
+from preprocesser.data import _make_dataset
+from preprocesser.data._make_dataset import infer_format
+from preprocesser.models import (EN_PreProcesser, regex_step,
+                                 register_step, unregister_step)
+
+HAS_ARROW = all(importlib.util.find_spec(name) is not None
+                for name in ('pandas', 'pyarrow'))
+
+TEXTS = ['Hola @user #tag sooo good!!! {}'.format(i) for i in range(95)]
+
+
+class TestInferFormat(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEqual(infer_format('raw/tweets.csv'), 'csv')
+        self.assertEqual(infer_format('raw/tweets.jsonl.gz'), 'jsonl')
+        self.assertEqual(infer_format('raw/tweets.parquet'), 'parquet')
+        with self.assertRaises(ValueError):
+            infer_format('raw/tweets.xlsx')
+
+
+@unittest.skipUnless(HAS_ARROW, 'pandas or pyarrow is not installed')
+class TestReadChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertSkipped(self, path, batch_size=4):
+        chunks = [df['id'].fillna(-1).tolist()
+                  for df in read_chunks(path, batch_size, columns=['id'])]
+        for skip in range(len(chunks) + 1):
+            with self.subTest(path=path, skip=skip):
+                self.assertEqual([df['id'].fillna(-1).tolist()
+                                  for df in read_chunks(path, batch_size,
+                                                        columns=['id'],
+                                                        skip=skip)],
+                                 chunks[skip:])
+        return chunks
+
+    def test_csv(self):
+        path = os.path.join(self.tmp.name, 'tweets.csv')
+        with open(path, 'w', newline='') as f:
+            f.write('id,text\n0,"a\nb"\n1,c\n\n2,d\n3,"e\n\nf"\n4,g\n'
+                    '\n,\n5,h\n6,i\n\n\n')
+        chunks = self.assertSkipped(path, batch_size=3)
+        # The blank lines and empty rows are kept, but not the blank
+        # lines at the end
+        self.assertEqual(sum(chunks, []), [0, 1, -1, 2, 3, 4, -1, -1, 5, 6])
+
+    def test_jsonl(self):
+        path = os.path.join(self.tmp.name, 'tweets.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for i, text in enumerate(TEXTS[:10]):
+                f.write(json.dumps({'id': i, 'text': text}) + '\n')
+                if i == 3:
+                    f.write('\n')
+        chunks = self.assertSkipped(path)
+        self.assertEqual(sum(chunks, []), list(range(10)))
+
+    def test_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        path = os.path.join(self.tmp.name, 'tweets.parquet')
+        pq.write_table(pa.table({'id': range(23), 'text': TEXTS[:23]}),
+                       path, row_group_size=5)
+        chunks = self.assertSkipped(path)
+        self.assertEqual(sum(chunks, []), list(range(23)))
+
+
+@unittest.skipUnless(HAS_ARROW, 'pandas or pyarrow is not installed')
+class TestMakeDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, 'tweets.csv')
+        with open(self.input_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'text'])
+            writer.writerows(enumerate(TEXTS))
+        self.output_path = os.path.join(self.tmp.name, 'processed')
+        self.p = EN_PreProcesser()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _read(self):
+        return self._read_parts().sort_values('id')
+
+    def _read_parts(self):
+        import pandas as pd
+        return pd.read_parquet(self.output_path)
+
+    def test_features(self):
+        summary = make_dataset(self.p, self.input_path, self.output_path,
+                               keep_columns=['id'], batch_size=20)
+        self.assertEqual(summary['parts'], 5)
+        self.assertEqual(summary['rows'], len(TEXTS))
+        df = self._read()
+        self.assertEqual(df['text'].tolist(),
+                         [self.p(text)['text'] for text in TEXTS])
+        self.assertEqual(df['id'].tolist(), list(range(len(TEXTS))))
+
+    def test_registered_step(self):
+        register_step(regex_step('removeDigits', 'remove_digits', r'\d+',
+                                 key='digits'), before='removeUnicode')
+        self.addCleanup(unregister_step, 'removeDigits')
+        p = EN_PreProcesser({'remove_digits': True})
+        for njobs in (1, 2):
+            make_dataset(p, self.input_path, self.output_path,
+                         keep_columns=['id'], batch_size=40, njobs=njobs)
+            df = self._read()
+            self.assertEqual(df['digits'].map(list).tolist(),
+                             [[str(i)] for i in range(len(TEXTS))])
+            self.assertEqual(df['text'].tolist(),
+                             [p(text)['text'] for text in TEXTS])
+
+    def test_empty_rows_are_kept(self):
+        with open(self.input_path, 'w', newline='') as f:
+            f.write('id,text\n0,hola\n1,\n,\n3,adios\n')
+        summary = make_dataset(self.p, self.input_path, self.output_path,
+                               keep_columns=['id'], batch_size=20,
+                               text_only=True)
+        self.assertEqual(summary['rows'], 4)
+        self.assertEqual(self._read_parts()['text'].tolist(),
+                         ['hola', '', '', 'adios'])
+
+    def test_text_only(self):
+        make_dataset(self.p, self.input_path, self.output_path,
+                     keep_columns=['id'], batch_size=20, text_only=True)
+        df = self._read()
+        self.assertEqual(list(df.columns), ['id', 'text'])
+        self.assertEqual(df['text'].tolist(),
+                         [self.p.clean(text) for text in TEXTS])
+
+    def test_resume(self):
+        calls = []
+        transform_batch = self.p.transform_batch
+
+        def crash_on_third_part(texts):
+            calls.append(texts)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return transform_batch(texts)
+
+        self.p.transform_batch = crash_on_third_part
+        with self.assertRaises(KeyboardInterrupt):
+            make_dataset(self.p, self.input_path, self.output_path,
+                         keep_columns=['id'], batch_size=20)
+
+        with mock.patch.object(_make_dataset, 'read_chunks',
+                               wraps=read_chunks) as reader:
+            summary = make_dataset(EN_PreProcesser(), self.input_path,
+                                   self.output_path, keep_columns=['id'],
+                                   batch_size=20)
+        # The parts done are not read again
+        self.assertEqual(reader.call_args.kwargs['skip'], 2)
+        self.assertEqual(summary['resumed_parts'], 2)
+        self.assertEqual(summary['rows'], len(TEXTS))
+        self.assertEqual(self._read()['id'].tolist(),
+                         list(range(len(TEXTS))))
+        # Nothing is left to do once every part is written
+        summary = make_dataset(self.p, self.input_path, self.output_path,
+                               keep_columns=['id'], batch_size=20)
+        self.assertEqual((summary['parts'], summary['resumed_parts']),
+                         (5, 5))
+        self.assertEqual(len(self._read()), len(TEXTS))
+
+    def test_checkpoint_of_another_run(self):
+        make_dataset(self.p, self.input_path, self.output_path,
+                     batch_size=20)
+        with self.assertRaises(ValueError):
+            make_dataset(self.p, self.input_path, self.output_path,
+                         batch_size=30)
+        summary = make_dataset(self.p, self.input_path, self.output_path,
+                               batch_size=30, resume=False)
+        self.assertEqual(summary['parts'], 4)
+
+    def test_other_parts_are_not_removed(self):
+        os.makedirs(self.output_path)
+        other = os.path.join(self.output_path, 'part-00000.parquet')
+        open(other, 'w').close()
+        for resume in (True, False):
+            with self.assertRaises(ValueError):
+                make_dataset(self.p, self.input_path, self.output_path,
+                             batch_size=20, resume=resume)
+        self.assertTrue(os.path.exists(other))
+
+        os.remove(other)
+        make_dataset(self.p, self.input_path, self.output_path,
+                     batch_size=20)
+        other = os.path.join(self.output_path, 'part-00099.parquet')
+        open(other, 'w').close()
+        with self.assertRaises(ValueError):
+            make_dataset(self.p, self.input_path, self.output_path,
+                         batch_size=30, resume=False)
+        self.assertTrue(os.path.exists(other))
+        self.assertEqual(len(os.listdir(self.output_path)), 7)
@@ -0,0 +1,132 @@
+import importlib.util
+import unittest
+from preprocesser.models import EN_PreProcesser
+
+HAS_PANDAS = importlib.util.find_spec('pandas') is not None
+
+TEXTS = ['Hola @user #tag sooo good!!! {}'.format(i) for i in range(500)]
+
+
+@unittest.skipUnless(HAS_PANDAS, 'pandas is not installed')
+class TestParallelExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from preprocesser.features import ParallelExecutor
+        cls.p = EN_PreProcesser()
+        cls.expected = [cls.p(text) for text in TEXTS]
+        cls.executor = ParallelExecutor(cls.p, njobs=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def test_map(self):
+        self.assertEqual(self.executor.map(TEXTS), self.expected)
+
+    def test_imap_from_iterator(self):
+        results = list(self.executor.imap(iter(TEXTS)))
+        self.assertEqual(results, self.expected)
+
+    def test_imap_unordered(self):
+        results = list(self.executor.imap(TEXTS, ordered=False,
+                                          chunksize=7))
+        self.assertEqual(sorted(r['raw_text'] for r in results),
+                         sorted(TEXTS))
+
+    def test_parallel_preprocessing_reuses_executor(self):
+        from preprocesser.features import parallel_preprocessing
+        results = parallel_preprocessing(self.p, TEXTS,
+                                         executor=self.executor)
+        self.assertEqual(list(results), self.expected)
+
+    def test_text_only(self):
+        results = self.executor.map(TEXTS, text_only=True)
+        self.assertEqual(results, [r['text'] for r in self.expected])
+
+    def test_profiles_are_merged(self):
+        from preprocesser.features import parallel_preprocessing
+        p = EN_PreProcesser({'profiling': True})
+        p(TEXTS[0])
+        parallel_preprocessing(p, TEXTS, njobs=2)
+        self.assertEqual(p.profile.steps['removeUrls'].calls,
+                         len(TEXTS) + 1)
+
+    def test_cache(self):
+        from preprocesser.features import parallel_preprocessing
+        p = EN_PreProcesser({'cache': True})
+        texts = TEXTS[:50] * 4
+        results = parallel_preprocessing(p, texts, njobs=2)
+        self.assertEqual(list(results), self.expected[:50] * 4)
+        self.assertEqual(len(p.cache), 50)
+
+    def test_dedup(self):
+        from preprocesser.features import parallel_preprocessing
+        texts = TEXTS[:20] * 5
+        results = parallel_preprocessing(self.p, texts, dedup=True,
+                                         executor=self.executor)
+        self.assertEqual(list(results), self.expected[:20] * 5)
+        # The duplicates do not share their result
+        results[0]['users'].append('@other')
+        self.assertEqual(results[20], self.expected[0])
+
+    def test_closed_executor(self):
+        from preprocesser.features import ParallelExecutor
+        with ParallelExecutor(self.p, njobs=1) as executor:
+            executor.map(TEXTS[:10])
+        with self.assertRaises(ValueError):
+            executor.map(TEXTS[:10])
+
+
+@unittest.skipUnless(HAS_PANDAS, 'pandas is not installed')
+class TestStreamPreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        self.p = EN_PreProcesser()
+        self.expected = [self.p(text) for text in TEXTS]
+
+    def test_sequential_batches(self):
+        from preprocesser.features import stream_preprocessing
+        batches = list(stream_preprocessing(self.p, iter(TEXTS),
+                                            batch_size=64))
+        self.assertTrue(all(len(batch) <= 64 for batch in batches))
+        self.assertEqual(sum(batches, []), self.expected)
+
+    def test_parallel_batches(self):
+        from preprocesser.features import stream_preprocessing
+        batches = stream_preprocessing(self.p, (t for t in TEXTS),
+                                       batch_size=100, njobs=2)
+        self.assertEqual(sum(batches, []), self.expected)
+
+    def test_input_is_read_lazily(self):
+        from preprocesser.features import stream_preprocessing
+        consumed = []
+
+        def texts():
+            for text in TEXTS:
+                consumed.append(text)
+                yield text
+
+        batches = stream_preprocessing(self.p, texts(), batch_size=10)
+        next(batches)
+        self.assertEqual(len(consumed), 10)
+
+
+@unittest.skipUnless(HAS_PANDAS, 'pandas is not installed')
+class TestSequentialPreprocessing(unittest.TestCase):
+
+    def test_dedup(self):
+        from preprocesser.features import sequential_preprocessing
+        p = EN_PreProcesser()
+        texts = TEXTS[:20] * 5
+        for text_only in (False, True):
+            with self.subTest(text_only=text_only):
+                self.assertEqual(
+                    list(sequential_preprocessing(p, texts, dedup=True,
+                                                  text_only=text_only)),
+                    list(sequential_preprocessing(p, texts,
+                                                  text_only=text_only)))
+        results = sequential_preprocessing(p, texts, dedup=True)
+        results[0]['text'] = ''
+        results[0]['users'].append('@other')
+        self.assertEqual(results[20], p(texts[20]))
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds to import preprocesser.models in a fresh interpreter, the best
+# of a few runs. It takes ~50ms, the budget leaves room for slow CI
+# machines but not for pkg_resources or pandas
+IMPORT_BUDGET = 0.3
+
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'pkg_resources', 'sqlite3',
+                 'multiprocessing']
+
+
+def _import(statement):
+    code = ('import json, sys, time; t1 = time.perf_counter(); '
+            f'{statement}; elapsed = time.perf_counter() - t1; '
+            'print(json.dumps([elapsed, sorted(sys.modules)]))')
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True, check=True,
+                            cwd=SRC)
+    return json.loads(result.stdout)
+
+
+class TestImports(unittest.TestCase):
+
+    def test_models_import_budget(self):
+        elapsed = min(_import('import preprocesser.models')[0]
+                      for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+    def test_models_does_not_import_heavy_modules(self):
+        _, modules = _import('import preprocesser.models')
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, modules)
+
+    def test_package_does_not_import_subpackages(self):
+        _, modules = _import('import preprocesser')
+        self.assertNotIn('preprocesser.models', modules)
+        self.assertNotIn('preprocesser.features', modules)
+
+    def test_lazy_attributes(self):
+        _, modules = _import('from preprocesser.models import ResultCache')
+        self.assertIn('preprocesser.models._cache', modules)
+        self.assertNotIn('preprocesser.models._columnar', modules)
+
+        _, modules = _import('import preprocesser; preprocesser.models')
+        self.assertIn('preprocesser.models', modules)
+
+    def test_unknown_attribute(self):
+        import preprocesser
+        import preprocesser.data
+        import preprocesser.models
+
+        for module in (preprocesser, preprocesser.data, preprocesser.models):
+            with self.assertRaises(AttributeError):
+                module.missing
+
+    def test_dir(self):
+        import preprocesser.data
+        import preprocesser.models
+
+        self.assertIn('ColumnarBatch', dir(preprocesser.models))
+        self.assertIn('make_dataset', dir(preprocesser.data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import pickle
+import unittest
+from preprocesser.data import available_languages
+from preprocesser.models import (EN_PreProcesser,
+                                 ES_PreProcesser,
+                                 LangPreProcesser,
+                                 PreProcesser,
+                                 get_preprocesser,
+                                 preprocess_by_language,
+                                 preprocesser_factory)
+
+TEXTS = ['The cat is on the table!!!', 'El gato está en la mesa @user',
+         'Le chat est sur la table #chat', 'Die Katze ist auf dem Tisch']
+
+
+class TestLangPreProcesser(unittest.TestCase):
+
+    def test_every_language(self):
+        for lang in available_languages():
+            with self.subTest(lang=lang):
+                p = preprocesser_factory(lang)()
+                self.assertEqual(p.lang, lang)
+                self.assertIn('stopwords', p(TEXTS[0]))
+
+    def test_subclasses(self):
+        for cls, lang in ((EN_PreProcesser, 'en'), (ES_PreProcesser, 'es')):
+            generic = LangPreProcesser(lang, {'punctuation': True})
+            p = cls({'punctuation': True})
+            self.assertIsInstance(p, LangPreProcesser)
+            for text in TEXTS:
+                self.assertEqual(p(text), generic(text))
+
+    def test_unsupported_language(self):
+        with self.assertRaises(ValueError):
+            LangPreProcesser('xx')
+        with self.assertRaises(ValueError):
+            preprocesser_factory('xx')
+
+    def test_pickle(self):
+        p = LangPreProcesser('fr')
+        self.assertEqual(pickle.loads(pickle.dumps(p))(TEXTS[2]),
+                         p(TEXTS[2]))
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_instances_are_shared(self):
+        self.assertIs(get_preprocesser('de'), get_preprocesser('de', {}))
+        self.assertIs(get_preprocesser('de', {'keep_features': ['urls']}),
+                      get_preprocesser('de', {'keep_features': ['urls']}))
+        self.assertIsNot(get_preprocesser('de'),
+                         get_preprocesser('de', {'text_only': True}))
+        self.assertIsInstance(get_preprocesser(None), PreProcesser)
+
+    def test_preprocess_by_language(self):
+        langs = ['en', 'es', 'fr', 'de']
+        results = preprocess_by_language(TEXTS, langs)
+        for text, lang, result in zip(TEXTS, langs, results):
+            self.assertEqual(result, LangPreProcesser(lang)(text))
+
+    def test_mixed_batch_order(self):
+        texts = TEXTS * 3
+        langs = ['en', None, 'fr', 'en'] * 3
+        results = preprocess_by_language(texts, langs, {'text_only': True})
+        self.assertEqual(results, [get_preprocesser(lang, {'text_only': True})
+                                   (text) for text, lang in zip(texts, langs)])
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            preprocess_by_language(TEXTS, ['en'])
@@ -0,0 +1,32 @@
+import re
+import unittest
+from preprocesser.models import (compile_pattern,
+                                 register_pattern,
+                                 get_pattern)
+
+
+class TestPatterns(unittest.TestCase):
+
+    def test_builtin_patterns_are_registered(self):
+        self.assertEqual(get_pattern('tag').findall('a #b #c'), ['#b', '#c'])
+        self.assertTrue(get_pattern('date').flags & re.IGNORECASE)
+
+    def test_compile_pattern_once(self):
+        self.assertIs(compile_pattern(r'\d+x'), compile_pattern(r'\d+x'))
+        self.assertIsNot(compile_pattern(r'\d+x'),
+                         compile_pattern(r'\d+x', re.IGNORECASE))
+
+    def test_register_pattern(self):
+        pattern = register_pattern('test_laughs', r'\b(?:ja){2,}\b')
+        self.assertIs(get_pattern('test_laughs'), pattern)
+        self.assertIs(register_pattern('test_laughs', r'\b(?:ja){2,}\b'),
+                      pattern)
+
+    def test_register_pattern_conflict(self):
+        register_pattern('test_conflict', r'a+')
+        with self.assertRaises(ValueError):
+            register_pattern('test_conflict', r'b+')
+
+    def test_unknown_pattern(self):
+        with self.assertRaises(KeyError):
+            get_pattern('unknown')
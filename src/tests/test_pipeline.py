@@ -0,0 +1,127 @@
+import random
+import unittest
+from preprocesser.models import PreProcesser, EN_PreProcesser, ES_PreProcesser
+from preprocesser.models._pipeline import STEPS
+
+TEXTS = [
+    '',
+    'Hola Como\n\nva mi pana @user\n\nQue tal',
+    '@nlozano @odelgado #whitebear some random text with #whitebear',
+    'Check https://t.co/abc!!! Sooooo goooood?? 😀😀 #x+y ✨',
+    'We paid $ 12 on 12/03/2020... and 2023 was great!!',
+    '&amp; \\u00e9 ฉันรัก mañana #ñ ##a+b @ß wow.....',
+    'aaa😀a !!😀!! 1😀2 #tag@user #@user',
+    'Llegamos el 12 Jan 2020 con 42 personas, ¡¡increíble!!',
+]
+
+
+def _fuzz(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = (list('aAb !?.#@:/1٣$') + ['\\u00e9', '&amp;', 'http://',
+                                          '😀', 'ñ', 'Jan ', 'ฉัน'] +
+                ['\t', '\n', '\r', '\x0b', '\x1c', '\x85', '\xa0', '　'])
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            for _ in range(n)]
+
+
+CONFIGS = [
+    {},
+    {'use_placeholder': True},
+    {'punctuation': True, 'remove_non_alph_char': True},
+    {'tolower': False, 'remove_emojis': False, 'remove_tags': False},
+]
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_feature_keys_order(self):
+        p = PreProcesser()
+        self.assertEqual(list(p('hola')),
+                         ['raw_text', 'urls', 'successions', 'users', 'tags',
+                          '#s', 'emojis', 'exclams', 'questions', 'stops',
+                          'elongateds', 'numbers', 'text'])
+
+    def test_disabled_steps(self):
+        p = PreProcesser(remove_mentions=False, remove_numbers=False,
+                         remove_multiple_exclamations=False)
+        features = p('hola!!!')
+        self.assertEqual(features['successions'], {})
+        self.assertEqual(features['numbers'], {})
+        self.assertNotIn('exclams', features)
+        self.assertEqual(features['text'], 'hola!!!')
+
+
+class TestSelectiveFeatures(unittest.TestCase):
+
+    def test_text_only(self):
+        for config in CONFIGS:
+            p = PreProcesser(**config)
+            text_only = PreProcesser(text_only=True, **config)
+            for text in TEXTS:
+                with self.subTest(config=config, text=text):
+                    self.assertEqual(text_only(text), p(text)['text'])
+                    self.assertEqual(p.clean(text), p(text)['text'])
+
+    def test_text_only_subclasses(self):
+        p = EN_PreProcesser()
+        text_only = EN_PreProcesser({'text_only': True})
+        for text in TEXTS:
+            self.assertEqual(text_only(text), p(text)['text'])
+        self.assertIsInstance(ES_PreProcesser({'text_only': True})('hola'),
+                              str)
+
+    def test_keep_features(self):
+        p = PreProcesser()
+        selective = PreProcesser(keep_features=['urls', 'emojis'])
+        for text in TEXTS:
+            with self.subTest(text=text):
+                features = p(text)
+                self.assertEqual(selective(text),
+                                 {key: features[key]
+                                  for key in ('raw_text', 'urls',
+                                              'emojis', 'text')})
+
+    def test_unknown_feature(self):
+        with self.assertRaises(ValueError):
+            PreProcesser(keep_features=['colors'])
+
+
+class TestTriggers(unittest.TestCase):
+
+    def test_skipped_steps_would_not_change_the_text(self):
+        p = PreProcesser(use_placeholder=True)
+        texts = TEXTS + _fuzz(3000)
+        for step in STEPS:
+            if step.trigger is None:
+                continue
+            for text in texts:
+                if step.trigger(text):
+                    continue
+                with self.subTest(step=step.name, text=text):
+                    self.assertEqual(step.func(text, p),
+                                     (text, step.empty(p)))
+
+    def test_same_output_as_without_triggers(self):
+        texts = TEXTS + _fuzz(500)
+        for config in CONFIGS:
+            p = PreProcesser(**config)
+            for text in texts:
+                values = {}
+                cleaned = text
+                for step in p._plan:
+                    cleaned, found = step.func(cleaned, p)
+                    values.update(zip(step.keys, found))
+                with self.subTest(config=config, text=text):
+                    features = p(text)
+                    self.assertEqual(features['text'], cleaned.strip())
+                    self.assertEqual(p.clean(text), cleaned.strip())
+                    for key, value in values.items():
+                        self.assertEqual(features[key], value)
+
+    def test_empty_features_are_not_shared(self):
+        p = EN_PreProcesser()
+        first = p('hola')
+        first['numbers']['dates'].append('12/03')
+        first['urls'].append('https://t.co')
+        self.assertEqual(p('hola')['numbers']['dates'], [])
+        self.assertEqual(p('hola')['urls'], [])
@@ -0,0 +1,153 @@
+import pickle
+import unittest
+from preprocesser.models import (PreProcesser, EN_PreProcesser, Plan,
+                                 get_step, regex_step, register_step,
+                                 unregister_step)
+from preprocesser.models import _planner
+from preprocesser.models._pipeline import STEPS, CleanStep, registry_version
+
+TEXTS = [
+    '',
+    'Hola   Como\n\nva mi pana @user\t\tQue tal',
+    'jajaja the cat is  on the table jijiji!!! 😀',
+    'JAJA jijijaja @user #tag sooo good!!! the 12',
+]
+
+
+def _laughs():
+    return [regex_step('removeLaughs', 'remove_laughs', '(?:ja){2,}',
+                       key='laughs'),
+            regex_step('removeGiggles', 'remove_giggles', '(?:ji){2,}',
+                       replacement='\\o/', key='giggles', collect='count')]
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.steps = _laughs()
+        for step in self.steps:
+            register_step(step, before='removeStopWords')
+
+    def tearDown(self):
+        for step in self.steps:
+            unregister_step(step.name)
+
+    def test_custom_steps(self):
+        p = PreProcesser(remove_laughs=True, remove_giggles=True)
+        features = p('jajaja the cat jijiji!!!')
+        self.assertEqual(features['laughs'], ['jajaja'])
+        self.assertEqual(features['giggles'], 1)
+        self.assertEqual(features['text'], 'the cat \\o/!')
+        self.assertEqual(list(features)[-3:], ['laughs', 'giggles', 'text'])
+        self.assertEqual(p.clean('jajaja the cat jijiji!!!'),
+                         features['text'])
+
+    def test_disabled_by_default(self):
+        p = PreProcesser()
+        self.assertNotIn('laughs', p('jajaja'))
+        self.assertEqual(p.clean('jajaja'), 'jajaja')
+
+    def test_pickle(self):
+        p = PreProcesser(remove_laughs=True)
+        self.assertEqual(pickle.loads(pickle.dumps(p))('jajaja hola'),
+                         p('jajaja hola'))
+
+    def test_conflicts(self):
+        for step in (regex_step('removeLaughs', 'other_flag', 'x'),
+                     regex_step('other', 'remove_laughs', 'x'),
+                     regex_step('other', 'other_flag', 'x', key='users')):
+            with self.assertRaises(ValueError):
+                register_step(step)
+        # The same step again does nothing
+        register_step(self.steps[0])
+        self.assertEqual(STEPS.count(self.steps[0]), 1)
+
+    def test_unregister(self):
+        with self.assertRaises(ValueError):
+            unregister_step('toLower')
+        with self.assertRaises(KeyError):
+            get_step('removeSneezes')
+
+    def test_unknown_keyword_argument(self):
+        with self.assertRaises(TypeError):
+            PreProcesser(remove_sneezes=True)
+
+
+class TestPlanner(unittest.TestCase):
+
+    def test_cached_per_configuration(self):
+        self.assertIs(PreProcesser().plan, PreProcesser().plan)
+        self.assertIsNot(PreProcesser().plan,
+                         PreProcesser(punctuation=True).plan)
+        self.assertIsInstance(PreProcesser().plan, Plan)
+
+    def test_older_plans_are_evicted(self):
+        PreProcesser()
+        for _ in range(3):
+            steps = _laughs()
+            for step in steps:
+                register_step(step)
+            PreProcesser(remove_laughs=True, remove_giggles=True)
+            for step in steps:
+                unregister_step(step.name)
+        PreProcesser()
+        versions = {key[0] for key in _planner._plans}
+        self.assertEqual(versions, {registry_version()})
+
+    def test_absorbed_step_is_dropped(self):
+        p = EN_PreProcesser()
+        names = [step.name for step in p.plan.steps]
+        self.assertNotIn('removeMultiWhiteSpace', names)
+        enabled = [step for step in STEPS if getattr(p, step.flag, False)]
+        self.assertIn(get_step('removeMultiWhiteSpace'), enabled)
+        for text in TEXTS:
+            expected = text
+            for step in enabled:
+                expected = step.clean(expected, p)
+            self.assertEqual(p.clean(text), expected)
+        # Its step still runs when nothing absorbs it
+        self.assertIn(get_step('removeMultiWhiteSpace'),
+                      PreProcesser().plan.steps)
+
+    def test_keep_features(self):
+        p = PreProcesser(keep_features=['users'])
+        cleaned = [step.name for step in p.plan.steps
+                   if isinstance(step, CleanStep)]
+        self.assertIn('removeTags', cleaned)
+        self.assertNotIn('replaceAtUser', cleaned)
+
+    def test_explain(self):
+        explain = EN_PreProcesser().explain()
+        self.assertIn('removeStopWords [stopwords]', explain)
+        self.assertIn('dropped removeMultiWhiteSpace: absorbed by '
+                      'removeStopWords', explain)
+        self.assertIn('text only',
+                      PreProcesser(keep_features=['users']).explain())
+
+    def test_flags_set_later(self):
+        q = PreProcesser(cache=True, profiling=True)
+        fingerprint = q._fingerprint
+        self.assertEqual(q('HELLO World')['text'], 'hello world')
+        q.tolower = False
+        self.assertEqual(q('HELLO World')['text'], 'HELLO World')
+        self.assertEqual(q.clean('HELLO World'), 'HELLO World')
+        self.assertNotIn('toLower', q.explain())
+        self.assertNotEqual(q._fingerprint, fingerprint)
+        # The profile keeps counting, toLower only ran before
+        self.assertEqual(q.profile.steps['removeUrls'].calls, 3)
+        self.assertEqual(q.profile.steps['toLower'].calls, 1)
+
+        q.keep_features = ['users']
+        self.assertEqual(list(q('@user hola')), ['raw_text', 'users', 'text'])
+
+        p = EN_PreProcesser()
+        p.remove_stopwords = False
+        self.assertEqual(p.clean('the cat'), 'the cat')
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            PreProcesser(keep_features=['laughs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import pickle
+import unittest
+from preprocesser.models import (EN_PreProcesser, PreProcesser, Profile,
+                                 regex_step, register_step, unregister_step)
+from preprocesser.models._profiling import ProfiledStep, count_matches
+
+TEXTS = ['Hola @user #tag https://t.co/abc sooo good!!! 12 2020 😀😀',
+         'the cat is on the table',
+         '']
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_same_output(self):
+        for config in ({}, {'text_only': True},
+                       {'keep_features': ['urls']}):
+            p = EN_PreProcesser(config)
+            profiled = EN_PreProcesser({**config, 'profiling': True})
+            for text in TEXTS:
+                with self.subTest(config=config, text=text):
+                    self.assertEqual(profiled(text), p(text))
+
+    def test_disabled_by_default(self):
+        p = PreProcesser()
+        self.assertIsNone(p.profile)
+        self.assertFalse(any(isinstance(step, ProfiledStep)
+                             for step in p._plan))
+
+    def test_stats(self):
+        p = EN_PreProcesser({'profiling': True})
+        stopwords = sum(sum(p(text)['stopwords'].values()) for text in TEXTS)
+        stats = p.profile.to_dict()
+        self.assertEqual(stats['removeUrls']['calls'], 3)
+        self.assertEqual(stats['removeUrls']['matches'], 1)
+        self.assertEqual(stats['removeUnicode']['chars_in'],
+                         sum(map(len, TEXTS)))
+        self.assertEqual(stats['replaceMultiExclamationMark']['matches'], 1)
+        self.assertEqual(stats['removeNumbers']['matches'], 2)
+        self.assertEqual(stats['removeStopWords']['matches'], stopwords)
+        self.assertGreater(stats['removeNumbers']['seconds'], 0)
+
+    def test_skips(self):
+        p = EN_PreProcesser({'profiling': True})
+        for text in TEXTS:
+            p(text)
+            p.clean(text)
+        stats = p.profile.to_dict()
+        # Only the first text has a url, emojis or repeated marks
+        self.assertEqual(stats['removeUrls']['skips'], 4)
+        self.assertEqual(stats['removeEmojis']['skip_rate'], 4 / 6)
+        self.assertEqual(stats['replaceMultiExclamationMark']['skips'], 4)
+        self.assertEqual(stats['toLower']['skips'], 0)
+        self.assertEqual(stats['toLower']['skip_rate'], 0.0)
+
+    def test_trigger_runs_once(self):
+        texts = []
+
+        def trigger(text):
+            texts.append(text)
+            return 'ja' in text
+
+        register_step(regex_step('removeLaughs', 'remove_laughs', '(?:ja)+',
+                                 key='laughs', trigger=trigger))
+        try:
+            p = PreProcesser(profiling=True, remove_laughs=True)
+            for text in ('jaja hola', 'hola'):
+                p(text)
+                p.clean(text)
+        finally:
+            unregister_step('removeLaughs')
+        self.assertEqual(len(texts), 4)
+        self.assertEqual(p.profile.steps['removeLaughs'].skips, 2)
+
+    def test_merge_and_reset(self):
+        p = PreProcesser(profiling=True)
+        p(TEXTS[0])
+        profile = Profile()
+        profile.merge(p.profile)
+        profile.merge(p.profile.to_dict())
+        self.assertEqual(profile.steps['toLower'].calls, 2)
+        self.assertEqual(p.profile.pop()['toLower']['calls'], 1)
+        self.assertEqual(p.profile.steps['toLower'].calls, 0)
+        p(TEXTS[0])
+        self.assertEqual(p.profile.steps['toLower'].calls, 1)
+
+    def test_export(self):
+        p = PreProcesser(profiling=True)
+        p(TEXTS[0])
+        exported = {}
+        p.profile.export(exported.__setitem__)
+        self.assertEqual(exported, json.loads(p.profile.to_json()))
+
+    def test_pickle(self):
+        p = PreProcesser(profiling=True, use_placeholder=True)
+        p(TEXTS[0])
+        copy = pickle.loads(pickle.dumps(p))
+        copy(TEXTS[0])
+        self.assertEqual(copy.profile.steps['toLower'].calls, 2)
+        self.assertEqual(p.profile.steps['toLower'].calls, 1)
+
+    def test_count_matches(self):
+        self.assertEqual(count_matches(['a', 'b']), 2)
+        self.assertEqual(count_matches(3), 3)
+        self.assertEqual(count_matches({'begin': '@a ', 'end': None}), 1)
+        self.assertEqual(count_matches({'dates': ['x'], 'other': ['1']}), 2)
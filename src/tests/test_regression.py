@@ -0,0 +1,369 @@
+import re
+import string
+import random
+import time
+import unicodedata
+import unittest
+from collections import Counter
+from functools import partial
+from unittest import mock
+from preprocesser.data import stopword_registry
+from preprocesser.models import _base, _patterns
+from preprocesser.models._patterns import UNICODES
+
+EMOJI_PATTERN = re.compile(
+    "["
+    "\U0001F1E0-\U0001F1FF"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F600-\U0001F64F"
+    "\U0001F680-\U0001F6FF"
+    "\U0001F700-\U0001F77F"
+    "\U0001F780-\U0001F7FF"
+    "\U0001F800-\U0001F8FF"
+    "\U0001F900-\U0001F9FF"
+    "\U0001FA00-\U0001FA6F"
+    "\U0001FA70-\U0001FAFF"
+    "\U00002702-\U000027B0"
+    "]+"
+)
+
+
+def _replace_all(text, items, replacement):
+    for item in items:
+        text = text.replace(item, replacement)
+    return text
+
+
+def _replace_each(text, items, replacement):
+    """
+    Replaces every match once, as the helpers do, instead of every
+    occurrence of its text
+    """
+    for item in items:
+        text = text.replace(item, replacement, 1)
+    return text
+
+
+# Reference implementations, the findall-then-replace loops the helpers
+# were originally written with.
+# The ones built on `_replace_all` take the function that replaces the
+# matches as `replace`.
+
+def legacy_removeTags(text, placeholder="TAG", use_placeholder=True,
+                      replace=_replace_all):
+    tags = re.findall(r'#\w+', text)
+    text = replace(text, tags, placeholder if use_placeholder else "")
+    return text, {"tags": tags}
+
+
+def legacy_removeUrls(text, placeholder="URL", use_placeholder=True,
+                      replace=_replace_all):
+    urls = re.findall(
+        "http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]"
+        "|(?:%[0-9a-fA-F][0-9a-fA-F]))+", text)
+    text = replace(text, urls, placeholder if use_placeholder else "")
+    return text, {"urls": urls}
+
+
+def legacy_replaceAtUser(text, placeholder="atUser", use_placeholder=False,
+                         replace=_replace_all):
+    users = re.findall(r"@[\w+" + UNICODES + "]+", text)
+    text = replace(text, users, placeholder if use_placeholder else "")
+    return text, {"users": users}
+
+
+def legacy_removeHashtagInFrontOfWord(text):
+    hts = re.findall(r"#[\w+" + UNICODES + "]+", text)
+    for ht in hts:
+        text = text.replace(ht, ht[1:])
+    return text, {"#s": hts}
+
+
+def legacy_replaceMultiExclamationMark(text):
+    exclams = re.findall(r"(\!)\1+", text)
+    return re.sub(r"(\!)\1+", r"!", text), {"exclams": len(exclams)}
+
+
+def legacy_replaceElongated(text):
+    pattern = fr"([a-zA-Z{UNICODES}])\1{{2,}}"
+    elongateds = re.findall(pattern, text)
+    for _ in elongateds:
+        text = re.sub(pattern, r"\1", text)
+    return text, {"elongateds": len(elongateds)}
+
+
+def legacy_removeEmojis(text, placeholder="EMOJI", use_placeholder=True,
+                        replace=_replace_all):
+    emojis = EMOJI_PATTERN.findall(text)
+    text = replace(text, emojis, placeholder if use_placeholder else "")
+    return text, {"emojis": emojis}
+
+
+def legacy_removeNumbers(text, use_placeholder=False, replace=_replace_all):
+    pattern = r'\d{1,4}[-/ ]\d{1,4}[-/ ]\d{2,4}|(?:\d{1,2}[-/ ])?(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[-/ ]\d{1,4}'
+    dates = re.findall(pattern, text, re.IGNORECASE)
+    text = replace(text, dates, "DATEMENTION" if use_placeholder else "")
+    prices = re.findall(
+        r"""(?:[$€¥£₩]\s*(?:\d+[\. ,])?\d+(?:[, \.]\d+)?
+        |(?:\d+[\. ,])?\d+(?:[, \.]\d+)?\s*[$€¥£₩])""", text)
+    text = replace(text, prices, "PRICEMENTION" if use_placeholder else "")
+    years = re.findall(r"[\d]{4}", text)
+    text = replace(text, years, "YYYY" if use_placeholder else "")
+    numbers = re.findall(r"\b\d+\b", text)
+    text = replace(text, numbers, "NUM" if use_placeholder else "")
+    return text, {"dates": dates, "years": years,
+                  "prices": prices, "other": numbers}
+
+
+def legacy_removePunctuation(text):
+    pattern = f'[{string.punctuation}¡¿]+'
+    punctuation = re.findall(pattern, text)
+    for _ in punctuation:
+        text = re.sub(pattern, r" ", text)
+    return text, {"punctuation": punctuation}
+
+
+def legacy_removeNonAlphChar(text):
+    cleaned_text = ""
+    for character in text:
+        cleaned_text += (character
+                         if unicodedata.category(character)[0]
+                         in "LZNM" else " ")
+    return " ".join(cleaned_text.split())
+
+
+def legacy_removeStopWords(text, lang, stopwords):
+    filtered_tokens = [token for token in text.split()
+                       if not token.lower() in stopwords]
+    found_stopwords = [token for token in text.split()
+                       if token.lower() in stopwords]
+    return ' '.join(filtered_tokens), {'stopwords':
+                                       dict(Counter(found_stopwords))}
+
+
+TOKENS = ["hola", "Como", "@user", "@nlozano", "#tag", "#whitebear",
+          "#x+y", "http://a.co/x", "https://t.co/abc", "!!!", "??", "...",
+          "!", "YEEEES", "sooo", "😀", "✨", "😀😀", "✨😀", "12/03/2020",
+          "$ 12", "12$", "2023", "42", "Jan 2020", "ฉันรัก", ",", "mañana",
+          "#ñ", "@ß", "¡¿", "the"]
+
+
+def corpus(size, seed=0):
+    rng = random.Random(seed)
+    for _ in range(size):
+        yield " ".join(rng.choice(TOKENS)
+                       for _ in range(rng.randint(0, 15)))
+
+
+def rewrites_outside_matches(text, items):
+    """
+    True when the legacy str.replace loop also rewrites text that was
+    not matched, e.g. '@ab' inside '@abc'.
+    """
+    return any(text.count(item) != items.count(item) for item in items)
+
+
+# The references that replace every match once, as the helpers do,
+# for the texts where the legacy loops also rewrite outside the matches
+removeTags_each = partial(legacy_removeTags, replace=_replace_each)
+removeUrls_each = partial(legacy_removeUrls, replace=_replace_each)
+replaceAtUser_each = partial(legacy_replaceAtUser, replace=_replace_each)
+removeEmojis_each = partial(legacy_removeEmojis, replace=_replace_each)
+removeNumbers_each = partial(legacy_removeNumbers, replace=_replace_each)
+
+# (helper, legacy, reference replacing each match once, kwargs)
+CASES = [
+    (_base.removeTags, legacy_removeTags, removeTags_each,
+     {"use_placeholder": False}),
+    (_base.removeTags, legacy_removeTags, removeTags_each, {}),
+    (_base.removeUrls, legacy_removeUrls, removeUrls_each,
+     {"use_placeholder": False}),
+    (_base.replaceAtUser, legacy_replaceAtUser, replaceAtUser_each,
+     {"use_placeholder": True}),
+    (_base.replaceAtUser, legacy_replaceAtUser, replaceAtUser_each, {}),
+    (_base.removeHashtagInFrontOfWord,
+     legacy_removeHashtagInFrontOfWord, legacy_removeHashtagInFrontOfWord,
+     {}),
+    (_base.replaceMultiExclamationMark,
+     legacy_replaceMultiExclamationMark,
+     legacy_replaceMultiExclamationMark, {}),
+    (_base.replaceElongated, legacy_replaceElongated,
+     legacy_replaceElongated, {}),
+    (_base.removeEmojis, legacy_removeEmojis, removeEmojis_each, {}),
+    (_base.removeEmojis, legacy_removeEmojis, removeEmojis_each,
+     {"use_placeholder": False}),
+    (_base.removeNumbers, legacy_removeNumbers, removeNumbers_each, {}),
+    (_base.removeNumbers, legacy_removeNumbers, removeNumbers_each,
+     {"use_placeholder": True}),
+    (_base.removePunctuation, legacy_removePunctuation,
+     legacy_removePunctuation, {}),
+]
+
+
+# The only outputs that changed: the old loops replaced every
+# occurrence of the text of a match, also where it was not matched,
+# e.g. the first emoji of a run of emojis matched on its own before.
+# (helper, legacy, kwargs, text, old text, new text)
+INTENDED_DIFFS = [
+    (_base.replaceAtUser, legacy_replaceAtUser, {"use_placeholder": True},
+     '@ab @abc', 'atUser atUserc', 'atUser atUser'),
+    (_base.removeTags, legacy_removeTags, {},
+     '#ab #abc', 'TAG TAGc', 'TAG TAG'),
+    (_base.removeEmojis, legacy_removeEmojis, {},
+     '😀 😀😀', 'EMOJI EMOJIEMOJI', 'EMOJI EMOJI'),
+    (_base.removeEmojis, legacy_removeEmojis, {},
+     '✨ ✨😀 😀', 'EMOJI EMOJIEMOJI EMOJI', 'EMOJI EMOJI EMOJI'),
+    (_base.removeNumbers, legacy_removeNumbers, {}, '1 21', ' 2', ' '),
+    (_base.removeNumbers, legacy_removeNumbers, {"use_placeholder": True},
+     '12/03/2020 12 12/03/2020', 'DATEMENTION NUM DATEMENTION',
+     'DATEMENTION DATEMENTION/YYYY'),
+]
+
+
+class TestRegression(unittest.TestCase):
+
+    def test_outputs_are_identical(self):
+        for helper, legacy, each, kwargs in CASES:
+            for text in corpus(500):
+                expected = legacy(text, **kwargs)
+                items = [item for value in expected[1].values()
+                         if isinstance(value, list) for item in value]
+                if rewrites_outside_matches(text, items):
+                    # See INTENDED_DIFFS
+                    expected = each(text, **kwargs)
+                with self.subTest(helper=helper.__name__, text=text):
+                    self.assertEqual(helper(text, **kwargs), expected)
+
+    def test_prefix_matches_are_kept(self):
+        for helper, legacy, kwargs, text, old, new in INTENDED_DIFFS:
+            with self.subTest(helper=helper.__name__, text=text):
+                self.assertEqual(legacy(text, **kwargs)[0], old)
+                self.assertEqual(helper(text, **kwargs)[0], new)
+
+        _, users = _base.replaceAtUser('@ab @abc', use_placeholder=True)
+        self.assertEqual(users, {'users': ['@ab', '@abc']})
+        _, numbers = _base.removeNumbers('1 21')
+        self.assertEqual(numbers['other'], ['1', '21'])
+
+
+class TestNonAlphChar(unittest.TestCase):
+
+    def test_every_codepoint(self):
+        # A fresh table, the one of the module is not filled
+        table = _base._NonAlphCharTable()
+        characters = [chr(codepoint) for codepoint in range(0x110000)]
+        with mock.patch.object(_base, '_NON_ALPH_CHAR_TABLE', table):
+            for i in range(0, len(characters), 4096):
+                text = "a".join(characters[i:i + 4096])
+                with self.subTest(start=hex(i)):
+                    self.assertEqual(_base.removeNonAlphChar(text),
+                                     legacy_removeNonAlphChar(text))
+        self.assertEqual(len(table), table.limit)
+
+    def test_corpus(self):
+        for text in corpus(500):
+            self.assertEqual(_base.removeNonAlphChar(text),
+                             legacy_removeNonAlphChar(text))
+
+
+class TestAsciiPaths(unittest.TestCase):
+
+    PAIRS = [
+        (_patterns.SUCCESSIONS_BEGIN_ASCII, _patterns.SUCCESSIONS_BEGIN),
+        (_patterns.SUCCESSIONS_END_ASCII, _patterns.SUCCESSIONS_END),
+        (_patterns.USER_ASCII, _patterns.USER),
+        (_patterns.HASHTAG_ASCII, _patterns.HASHTAG),
+        (_patterns.ELONGATED_ASCII, _patterns.ELONGATED),
+    ]
+
+    @staticmethod
+    def ascii_corpus(size, seed=0):
+        rng = random.Random(seed)
+        tokens = (list("aAbz_+1 @#.!") + ["URL", "aaa", "@a", "#b", " @c"] +
+                  ["\t", "\n", "\x0b", "\x0c", "\x1c", "\x1f", "\x00"])
+        for _ in range(size):
+            yield "".join(rng.choice(tokens)
+                          for _ in range(rng.randint(0, 20)))
+
+    def test_same_matches(self):
+        texts = list(self.ascii_corpus(3000)) + [
+            t for t in corpus(500) if t.isascii()]
+        for ascii_pattern, pattern in self.PAIRS:
+            for text in texts:
+                with self.subTest(pattern=ascii_pattern.pattern, text=text):
+                    self.assertEqual(
+                        [(m.span(), m.group())
+                         for m in ascii_pattern.finditer(text)],
+                        [(m.span(), m.group())
+                         for m in pattern.finditer(text)])
+                    self.assertEqual(
+                        bool(ascii_pattern.search(text)),
+                        bool(pattern.search(text)))
+
+    def test_non_alph_char(self):
+        text = "a".join(chr(codepoint) for codepoint in range(128))
+        self.assertEqual(_base.removeNonAlphChar(text),
+                         legacy_removeNonAlphChar(text))
+        for text in self.ascii_corpus(500):
+            self.assertEqual(_base.removeNonAlphChar(text),
+                             legacy_removeNonAlphChar(text))
+
+
+class TestStopWords(unittest.TestCase):
+
+    def test_outputs_are_identical(self):
+        texts = list(corpus(500)) + [
+            'The the THE sun\tshines  on the\nsea the',
+            'ΣΑΣ σας İF if If', '', '   ']
+        for lang in ('en', 'es'):
+            stopwords = stopword_registry.get(lang)
+            for text in texts:
+                with self.subTest(lang=lang, text=text):
+                    expected = legacy_removeStopWords(text, lang, stopwords)
+                    result = _base.removeStopWords(text, lang, stopwords)
+                    self.assertEqual(result, expected)
+                    self.assertEqual(list(result[1]['stopwords']),
+                                     list(expected[1]['stopwords']))
+
+
+class TestLinearScaling(unittest.TestCase):
+    """
+    The helpers used to run one replacement per match, which is
+    quadratic on spammy texts. Growing the number of matches 16 times
+    grows the time about 16 times, and 256 times with the old loops.
+    The bound is loose so loaded machines do not fail it.
+    """
+
+    def _best_time(self, func, text, repeat=5):
+        times = []
+        for _ in range(repeat):
+            t1 = time.perf_counter()
+            func(text)
+            times.append(time.perf_counter() - t1)
+        return min(times)
+
+    def _assert_linear(self, func, unit):
+        small = self._best_time(func, unit * 500)
+        large = self._best_time(func, unit * 8000)
+        self.assertLess(large / small, 100)
+
+    def test_removeTags(self):
+        self._assert_linear(_base.removeTags, '#spam ')
+
+    def test_replaceAtUser(self):
+        self._assert_linear(_base.replaceAtUser, '@spam ')
+
+    def test_removeHashtagInFrontOfWord(self):
+        self._assert_linear(_base.removeHashtagInFrontOfWord, '#spam ')
+
+    def test_removeEmojis(self):
+        self._assert_linear(_base.removeEmojis, '😀 ')
+
+    def test_replaceElongated(self):
+        self._assert_linear(_base.replaceElongated, 'sooo ')
+
+    def test_removePunctuation(self):
+        self._assert_linear(_base.removePunctuation, 'hi! ')
+
+    def test_removeNumbers(self):
+        self._assert_linear(_base.removeNumbers, '42 ')
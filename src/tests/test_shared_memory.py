@@ -0,0 +1,153 @@
+import importlib.util
+import os
+import time
+import unittest
+from preprocesser.features import ParallelExecutor
+from preprocesser.features._shared import (pack_texts, read_results,
+                                           read_texts, write_results)
+from preprocesser.models import (EN_PreProcesser, PreProcesser,
+                                 regex_step, register_step, unregister_step)
+
+HAS_PANDAS = importlib.util.find_spec('pandas') is not None
+
+TEXTS = ['Hola @user #tag sooo good!!! {}'.format(i) for i in range(200)]
+TEXTS += ['', 'ฉันรัก mañana 😀😀 $ 12 on 12/03/2020', 'a\ud800b', '\x00']
+
+
+def _segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+class TestSharedTransfer(unittest.TestCase):
+
+    def test_texts_round_trip(self):
+        shm = pack_texts(TEXTS)
+        try:
+            self.assertEqual(read_texts(shm.name, 0, len(TEXTS)), TEXTS)
+            self.assertEqual(read_texts(shm.name, 198, 203), TEXTS[198:203])
+            self.assertEqual(read_texts(shm.name, 7, 7), [])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_unpacking_does_not_grow_with_the_segment(self):
+        # Every chunk used to convert the offsets of the whole segment,
+        # quadratic in the number of texts of the batch
+        def best_time(shm):
+            times = []
+            for _ in range(5):
+                t1 = time.perf_counter()
+                read_texts(shm.name, 100, 110)
+                times.append(time.perf_counter() - t1)
+            return min(times)
+
+        small = pack_texts(TEXTS[:200])
+        large = pack_texts(TEXTS[:1] * 10 ** 6)
+        try:
+            self.assertLess(best_time(large) / best_time(small), 20)
+        finally:
+            for shm in (small, large):
+                shm.close()
+                shm.unlink()
+
+    def test_empty_texts(self):
+        shm = pack_texts([])
+        try:
+            self.assertEqual(read_texts(shm.name, 0, 0), [])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_results_round_trip(self):
+        texts = [text for text in TEXTS if '\ud800' not in text]
+        for p in (EN_PreProcesser(),
+                  PreProcesser(keep_features=['users', 'numbers'])):
+            batch = p.transform_batch(texts)
+            self.assertEqual(read_results(*write_results(batch)),
+                             [p(text) for text in texts])
+
+        pped = [EN_PreProcesser().clean(text) for text in TEXTS]
+        self.assertEqual(read_results(*write_results(pped)), pped)
+
+    def test_registered_step_round_trip(self):
+        register_step(regex_step('removeDigits', 'remove_digits', r'\d+',
+                                 key='digits'), before='removeUnicode')
+        self.addCleanup(unregister_step, 'removeDigits')
+        p = PreProcesser(remove_digits=True)
+        batch = p.transform_batch(TEXTS[:5])
+        self.assertEqual(read_results(*write_results(batch)),
+                         [p(text) for text in TEXTS[:5]])
+
+    def test_results_are_unlinked(self):
+        before = _segments()
+        read_results(*write_results(['hola']))
+        self.assertEqual(_segments(), before)
+
+
+class TestSharedMemoryExecutor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.p = EN_PreProcesser()
+        cls.texts = [text for text in TEXTS if '\ud800' not in text]
+        cls.expected = [cls.p(text) for text in cls.texts]
+        cls.executor = ParallelExecutor(cls.p, njobs=2, shared_memory=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def test_map(self):
+        before = _segments()
+        self.assertEqual(self.executor.map(self.texts), self.expected)
+        self.assertEqual(self.executor.map(self.texts, chunksize=7),
+                         self.expected)
+        self.assertEqual(self.executor.map([]), [])
+        self.assertEqual(_segments(), before)
+
+    def test_text_only(self):
+        self.assertEqual(self.executor.map(TEXTS, text_only=True),
+                         [self.p.clean(text) for text in TEXTS])
+
+    def test_text_only_preprocesser(self):
+        p = PreProcesser(text_only=True)
+        with ParallelExecutor(p, njobs=1, shared_memory=True) as executor:
+            self.assertEqual(executor.map(TEXTS), [p(text) for text in TEXTS])
+
+    def test_profiles_are_merged(self):
+        p = EN_PreProcesser({'profiling': True})
+        with ParallelExecutor(p, njobs=2, shared_memory=True) as executor:
+            executor.map(self.texts, chunksize=10)
+        self.assertEqual(p.profile.steps['removeUrls'].calls,
+                         len(self.texts))
+
+    def test_cache(self):
+        p = EN_PreProcesser({'cache': True})
+        texts = self.texts[:50] * 4
+        with ParallelExecutor(p, njobs=2, shared_memory=True) as executor:
+            self.assertEqual(executor.map(texts), self.expected[:50] * 4)
+            self.assertEqual(executor.map(texts), self.expected[:50] * 4)
+        self.assertEqual(len(p.cache), 50)
+
+    def test_errors_do_not_leak_segments(self):
+        before = _segments()
+        with self.assertRaises(AttributeError):
+            self.executor.map(self.texts[:10] + [None])
+        self.assertEqual(_segments(), before)
+        self.assertEqual(self.executor.map(self.texts[:10]),
+                         self.expected[:10])
+
+    def test_imap_is_unchanged(self):
+        self.assertEqual(list(self.executor.imap(iter(self.texts))),
+                         self.expected)
+
+    @unittest.skipUnless(HAS_PANDAS, 'pandas is not installed')
+    def test_parallel_preprocessing(self):
+        from preprocesser.features import parallel_preprocessing
+        results = parallel_preprocessing(self.p, self.texts, njobs=2,
+                                         shared_memory=True)
+        self.assertEqual(list(results), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from preprocesser.data import StopwordRegistry, make_stopwords
+from preprocesser.data import _stopwords_registry
+from preprocesser.models import EN_PreProcesser, ES_PreProcesser
+
+
+class TestStopwordRegistry(unittest.TestCase):
+
+    def test_get_returns_frozen_set(self):
+        registry = StopwordRegistry()
+        stopwords = registry.get('en')
+        self.assertIsInstance(stopwords, frozenset)
+        self.assertEqual(stopwords, make_stopwords('en'))
+
+    def test_get_loads_once(self):
+        registry = StopwordRegistry()
+        first = registry.get('es')
+        second = registry.get('es')
+        self.assertIs(first, second)
+        self.assertEqual(registry.stats(),
+                         {'hits': 1, 'misses': 1, 'languages': 1})
+
+    def test_preload(self):
+        registry = StopwordRegistry()
+        registry.preload(['en', 'es'])
+        self.assertIn('en', registry)
+        self.assertIn('es', registry)
+        self.assertEqual(registry.misses, 2)
+
+    def test_concurrent_preloads(self):
+        registry = StopwordRegistry()
+
+        def slow_make_stopwords(lang):
+            time.sleep(0.05)
+            return make_stopwords(lang)
+
+        with mock.patch.object(_stopwords_registry, 'make_stopwords',
+                               side_effect=slow_make_stopwords) as load:
+            threads = [threading.Thread(target=registry.preload,
+                                        args=(['en'], False))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        load.assert_called_once_with('en')
+        self.assertEqual(registry.stats(),
+                         {'hits': 0, 'misses': 1, 'languages': 1})
+
+    def test_eviction_keeps_pinned_languages(self):
+        registry = StopwordRegistry(max_languages=2)
+        registry.preload(['en'])
+        registry.get('es')
+        registry.get('fr')
+        self.assertIn('en', registry)
+        self.assertNotIn('es', registry)
+        self.assertIn('fr', registry)
+
+    def test_evict(self):
+        registry = StopwordRegistry()
+        registry.get('en')
+        registry.evict('en')
+        self.assertNotIn('en', registry)
+
+    def test_preprocessers_share_sets(self):
+        self.assertIs(EN_PreProcesser().stopwords,
+                      EN_PreProcesser().stopwords)
+        self.assertIs(ES_PreProcesser().stopwords,
+                      ES_PreProcesser().stopwords)
@@ -0,0 +1,129 @@
+import importlib.util
+import random
+import unittest
+from preprocesser.models import EN_PreProcesser, PreProcesser
+
+HAS_PANDAS = importlib.util.find_spec('pandas') is not None
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+TEXTS = [
+    '',
+    '   ',
+    'Hola @user #tag sooo good!!! the 12',
+    'Check https://t.co/abc!!! Sooooo goooood?? 😀😀 #x+y ✨',
+    '&amp; \\u00e9 ฉันรัก mañana #ñ ##a+b @ß wow.....',
+    # Case mappings of pyarrow and Python differ outside ASCII
+    'İSTANBUL ΣΑΣ Straße ǅ ẞ K Å',
+    # White spaces that RE2 does not match with \\s
+    'a\x1cb\x1d c　　d\xa0\xa0e ',
+    '  !!!??...  \t\r\n x  ',
+]
+
+CONFIGS = [
+    {},
+    {'use_placeholder': True},
+    {'tolower': False, 'punctuation': True},
+    {'keep_features': ['exclams', 'users']},
+    {'text_only': True},
+]
+
+
+def _fuzz(n, seed=0):
+    rng = random.Random(seed)
+    alphabet = (list('aA !?.&;#@0İ') + ['\\u00e9', 'amp;', '😀', 'ß'] +
+                ['\t', '\n', '\x1c', '\x85', '\xa0', ' ', '　'])
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            for _ in range(n)]
+
+
+@unittest.skipUnless(HAS_PANDAS, 'pandas is not installed')
+class TestVectorizedPreprocessing(unittest.TestCase):
+
+    engines = ['pandas'] + (['pyarrow'] if HAS_PYARROW else [])
+
+    def _check(self, p, texts):
+        from preprocesser.features import vectorized_preprocessing
+        expected = [p(text) for text in texts]
+        for engine in self.engines:
+            with self.subTest(engine=engine):
+                results = vectorized_preprocessing(p, texts, engine=engine)
+                self.assertEqual(results, expected)
+                # The features are in the same order too
+                self.assertEqual([list(r) for r in results
+                                  if isinstance(r, dict)],
+                                 [list(r) for r in expected
+                                  if isinstance(r, dict)])
+
+    def test_identical_results(self):
+        texts = TEXTS + _fuzz(500)
+        for config in CONFIGS:
+            with self.subTest(config=config):
+                self._check(PreProcesser(**config), texts)
+
+    def test_language_preprocesser(self):
+        self._check(EN_PreProcesser(), TEXTS)
+
+    def test_text_only(self):
+        from preprocesser.features import vectorized_preprocessing
+        p = EN_PreProcesser()
+        for engine in self.engines:
+            results = vectorized_preprocessing(p, TEXTS, text_only=True,
+                                               engine=engine)
+            self.assertEqual(results,
+                             [p.clean(text) for text in TEXTS])
+
+    def test_series(self):
+        import pandas as pd
+        from preprocesser.features import vectorized_preprocessing
+        p = EN_PreProcesser()
+        texts = pd.Series(TEXTS, index=range(10, 10 + len(TEXTS)))
+        results = vectorized_preprocessing(p, texts, text_only=True)
+        self.assertIsInstance(results, pd.Series)
+        self.assertEqual(list(results.index), list(texts.index))
+        self.assertEqual(results.tolist(), [p.clean(text) for text in TEXTS])
+
+    @unittest.skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_arrow_array(self):
+        import pyarrow as pa
+        from preprocesser.features import vectorized_preprocessing
+        p = EN_PreProcesser()
+        for texts in (pa.array(TEXTS), pa.chunked_array([TEXTS[:3],
+                                                         TEXTS[3:]])):
+            results = vectorized_preprocessing(p, texts, text_only=True)
+            self.assertEqual(results.to_pylist(),
+                             [p.clean(text) for text in TEXTS])
+            self.assertEqual(vectorized_preprocessing(p, texts),
+                             [p(text) for text in TEXTS])
+
+    def test_surrogates_fall_back_to_pandas(self):
+        from preprocesser.features import vectorized_preprocessing
+        p = PreProcesser()
+        self.assertEqual(vectorized_preprocessing(p, ['a\ud800  b!!']),
+                         [p('a\ud800  b!!')])
+
+    def test_profiling_runs_text_by_text(self):
+        from preprocesser.features import vectorized_preprocessing
+        p = PreProcesser(profiling=True)
+        vectorized_preprocessing(p, TEXTS)
+        self.assertEqual(p.profile.steps['toLower'].calls, len(TEXTS))
+
+    def test_unknown_engine(self):
+        from preprocesser.features import vectorized_preprocessing
+        with self.assertRaises(ValueError):
+            vectorized_preprocessing(PreProcesser(), TEXTS, engine='polars')
+
+    def test_sequential_preprocessing(self):
+        from preprocesser.features import sequential_preprocessing
+        p = EN_PreProcesser()
+        texts = TEXTS * 3
+        for dedup in (False, True):
+            results = sequential_preprocessing(p, texts, vectorized=True,
+                                               dedup=dedup)
+            self.assertEqual(list(results), [p(text) for text in texts])
+        results = sequential_preprocessing(p, texts, vectorized=True,
+                                           text_only=True)
+        self.assertEqual(list(results), [p.clean(text) for text in texts])
+
+
+if __name__ == '__main__':
+    unittest.main()